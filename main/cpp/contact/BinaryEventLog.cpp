@@ -0,0 +1,169 @@
+/*
+ *  This is free software: you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  any later version.
+ *  The software is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *  You should have received a copy of the GNU General Public License
+ *  along with the software. If not, see <http://www.gnu.org/licenses/>.
+ *
+ *  Copyright 2020, Willem L, Kuylen E, Broeckhove J
+ */
+
+/**
+ * @file
+ * Implementation of the BinaryEventLog class.
+ */
+
+#include "BinaryEventLog.h"
+
+#include "pop/Person.h"
+
+#include <stdexcept>
+
+namespace {
+
+/// Records are collected in memory and written in blocks of (at least) this size.
+constexpr std::size_t BUFFER_SIZE = 1U << 20;
+
+// Record sizes are part of the file format (see BINARY_DTYPES in main/python/event_log.py).
+static_assert(sizeof(stride::BinaryEventLog::TransmissionRecord) == 48, "Unexpected TransmissionRecord size");
+static_assert(sizeof(stride::BinaryEventLog::ContactRecord) == 33, "Unexpected ContactRecord size");
+static_assert(sizeof(stride::BinaryEventLog::NonComplierRecord) == 38, "Unexpected NonComplierRecord size");
+
+} // namespace
+
+namespace stride {
+
+using namespace std;
+using namespace stride::ContactType;
+
+BinaryEventLog::BinaryEventLog(const string& prefix) : m_prim(), m_trans(), m_cont(), m_ncom()
+{
+        const auto open = [&prefix](RecordFile& file, const string& tag) {
+                const auto fileName = prefix + "_" + tag + ".bin";
+                file.m_out.open(fileName, ios::binary | ios::trunc);
+                if (!file.m_out) {
+                        throw runtime_error("BinaryEventLog> Could not open file " + fileName);
+                }
+                file.m_buffer.reserve(BUFFER_SIZE);
+        };
+        open(m_prim, "prim");
+        open(m_trans, "tran");
+        open(m_cont, "cont");
+        open(m_ncom, "ncom");
+}
+
+BinaryEventLog::~BinaryEventLog() { Flush(); }
+
+void BinaryEventLog::Prim(const Person& p, unsigned short int simDay)
+{
+        const auto&        h = p.GetHealth();
+        TransmissionRecord r{};
+        r.infected_id             = static_cast<int32_t>(p.GetId());
+        r.infector_id             = -1;
+        r.infected_age            = p.GetAge();
+        r.infector_age            = -1;
+        r.pool_type               = -1;
+        r.sim_day                 = simDay;
+        r.id_index_case           = static_cast<int32_t>(p.GetId());
+        r.start_infectiousness    = h.GetStartInfectiousness();
+        r.end_infectiousness      = h.GetEndInfectiousness();
+        r.start_symptoms          = h.GetStartSymptomatic();
+        r.end_symptoms            = h.GetEndSymptomatic();
+        r.infector_is_symptomatic = -1;
+        r.relative_infectiousness = h.GetRelativeInfectiousness();
+        r.relative_susceptibility = h.GetRelativeSusceptibility();
+        Write(m_prim, r);
+}
+
+void BinaryEventLog::Trans(const Person* p1, const Person* p2, Id type, unsigned short int simDay,
+                           unsigned int idIndexCase, double relInfectiousness)
+{
+        const auto&        h2 = p2->GetHealth();
+        TransmissionRecord r{};
+        r.infected_id             = static_cast<int32_t>(p2->GetId());
+        r.infector_id             = static_cast<int32_t>(p1->GetId());
+        r.infected_age            = p2->GetAge();
+        r.infector_age            = p1->GetAge();
+        r.pool_type               = static_cast<int8_t>(type);
+        r.sim_day                 = simDay;
+        r.id_index_case           = static_cast<int32_t>(idIndexCase);
+        r.start_infectiousness    = h2.GetStartInfectiousness();
+        r.end_infectiousness      = h2.GetEndInfectiousness();
+        r.start_symptoms          = h2.GetStartSymptomatic();
+        r.end_symptoms            = h2.GetEndSymptomatic();
+        r.infector_is_symptomatic = static_cast<int8_t>(p1->GetHealth().IsSymptomatic());
+        r.relative_infectiousness = relInfectiousness;
+        r.relative_susceptibility = h2.GetRelativeSusceptibility();
+        Write(m_trans, r);
+}
+
+void BinaryEventLog::Contact(const Person* p1, const Person* p2, Id type, unsigned short int simDay, double cProb,
+                             double tProb)
+{
+        ContactRecord r{};
+        r.person_id                = static_cast<int32_t>(p1->GetId());
+        r.person_age               = p1->GetAge();
+        r.contact_age              = p2->GetAge();
+        r.pool_type                = static_cast<int8_t>(type);
+        r.sim_day                  = simDay;
+        r.contact_probability      = cProb;
+        r.transmission_probability = tProb;
+        r.contact_is_symptomatic   = static_cast<uint8_t>(p2->GetHealth().IsSymptomatic());
+        r.person_is_symptomatic    = static_cast<uint8_t>(p1->GetHealth().IsSymptomatic());
+        Write(m_cont, r);
+}
+
+void BinaryEventLog::NonComplier(const Person& p)
+{
+        NonComplierRecord r{};
+        r.person_id              = static_cast<int32_t>(p.GetId());
+        r.age                    = p.GetAge();
+        r.household_id           = p.GetPoolId(Id::Household);
+        r.household_nc           = static_cast<uint8_t>(p.IsNonComplier(Id::Household));
+        r.k12school_id           = p.GetPoolId(Id::K12School);
+        r.k12school_nc           = static_cast<uint8_t>(p.IsNonComplier(Id::K12School));
+        r.college_id             = p.GetPoolId(Id::College);
+        r.college_nc             = static_cast<uint8_t>(p.IsNonComplier(Id::College));
+        r.workplace_id           = p.GetPoolId(Id::Workplace);
+        r.workplace_nc           = static_cast<uint8_t>(p.IsNonComplier(Id::Workplace));
+        r.primary_community_id   = p.GetPoolId(Id::PrimaryCommunity);
+        r.primary_community_nc   = static_cast<uint8_t>(p.IsNonComplier(Id::PrimaryCommunity));
+        r.secondary_community_id = p.GetPoolId(Id::SecondaryCommunity);
+        r.secondary_community_nc = static_cast<uint8_t>(p.IsNonComplier(Id::SecondaryCommunity));
+        Write(m_ncom, r);
+}
+
+void BinaryEventLog::Flush()
+{
+        Flush(m_prim);
+        Flush(m_trans);
+        Flush(m_cont);
+        Flush(m_ncom);
+}
+
+template <typename R>
+void BinaryEventLog::Write(RecordFile& file, const R& record)
+{
+        const auto             bytes = reinterpret_cast<const char*>(&record);
+        lock_guard<std::mutex> lock(file.m_mutex);
+        file.m_buffer.insert(file.m_buffer.end(), bytes, bytes + sizeof(R));
+        if (file.m_buffer.size() >= BUFFER_SIZE) {
+                file.m_out.write(file.m_buffer.data(), static_cast<streamsize>(file.m_buffer.size()));
+                file.m_buffer.clear();
+        }
+}
+
+void BinaryEventLog::Flush(RecordFile& file)
+{
+        lock_guard<std::mutex> lock(file.m_mutex);
+        file.m_out.write(file.m_buffer.data(), static_cast<streamsize>(file.m_buffer.size()));
+        file.m_buffer.clear();
+        file.m_out.flush();
+}
+
+} // namespace stride
@@ -0,0 +1,149 @@
+/*
+ *  This is free software: you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  any later version.
+ *  The software is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *  You should have received a copy of the GNU General Public License
+ *  along with the software. If not, see <http://www.gnu.org/licenses/>.
+ *
+ *  Copyright 2020, Willem L, Kuylen E, Broeckhove J
+ */
+
+/**
+ * @file
+ * Header for the BinaryEventLog class.
+ */
+
+#pragma once
+
+#include "contact/ContactType.h"
+
+#include <cstdint>
+#include <fstream>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace stride {
+
+class Person;
+
+/**
+ * Binary alternative for the [PRIM], [TRAN], [CONT] and [NCOM] lines of the event log.
+ * Each tag goes to its own file <prefix>_<tag>.bin that holds a plain sequence of
+ * packed, little-endian, fixed-width records (no header). The record layouts below
+ * are mirrored by BINARY_DTYPES in main/python/event_log.py, so that the files can
+ * be mapped onto record arrays without parsing.
+ */
+class BinaryEventLog
+{
+public:
+#pragma pack(push, 1)
+        /// Record for [PRIM] and [TRAN]. Index cases have infector_id, infector_age and pool_type -1.
+        struct TransmissionRecord
+        {
+                std::int32_t  infected_id;
+                std::int32_t  infector_id;
+                float         infected_age;
+                float         infector_age;
+                std::int8_t   pool_type;
+                std::uint16_t sim_day;
+                std::int32_t  id_index_case;
+                std::uint16_t start_infectiousness;
+                std::uint16_t end_infectiousness;
+                std::uint16_t start_symptoms;
+                std::uint16_t end_symptoms;
+                std::int8_t   infector_is_symptomatic;
+                double        relative_infectiousness;
+                double        relative_susceptibility;
+        };
+
+        /// Record for [CONT], with the pool type as ContactType::Id instead of indicator columns.
+        struct ContactRecord
+        {
+                std::int32_t  person_id;
+                float         person_age;
+                float         contact_age;
+                std::int8_t   pool_type;
+                std::uint16_t sim_day;
+                double        contact_probability;
+                double        transmission_probability;
+                std::uint8_t  contact_is_symptomatic;
+                std::uint8_t  person_is_symptomatic;
+        };
+
+        /// Record for [NCOM].
+        struct NonComplierRecord
+        {
+                std::int32_t  person_id;
+                float         age;
+                std::uint32_t household_id;
+                std::uint8_t  household_nc;
+                std::uint32_t k12school_id;
+                std::uint8_t  k12school_nc;
+                std::uint32_t college_id;
+                std::uint8_t  college_nc;
+                std::uint32_t workplace_id;
+                std::uint8_t  workplace_nc;
+                std::uint32_t primary_community_id;
+                std::uint8_t  primary_community_nc;
+                std::uint32_t secondary_community_id;
+                std::uint8_t  secondary_community_nc;
+        };
+#pragma pack(pop)
+
+public:
+        /// Open the record files <prefix>_prim.bin, <prefix>_tran.bin, <prefix>_cont.bin and <prefix>_ncom.bin.
+        explicit BinaryEventLog(const std::string& prefix);
+
+        /// Flushes all buffered records.
+        ~BinaryEventLog();
+
+        /// Log an index case (cfr. [PRIM]).
+        void Prim(const Person& p, unsigned short int simDay);
+
+        /// Log a transmission from infector p1 to infectee p2 (cfr. [TRAN]).
+        void Trans(const Person* p1, const Person* p2, ContactType::Id type, unsigned short int simDay,
+                   unsigned int idIndexCase, double relInfectiousness);
+
+        /// Log a contact of survey participant p1 with p2 (cfr. [CONT]).
+        void Contact(const Person* p1, const Person* p2, ContactType::Id type, unsigned short int simDay,
+                     double cProb, double tProb);
+
+        /// Log a non-complier (cfr. [NCOM]).
+        void NonComplier(const Person& p);
+
+        /// Write all buffered records to file.
+        void Flush();
+
+private:
+        /// Output file with its own write buffer; records can be added from multiple threads.
+        struct RecordFile
+        {
+                RecordFile() : m_out(), m_buffer(), m_mutex() {}
+
+                RecordFile(const RecordFile&) = delete;
+                RecordFile& operator=(const RecordFile&) = delete;
+
+                std::ofstream     m_out;
+                std::vector<char> m_buffer;
+                std::mutex        m_mutex;
+        };
+
+        template <typename R>
+        void Write(RecordFile& file, const R& record);
+
+        static void Flush(RecordFile& file);
+
+private:
+        RecordFile m_prim;
+        RecordFile m_trans;
+        RecordFile m_cont;
+        RecordFile m_ncom;
+};
+
+} // namespace stride
@@ -34,13 +34,13 @@ template <EventLogMode::Id LL>
 class LOG_POLICY
 {
 public:
-        static void Contact(const std::shared_ptr<spdlog::logger>&, const Person*, const Person*, ContactType::Id,
-                            unsigned short int, const double, const double)
+        static void Contact(const std::shared_ptr<spdlog::logger>&, BinaryEventLog*, const Person*, const Person*,
+                            ContactType::Id, unsigned short int, const double, const double)
         {
         }
 
-        static void Trans(const std::shared_ptr<spdlog::logger>&, const Person*, const Person*, ContactType::Id,
-                          unsigned short int, unsigned int)
+        static void Trans(const std::shared_ptr<spdlog::logger>&, BinaryEventLog*, const Person*, const Person*,
+                          ContactType::Id, unsigned short int, unsigned int)
         {
         }
 };
@@ -50,14 +50,14 @@ template <>
 class LOG_POLICY<EventLogMode::Id::Incidence>
 {
 public:
-        static void Contact(const std::shared_ptr<spdlog::logger>&, const Person*, const Person*, ContactType::Id,
-                            unsigned short int, const double, const double)
+        static void Contact(const std::shared_ptr<spdlog::logger>&, BinaryEventLog*, const Person*, const Person*,
+                            ContactType::Id, unsigned short int, const double, const double)
         {
         }
 
         // p1: infector & p2:infectee
-        static void Trans(const std::shared_ptr<spdlog::logger>& logger, const Person* p1, const Person* p2,
-                          ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
+        static void Trans(const std::shared_ptr<spdlog::logger>& logger, BinaryEventLog*, const Person* p1,
+                          const Person* p2, ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
         {
                 logger->info("[TRAN_M] {} {} {} {} {}",
 							 p2->GetAge(),
@@ -74,15 +74,19 @@ template <>
 class LOG_POLICY<EventLogMode::Id::Transmissions>
 {
 public:
-        static void Contact(const std::shared_ptr<spdlog::logger>&, const Person*, const Person*, ContactType::Id,
-                            unsigned short int, const double, const double)
+        static void Contact(const std::shared_ptr<spdlog::logger>&, BinaryEventLog*, const Person*, const Person*,
+                            ContactType::Id, unsigned short int, const double, const double)
         {
         }
 
         // p1: infector & p2:infectee
-        static void Trans(const std::shared_ptr<spdlog::logger>& logger, const Person* p1, const Person* p2,
-                          ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
+        static void Trans(const std::shared_ptr<spdlog::logger>& logger, BinaryEventLog* binLog, const Person* p1,
+                          const Person* p2, ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
         {
+                if (binLog) {
+                        binLog->Trans(p1, p2, type, sim_day, id_index_case, p2->GetHealth().GetRelativeInfectiousness());
+                        return;
+                }
                 logger->info("[TRAN] {} {} {} {} {} {} {} {} {} {} {} {} {} {}", p2->GetId(), p1->GetId(), p2->GetAge(), p1->GetAge(),
                              ToString(type), sim_day, id_index_case,
 							 p2->GetHealth().GetStartInfectiousness(),p2->GetHealth().GetEndInfectiousness(),
@@ -98,10 +102,15 @@ template <>
 class LOG_POLICY<EventLogMode::Id::All>
 {
 public:
-        static void Contact(const std::shared_ptr<spdlog::logger>& logger, const Person* p1, const Person* p2,
-                            ContactType::Id type, unsigned short int sim_day, const double cProb, const double tProb)
+        static void Contact(const std::shared_ptr<spdlog::logger>& logger, BinaryEventLog* binLog, const Person* p1,
+                            const Person* p2, ContactType::Id type, unsigned short int sim_day, const double cProb,
+                            const double tProb)
         {
                 if (p1->IsSurveyParticipant()) {
+                        if (binLog) {
+                                binLog->Contact(p1, p2, type, sim_day, cProb, tProb);
+                                return;
+                        }
                         logger->info("[CONT] {} {} {} {} {} {} {} {} {} {} {} {} {} {} {}", p1->GetId(), p1->GetAge(),
                                      p2->GetAge(), static_cast<unsigned int>(type == ContactType::Id::Household),
                                      static_cast<unsigned int>(type == ContactType::Id::K12School),
@@ -115,9 +124,13 @@ public:
                 }
         }
 
-        static void Trans(const std::shared_ptr<spdlog::logger>& logger, const Person* p1, const Person* p2,
-                          ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
+        static void Trans(const std::shared_ptr<spdlog::logger>& logger, BinaryEventLog* binLog, const Person* p1,
+                          const Person* p2, ContactType::Id type, unsigned short int sim_day, unsigned int id_index_case)
         {
+                if (binLog) {
+                        binLog->Trans(p1, p2, type, sim_day, id_index_case, p1->GetHealth().GetRelativeInfectiousness());
+                        return;
+                }
                 logger->info("[TRAN] {} {} {} {} {} {} {} {} {} {} {} {} {} {}", p2->GetId(), p1->GetId(), p2->GetAge(), p1->GetAge(),
                              ToString(type), sim_day, id_index_case,
 							 p2->GetHealth().GetStartInfectiousness(),p2->GetHealth().GetEndInfectiousness(),
@@ -260,6 +273,7 @@ void Infector<LL, TIC, TO>::Exec(ContactPool& pool, const AgeContactProfile& pro
         using LP = LOG_POLICY<LL>;
 
         // set up some stuff
+        const auto  binLog   = population->RefBinaryEventLog().get();
         const auto  pType    = pool.m_pool_type;
         const auto& pMembers = pool.m_members;
         const auto  pSize    = pMembers.size();
@@ -291,9 +305,9 @@ void Infector<LL, TIC, TO>::Exec(ContactPool& pool, const AgeContactProfile& pro
 								const auto  tProb_p2_p1    = transProfile.GetProbability(p2,p1);
 
                                 // log contact if person 1 is participating in survey
-                                LP::Contact(eventLogger, p1, p2, pType, simDay, cProb, tProb_p1_p2);
+                                LP::Contact(eventLogger, binLog, p1, p2, pType, simDay, cProb, tProb_p1_p2);
                                 // log contact if person 2 is participating in survey
-                                LP::Contact(eventLogger, p2, p1, pType, simDay, cProb, tProb_p2_p1);
+                                LP::Contact(eventLogger, binLog, p2, p1, pType, simDay, cProb, tProb_p2_p1);
 
 
                                 // if track&trace is in place, option to register (both) contact(s)
@@ -314,7 +328,7 @@ void Infector<LL, TIC, TO>::Exec(ContactPool& pool, const AgeContactProfile& pro
 
 										if (TIC)
 												h2.StopInfection();
-										LP::Trans(eventLogger, p1, p2, pType, simDay, h1.GetIdIndexCase());
+										LP::Trans(eventLogger, binLog, p1, p2, pType, simDay, h1.GetIdIndexCase());
 								}
 
 								// if h2 infectious, account for susceptibility of p1
@@ -326,7 +340,7 @@ void Infector<LL, TIC, TO>::Exec(ContactPool& pool, const AgeContactProfile& pro
 
 										if (TIC)
 												h1.StopInfection();
-										LP::Trans(eventLogger, p2, p1, pType, simDay, h2.GetIdIndexCase());
+										LP::Trans(eventLogger, binLog, p2, p1, pType, simDay, h2.GetIdIndexCase());
 								}
                         }
                 }
@@ -357,6 +371,7 @@ void Infector<LL, TIC, true>::Exec(ContactPool& pool, const AgeContactProfile& p
         }
 
         // set up some stuff
+        const auto  binLog   = population->RefBinaryEventLog().get();
         const auto  pType    = pool.m_pool_type;
         const auto  pImmune  = pool.m_index_immune;
         const auto& pMembers = pool.m_members;
@@ -396,7 +411,7 @@ void Infector<LL, TIC, true>::Exec(ContactPool& pool, const AgeContactProfile& p
                                                 // No secondary infections with TIC; just mark p2 'recovered'
                                                 if (TIC)
                                                         h2.StopInfection();
-                                                LP::Trans(eventLogger, p1, p2, pType, simDay, h1.GetIdIndexCase());
+                                                LP::Trans(eventLogger, binLog, p1, p2, pType, simDay, h1.GetIdIndexCase());
                                         }
                                 }
                         }
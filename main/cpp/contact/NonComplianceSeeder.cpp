@@ -27,6 +27,12 @@
 
 #include <boost/property_tree/ptree.hpp>
 #include <cassert>
+#include <cctype>
+#include <cerrno>
+#include <cstdlib>
+#include <fstream>
+#include <limits>
+#include <stdexcept>
 
 using namespace boost::property_tree;
 using namespace stride::ContactType;
@@ -116,21 +122,18 @@ void NonComplianceSeeder::SeedPools(std::shared_ptr<Population> pop, string nonC
 		// Non-compliance is dependant on the geographical location of one's household
 
 		const auto hotspotsFile = m_config.get<string>("run.non_compliance_hotspots_file");
-		const ptree& hotspots_pt = FileSys::ReadPtreeFile(hotspotsFile);
 
-		for (auto district : hotspots_pt.get_child("hotspots")) {
+		for (const auto& district : ReadHotspots(hotspotsFile)) {
 			// Get total number of persons in hotspot
 			unsigned int totalDistrictPop = 0U;
-			// Save IDs of households in hotspot district
-			vector<unsigned int> householdsInDistrict;
-			for (auto household : district.second.get_child("households")) {
-				unsigned int hhID = household.second.get_value<unsigned int>();
-				householdsInDistrict.push_back(hhID);
+			// IDs of households in hotspot district
+			const vector<unsigned int>& householdsInDistrict = district.households;
+			for (unsigned int hhID : householdsInDistrict) {
 				totalDistrictPop += static_cast<int>(pop->CRefPoolSys().CRefPools(Id::Household)[hhID].size());
 			}
 			// Calculate the number of non-compliers per 'hotspot' district
 			// = number of individuals in households belonging to district * fraction non-compliers in district
-			double fractionNonCompliers = district.second.get<double>("fraction_non_compliers");
+			double fractionNonCompliers = district.fraction_non_compliers;
 			unsigned int targetNumNonCompliers = floor(totalDistrictPop * fractionNonCompliers);
 
 			// Sample non-compliers in this district
@@ -195,6 +198,87 @@ void NonComplianceSeeder::SeedPools(std::shared_ptr<Population> pop, string nonC
 }
 
 
+vector<NonComplianceSeeder::HotspotDistrict> NonComplianceSeeder::ReadHotspots(const string& fileName)
+{
+	vector<HotspotDistrict> districts;
+
+	const string extension = ".csv";
+	if (fileName.size() < extension.size() || fileName.compare(fileName.size() - extension.size(), extension.size(), extension) != 0) {
+		const ptree& hotspots_pt = FileSys::ReadPtreeFile(fileName);
+		for (const auto& district : hotspots_pt.get_child("hotspots")) {
+			HotspotDistrict hotspot{district.second.get<double>("fraction_non_compliers"), {}};
+			for (const auto& household : district.second.get_child("households")) {
+				hotspot.households.push_back(household.second.get_value<unsigned int>());
+			}
+			districts.push_back(std::move(hotspot));
+		}
+		return districts;
+	}
+
+	ifstream in(fileName);
+	if (!in) {
+		throw runtime_error("NonComplianceSeeder::ReadHotspots> Abort! File " + fileName + " not present.");
+	}
+	string line;
+	// Skip header
+	getline(in, line);
+	unsigned int lineNumber = 1;
+	long previousDistrictId = -1;
+	while (getline(in, line)) {
+		lineNumber++;
+		if (!line.empty() && line.back() == '\r') {
+			line.pop_back();
+		}
+		if (line.empty()) {
+			continue;
+		}
+		const auto invalid = [&fileName, &lineNumber, &line]() {
+			return runtime_error("NonComplianceSeeder::ReadHotspots> Invalid line " + to_string(lineNumber) + " in " +
+			                     fileName + ": '" + line + "'");
+		};
+		// district_id,fraction_non_compliers,first_hh_id,last_hh_id: every field has to be
+		// parsed completely and followed by a comma, or by the end of the line for the last one
+		const char* pos       = line.c_str();
+		char*       end       = nullptr;
+		const auto  nextField = [&pos, &end, &invalid](bool last) {
+			if (end == pos || errno == ERANGE || *end != (last ? '\0' : ',')) {
+				throw invalid();
+			}
+			pos = end + 1;
+		};
+		errno                 = 0;
+		const long districtId = strtol(pos, &end, 10);
+		nextField(false);
+		const double fraction = strtod(pos, &end);
+		nextField(false);
+		// strtoul accepts (and negates) a sign, ids do not have one
+		if (!isdigit(static_cast<unsigned char>(*pos))) {
+			throw invalid();
+		}
+		const unsigned long firstHhId = strtoul(pos, &end, 10);
+		nextField(false);
+		if (!isdigit(static_cast<unsigned char>(*pos))) {
+			throw invalid();
+		}
+		const unsigned long lastHhId = strtoul(pos, &end, 10);
+		nextField(true);
+		if (districtId < 0 || !(fraction >= 0.0 && fraction <= 1.0) || firstHhId > lastHhId ||
+		    lastHhId > numeric_limits<unsigned int>::max()) {
+			throw invalid();
+		}
+
+		if (districts.empty() || districtId != previousDistrictId) {
+			districts.push_back(HotspotDistrict{fraction, {}});
+			previousDistrictId = districtId;
+		}
+		// Bound in unsigned long long, so that a range ending at UINT_MAX terminates
+		for (unsigned long long hhID = firstHhId; hhID < lastHhId + 1ULL; hhID++) {
+			districts.back().households.push_back(static_cast<unsigned int>(hhID));
+		}
+	}
+	return districts;
+}
+
 bool NonComplianceSeeder::RegisterNonComplier(std::shared_ptr<Population> pop, Person& p, Id pooltype)
 {
 	Population& population  = *pop;
@@ -209,6 +293,10 @@ bool NonComplianceSeeder::RegisterNonComplier(std::shared_ptr<Population> pop, P
 	}
 
 	// Log person details
+	if (population.RefBinaryEventLog()) {
+		population.RefBinaryEventLog()->NonComplier(p);
+		return true;
+	}
 	logger->info("[NCOM] {} {} {} {} {} {} {} {} {} {} {} {} {} {}", p.GetId(), p.GetAge(),
 									p.GetPoolId(Id::Household), p.IsNonComplier(Id::Household),
 									p.GetPoolId(Id::K12School), p.IsNonComplier(Id::K12School),
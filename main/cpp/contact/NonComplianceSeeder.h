@@ -22,6 +22,8 @@
 
 #include <boost/property_tree/ptree_fwd.hpp>
 #include <memory>
+#include <string>
+#include <vector>
 
 #include "contact/ContactType.h"
 
@@ -41,6 +43,13 @@ class RnMan;
 class NonComplianceSeeder
 {
 public:
+	/// A 'hotspot' district: the households in it and the fraction of non-compliers among their members.
+	struct HotspotDistrict
+	{
+		double                    fraction_non_compliers;
+		std::vector<unsigned int> households;
+	};
+
 	/// Initialize Seeder.
 	/// \param config 		Configuration parameters.
 	/// \param rnMan			Random number manager.
@@ -56,6 +65,13 @@ public:
     /// Register a selected person as a non-complier
     /// \param p 				Person to register
     bool RegisterNonComplier(std::shared_ptr<Population> pop, Person& p, ContactType::Id pooltype);
+
+    /// Read hotspot districts, in file order, from either
+    /// - an xml file: hotspots -> * -> (fraction_non_compliers, households -> * = household id), or
+    /// - a compact csv file (extension .csv) with header district_id,fraction_non_compliers,first_hh_id,last_hh_id
+    ///   and one line per range of consecutive household ids, the lines of a district being consecutive.
+    /// \param fileName 		Path of the hotspots file.
+    static std::vector<HotspotDistrict> ReadHotspots(const std::string& fileName);
 private:
     const boost::property_tree::ptree& m_config; ///< Run config.
     util::RnMan&                       m_rn_man; ///< Random number manager.
@@ -93,6 +93,7 @@ void DiseaseSeeder::ImportInfectedCases(std::shared_ptr<Population> pop, unsigne
         const auto   maxPopIndex = static_cast<int>(popSize - 1);
         auto         generator   = m_rn_man.GetUniformIntGenerator(0, maxPopIndex, 0U);
         auto&        logger      = pop->RefEventLogger();
+        const auto   binLog      = pop->RefBinaryEventLog();
         const EventLogMode::Id log_level   = EventLogMode::ToMode(m_config.get<string>("run.event_log_level", "None"));
 
         while (numInfected > 0) {
@@ -103,7 +104,9 @@ void DiseaseSeeder::ImportInfectedCases(std::shared_ptr<Population> pop, unsigne
                         numInfected--;
 
                         //TODO: make use of Infector template functions
-                        if (log_level >= EventLogMode::Id::Transmissions) {
+                        if (log_level >= EventLogMode::Id::Transmissions && binLog) {
+                                binLog->Prim(p, simDay);
+                        } else if (log_level >= EventLogMode::Id::Transmissions) {
                                 logger->info("[PRIM] {} {} {} {} {} {} {} {} {} {} {} {} {} {}",
                                 		p.GetId(), -1, p.GetAge(), -1, -1, simDay, p.GetId(),
 										p.GetHealth().GetStartInfectiousness(),p.GetHealth().GetEndInfectiousness(),
@@ -40,7 +40,7 @@ using namespace stride::ContactType;
 
 namespace stride {
 
-Population::Population() : m_pool_sys(), m_event_logger() {}
+Population::Population() : m_pool_sys(), m_event_logger(), m_binary_event_log() {}
 
 std::shared_ptr<Population> Population::Create(const boost::property_tree::ptree& config,
                                                std::shared_ptr<spdlog::logger> strideLogger)
@@ -59,6 +59,12 @@ std::shared_ptr<Population> Population::Create(const boost::property_tree::ptree
                 pop->RefEventLogger()   = LogUtils::CreateRotatingLogger("event_logger", logPath.string());
                 pop->RefEventLogger()->set_pattern("%v");
                 strideLogger->info("Event logging requested; logger set up.");
+                if (config.get<string>("run.event_log_format", "Text") == "Binary") {
+                        const auto binPrefix       = FileSys::BuildPath(prefix, "event_log");
+                        pop->RefBinaryEventLog()   = make_shared<BinaryEventLog>(binPrefix.string());
+                        strideLogger->info("Binary event log format requested; PRIM/TRAN/CONT/NCOM go to {}_*.bin.",
+                                           binPrefix.string());
+                }
         } else {
                 pop->RefEventLogger() = LogUtils::CreateNullLogger("event_logger");
                 strideLogger->info("No Event logging requested.");
@@ -20,6 +20,7 @@
 
 #pragma once
 
+#include "contact/BinaryEventLog.h"
 #include "contact/ContactPool.h"
 #include "contact/ContactPoolSys.h"
 #include "contact/ContactType.h"
@@ -82,6 +83,9 @@ public:
         /// Return the InfectorLogger.
         std::shared_ptr<spdlog::logger>& RefEventLogger() { return m_event_logger; }
 
+        /// Return the binary event log (nullptr unless the binary event log format is used).
+        std::shared_ptr<BinaryEventLog>& RefBinaryEventLog() { return m_binary_event_log; }
+
         /// Reference the ContactPoolSys of the Population.
         ContactPoolSys& RefPoolSys() { return m_pool_sys; }
 
@@ -96,6 +100,7 @@ private:
 private:
         ContactPoolSys                  m_pool_sys;       ///< The global @ContactPoolSys.
         std::shared_ptr<spdlog::logger> m_event_logger; ///< Logger for contact/transmission/tracing/...
+        std::shared_ptr<BinaryEventLog> m_binary_event_log; ///< Fixed-width records for PRIM/TRAN/CONT/NCOM.
 };
 
 } // namespace stride
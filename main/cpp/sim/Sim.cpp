@@ -28,6 +28,7 @@
 #include "sim/SimBuilder.h"
 #include "util/RunConfigManager.h"
 
+#include <algorithm>
 #include <omp.h>
 #include <utility>
 
@@ -39,6 +40,7 @@ using namespace EventLogMode;
 
 Sim::Sim()
     : m_config(), m_event_log_mode(Id::None), m_num_threads(1U), m_track_index_case(false),
+      m_stop_after_index_cases(false), m_index_cases_end_day(0U),
       m_calendar(nullptr), m_contact_profiles(), m_rn_handlers(), m_infector_default(),m_infector_tracing(),
       m_population(nullptr), m_rn_man(), m_transmission_profile(), m_cnt_reduction_workplace(0), m_cnt_reduction_other(0),
 	  m_cnt_reduction_workplace_exit(0),m_cnt_reduction_other_exit(0), m_cnt_reduction_school_exit(0), m_cnt_reduction_intergeneration(0),
@@ -62,6 +64,15 @@ std::shared_ptr<Sim> Sim::Create(const boost::property_tree::ptree& config, shar
         return sim;
 }
 
+unsigned int Sim::GetNumDays(unsigned int numDays) const
+{
+        // Without index cases there is nothing to stop on.
+        if (m_stop_after_index_cases && m_index_cases_end_day > 0U) {
+                return min(numDays, m_index_cases_end_day);
+        }
+        return numDays;
+}
+
 void Sim::TimeStep()
 {
 
@@ -200,6 +211,9 @@ void Sim::TimeStep()
         } // end pragma openMP
 
         m_population->RefEventLogger()->flush();
+        if (m_population->RefBinaryEventLog()) {
+                m_population->RefBinaryEventLog()->Flush();
+        }
         m_calendar->AdvanceDay();
 }
 
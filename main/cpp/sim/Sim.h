@@ -74,6 +74,11 @@ public:
         /// Get the transmission profile.
         const TransmissionProfile& RefTransmissionProfile() const { return m_transmission_profile; }
 
+        /// Get the number of days to simulate, given the configured number of days. Fewer days are
+        /// needed with run.stop_after_index_cases, when only transmissions by index cases are of interest
+        /// (not available with run.num_daily_imported_cases, see SimBuilder).
+        unsigned int GetNumDays(unsigned int numDays) const;
+
         /// Run one time step, computing full simulation (default) or only index case.
         void TimeStep();
 
@@ -88,6 +93,8 @@ private:
         EventLogMode::Id            m_event_log_mode;                ///< Specifies contact/transmission logging mode.
         unsigned int                m_num_threads;                   ///< The number of (OpenMP) threads.
         bool                        m_track_index_case;              ///< General simulation or tracking index case.
+        bool                        m_stop_after_index_cases;        ///< Stop when index cases are no longer infectious.
+        unsigned int                m_index_cases_end_day;           ///< Day by which all index cases stopped being infectious.
 
         std::shared_ptr<Calendar>   m_calendar;         ///< Management of calendar.
         AgeContactProfiles          m_contact_profiles; ///< Contact profiles w.r.t age.
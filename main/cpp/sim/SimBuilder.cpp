@@ -32,6 +32,8 @@
 #include "util/FileSys.h"
 #include "util/RnMan.h"
 
+#include <algorithm>
+
 namespace stride {
 
 using namespace boost::property_tree;
@@ -105,6 +107,26 @@ shared_ptr<Sim> SimBuilder::Build(shared_ptr<Sim> sim, shared_ptr<Population> po
         DiseaseSeeder(m_config, sim->m_rn_man).Seed(sim->m_population, sim->m_transmission_profile, sim->m_rn_handlers[0]);
         sim->m_num_daily_imported_cases = m_config.get<double>("run.num_daily_imported_cases",0);
 
+        // --------------------------------------------------------------
+        // Optionally stop once the index cases are no longer infectious:
+        // they are infected on day 0, so none of them transmits on or
+        // after their (latest) end of infectiousness. Imported cases keep
+        // arriving after day 0, so there is no such day with imports on.
+        // --------------------------------------------------------------
+        sim->m_stop_after_index_cases = m_config.get<bool>("run.stop_after_index_cases", false);
+        if (sim->m_stop_after_index_cases && sim->m_num_daily_imported_cases > 0) {
+                throw runtime_error("SimBuilder::Build> run.stop_after_index_cases cannot be combined "
+                                    "with run.num_daily_imported_cases > 0");
+        }
+        if (sim->m_stop_after_index_cases) {
+                for (const auto& p : *sim->m_population) {
+                        if (p.GetHealth().IsInfected()) {
+                                sim->m_index_cases_end_day = max<unsigned int>(sim->m_index_cases_end_day,
+                                                                               p.GetHealth().GetEndInfectiousness());
+                        }
+                }
+        }
+
         // --------------------------------------------------------------
 		// Set Universal Testing 
         // --------------------------------------------------------------
@@ -44,7 +44,7 @@ void SimRunner::Run(unsigned int numSteps)
         if (numSteps != 0U) {
                 // Prelims.
                 m_clock.Start();
-                const auto numDays = m_config.get<unsigned int>("run.num_days");
+                const auto numDays = m_sim->GetNumDays(m_config.get<unsigned int>("run.num_days"));
 
                 // We are AtStart: no steps have taken yet, so signal AtStart.
                 if (m_sim->GetCalendar()->GetSimulationDay() == 0) {
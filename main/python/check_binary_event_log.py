@@ -0,0 +1,59 @@
+import argparse
+
+from event_log import BINARY_DTYPES, BINARY_RECORD_SIZES, POOL_TYPES, open_binary_log
+
+################################################################################
+# Check of the binary event log format against the simulator                  #
+# Reads the records written by the BinaryEventLog.RoundTrip gtest (which     #
+# writes <prefix>_<tag>.bin under the install directory) through             #
+# BINARY_DTYPES and checks them against the values the test logged, so that #
+# a change of the C++ record layouts cannot go unnoticed on the Python side.  #
+################################################################################
+
+def check(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+def check_round_trip(prefix):
+    for tag, dtype in BINARY_DTYPES.items():
+        check(dtype.itemsize == BINARY_RECORD_SIZES[tag], "{} record size {}".format(tag, dtype.itemsize))
+    # open_binary_log expects the text log the records belong to
+    log_file = prefix + ".txt"
+
+    prim = open_binary_log(log_file, "PRIM")
+    check(len(prim) == 1, "{} [PRIM] records".format(len(prim)))
+    check(prim[0]["infected_id"] == 0 and prim[0]["infector_id"] == -1 and prim[0]["pool_type"] == -1,
+          "[PRIM] record {}".format(prim[0]))
+    check(prim[0]["infected_age"] == 34.0, "[PRIM] infected_age {}".format(prim[0]["infected_age"]))
+
+    tran = open_binary_log(log_file, "TRAN")
+    check(len(tran) == 2, "{} [TRAN] records".format(len(tran)))
+    check(tran[0]["infected_id"] == 1 and tran[0]["infector_id"] == 0, "[TRAN] ids {}".format(tran[0]))
+    check(tran[0]["infected_age"] == 8.0 and tran[0]["infector_age"] == 34.0, "[TRAN] ages {}".format(tran[0]))
+    check(POOL_TYPES[tran[0]["pool_type"]] == "Workplace" and tran[0]["sim_day"] == 5, "[TRAN] {}".format(tran[0]))
+    check(tran[0]["relative_infectiousness"] == 0.75, "[TRAN] {}".format(tran[0]))
+    check(POOL_TYPES[tran[1]["pool_type"]] == "Household" and tran[1]["sim_day"] == 7, "[TRAN] {}".format(tran[1]))
+
+    cont = open_binary_log(log_file, "CONT")
+    check(len(cont) == 1, "{} [CONT] records".format(len(cont)))
+    check(cont[0]["person_id"] == 0 and cont[0]["contact_age"] == 8.0, "[CONT] {}".format(cont[0]))
+    check(POOL_TYPES[cont[0]["pool_type"]] == "PrimaryCommunity", "[CONT] {}".format(cont[0]))
+    check(cont[0]["contact_probability"] == 0.5 and cont[0]["transmission_probability"] == 0.125,
+          "[CONT] {}".format(cont[0]))
+
+    ncom = open_binary_log(log_file, "NCOM")
+    check(len(ncom) == 1, "{} [NCOM] records".format(len(ncom)))
+    check(ncom[0]["person_id"] == 1 and ncom[0]["k12school_id"] == 22 and ncom[0]["primary_community_id"] == 32,
+          "[NCOM] {}".format(ncom[0]))
+    check(ncom[0]["primary_community_nc"] == 1 and ncom[0]["workplace_nc"] == 0, "[NCOM] {}".format(ncom[0]))
+
+def main(prefix):
+    check_round_trip(prefix)
+    print("Binary event log records of {} match BINARY_DTYPES".format(prefix))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Check BINARY_DTYPES against the records written by the gtester")
+    parser.add_argument("prefix", type=str, nargs="?", default="tests/gtester_binary_event_log",
+                        help="Prefix of the .bin files written by the BinaryEventLog.RoundTrip gtest")
+    args = parser.parse_args()
+    main(args.prefix)
@@ -0,0 +1,152 @@
+import math
+import numpy
+
+################################################################################
+# Running statistics of ensembles                                              #
+# Every statistic is updated in O(1) per experiment, so that convergence of   #
+# an ensemble can be followed (and plotted) in a single pass over its runs,   #
+# and a sweep can stop adding experiments to parameter points that converged. #
+################################################################################
+
+class RunningStats:
+    """Count, mean and variance of a stream of values (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def get_variance(self):
+        """Sample variance, NaN for fewer than 2 values."""
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    def get_ci_half_width(self, z=1.96):
+        """Half-width of the normal confidence interval of the mean (95% by default)."""
+        return z * math.sqrt(self.get_variance() / self.count) if self.count > 1 else math.inf
+
+class StreamingQuantile:
+    """
+    Estimate of a quantile of a stream of values in constant memory (the P-square
+    algorithm of Jain and Chlamtac). Exact for fewer than 5 values.
+    """
+
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value):
+        q = self.heights
+        if len(q) < 5:
+            q.append(value)
+            q.sort()
+            return
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                             + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    # Parabolic estimate out of order, fall back to linear
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def get_value(self):
+        if len(self.heights) == 0:
+            return math.nan
+        if len(self.heights) < 5:
+            return float(numpy.quantile(self.heights, self.quantile))
+        return self.heights[2]
+
+################################################################################
+# Convergence of ensembles per parameter point                                 #
+################################################################################
+
+class ConvergenceMonitor:
+    """
+    Running statistics of an outcome (e.g. secondary cases) per parameter point
+    (e.g. transmission probability). A point has converged once it has at least
+    min_count values and the confidence interval of its mean is narrower than
+    2 * max_half_width.
+    """
+
+    def __init__(self, max_half_width, min_count=10, quantiles=(0.5,), z=1.96):
+        self.max_half_width = max_half_width
+        self.min_count = min_count
+        self.quantiles = quantiles
+        self.z = z
+        self.stats = {}
+        self.quantile_estimates = {}
+
+    def add(self, key, value):
+        if key not in self.stats:
+            self.stats[key] = RunningStats()
+            self.quantile_estimates[key] = [StreamingQuantile(q) for q in self.quantiles]
+        self.stats[key].add(value)
+        for estimate in self.quantile_estimates[key]:
+            estimate.add(value)
+
+    def has_converged(self, key):
+        stats = self.stats.get(key)
+        if stats is None or stats.count < self.min_count:
+            return False
+        return stats.get_ci_half_width(self.z) < self.max_half_width
+
+    def get_unconverged(self, keys):
+        """Keys of the given parameter points that still need experiments."""
+        return [key for key in keys if not self.has_converged(key)]
+
+    def get_summary(self, key):
+        """Dict with count, mean, variance, ci_half_width, converged and the quantile estimates of a point."""
+        stats = self.stats[key]
+        summary = {
+            "count": stats.count,
+            "mean": stats.mean,
+            "variance": stats.get_variance(),
+            "ci_half_width": stats.get_ci_half_width(self.z),
+            "converged": self.has_converged(key),
+        }
+        for estimate in self.quantile_estimates[key]:
+            summary["q{}".format(estimate.quantile)] = estimate.get_value()
+        return summary
+
+def get_running_mean(values, z=1.96):
+    """
+    Get the running mean of values after each value, with the half-width of its
+    confidence interval (inf while undefined), as two arrays in one pass.
+    """
+    stats = RunningStats()
+    means = numpy.empty(len(values))
+    half_widths = numpy.empty(len(values))
+    for i, value in enumerate(values):
+        stats.add(value)
+        means[i] = stats.mean
+        half_widths[i] = stats.get_ci_half_width(z)
+    return means, half_widths
@@ -0,0 +1,71 @@
+import csv
+import numpy
+import os
+
+from scenario_store import build_metric, get_new_cases_per_day, iter_row_blocks, open_metric
+
+################################################################################
+# Epidemic curve metrics                                                       #
+# All metrics are computed at once from an (experiments, days) matrix of new  #
+# cases per day, a block of experiments at a time.                            #
+################################################################################
+
+def read_summary(output_dir, scenario_name):
+    """Get the rows of <scenario>_summary.csv, one per experiment."""
+    summary_file = os.path.join(output_dir, scenario_name, scenario_name + "_summary.csv")
+    with open(summary_file) as csvfile:
+        return list(csv.DictReader(csvfile))
+
+def _first_day_reached(cumulative_cases, num_cases):
+    # First day on which the cumulative number of cases reaches num_cases, NaN if never
+    reached = cumulative_cases >= num_cases
+    return numpy.where(reached.any(axis=1), reached.argmax(axis=1), numpy.nan)
+
+def get_curve_metrics(new_cases, population_sizes, num_cases=100):
+    """
+    Get a dict mapping metric names to arrays with one value per experiment (row of new_cases):
+    final_size, attack_rate, peak_size, peak_incidence_ratio, peak_day (first day with peak_size),
+    time_to_num_cases (first day with at least num_cases cases in total) and doubling_time
+    (days from num_cases to 2 * num_cases cases in total). Days that are never reached give NaN.
+    """
+    new_cases = numpy.asarray(new_cases)
+    population_sizes = numpy.asarray(population_sizes, dtype=numpy.float64)
+    cumulative_cases = numpy.cumsum(new_cases, axis=1)
+    final_size = new_cases.sum(axis=1)
+    peak_size = new_cases.max(axis=1)
+    time_to_num_cases = _first_day_reached(cumulative_cases, num_cases)
+    return {
+        "final_size": final_size,
+        "attack_rate": final_size / population_sizes,
+        "peak_size": peak_size,
+        "peak_incidence_ratio": peak_size / population_sizes,
+        "peak_day": new_cases.argmax(axis=1),
+        "time_to_num_cases": time_to_num_cases,
+        "doubling_time": _first_day_reached(cumulative_cases, 2 * num_cases) - time_to_num_cases,
+    }
+
+def get_scenario_curve_metrics(output_dir, scenario_name, num_cases=100, num_processes=4):
+    """
+    Get the curve metrics of all experiments in a scenario (in the order of the scenario summary)
+    together with the summary rows. Each event log is read once, into the scenario store.
+    """
+    summary = read_summary(output_dir, scenario_name)
+    num_days = max([int(row["num_days"]) for row in summary], default=0)
+    population_sizes = numpy.array([int(row["population_size"]) for row in summary])
+    build_metric(output_dir, scenario_name, "new_cases", get_new_cases_per_day, num_days, num_processes)
+    new_cases = open_metric(output_dir, scenario_name, "new_cases")
+
+    metrics = {}
+    for begin, block in iter_row_blocks(new_cases):
+        block_metrics = get_curve_metrics(block, population_sizes[begin:begin + len(block)], num_cases)
+        for name, values in block_metrics.items():
+            metrics.setdefault(name, []).append(values)
+    metrics = {name: numpy.concatenate(values) for name, values in metrics.items()}
+    return metrics, summary
+
+def group_by(values, summary, column, convert=float):
+    """Group per-experiment values on a summary column, e.g. {r0: [values]}, in order of first appearance."""
+    groups = {}
+    for value, row in zip(values.tolist(), summary):
+        groups.setdefault(convert(row[column]), []).append(value)
+    return groups
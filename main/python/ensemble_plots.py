@@ -0,0 +1,48 @@
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy
+
+from matplotlib.collections import LineCollection
+
+################################################################################
+# Plotting ensembles of runs                                                   #
+# runs is an (experiments, days) array. Instead of one line per experiment,   #
+# the ensemble is summarized in a fixed number of artists, so that drawing    #
+# takes the same time for 10 or 10000 experiments.                           #
+################################################################################
+
+def get_quantile_bands(runs, quantiles=(0.025, 0.25, 0.5, 0.75, 0.975)):
+    """Get the given quantiles over all experiments per day, as a (quantiles, days) array."""
+    return numpy.quantile(numpy.asarray(runs, dtype=numpy.float64), quantiles, axis=0)
+
+def plot_fan_chart(x, runs, color, ax=None):
+    """
+    Plot the median of runs per day, with the 50% and 95% bands around it as filled areas.
+    Returns the median line, e.g. to use in a legend.
+    """
+    if ax is None:
+        ax = plt.gca()
+    lower_95, lower_50, median, upper_50, upper_95 = get_quantile_bands(runs)
+    ax.fill_between(x, lower_95, upper_95, color=color, alpha=0.15, linewidth=0)
+    ax.fill_between(x, lower_50, upper_50, color=color, alpha=0.35, linewidth=0)
+    line, = ax.plot(x, median, color=color)
+    return line
+
+def plot_trajectories(x, runs, color, max_trajectories=100, ax=None):
+    """
+    Plot at most max_trajectories of the runs, evenly spread over the ensemble,
+    as a single LineCollection. Returns the collection.
+    """
+    if ax is None:
+        ax = plt.gca()
+    runs = numpy.asarray(runs, dtype=numpy.float64)
+    selected = numpy.unique(numpy.linspace(0, len(runs) - 1, min(len(runs), max_trajectories)).astype(int))
+    is_date = len(x) > 0 and hasattr(x[0], "year")
+    x = mdates.date2num(x) if is_date else numpy.asarray(x, dtype=numpy.float64)
+    segments = numpy.stack([numpy.broadcast_to(x, runs[selected].shape), runs[selected]], axis=-1)
+    collection = LineCollection(segments, colors=color, linewidths=0.5, alpha=0.5)
+    ax.add_collection(collection)
+    if is_date:
+        ax.xaxis_date()
+    ax.autoscale_view()
+    return collection
@@ -1,14 +1,19 @@
 import argparse
-import csv
+import functools
 import multiprocessing
 import numpy
 import random
 import time
 import xml.etree.ElementTree as ET
 
+from collections import OrderedDict
+
 import scipy.integrate as integrate
+from scipy.special import gamma as gamma_function, roots_jacobi
 from scipy.stats import gamma
 
+from population_index import POOL_TYPES, load_population_index
+
 def get_contact_rates(pooltype, contact_rate_tree, maxAge):
     # Create matrix of zeroes
     contact_rates = []
@@ -33,66 +38,214 @@ def get_contact_rates(pooltype, contact_rate_tree, maxAge):
 
     return contact_rates
 
-def add_to_pool(pools, pool_id, person_id, age):
-    if pool_id > 0:
-        if pool_id in pools:
-            pools[pool_id].append((person_id, age))
-        else:
-            pools[pool_id] = [(person_id, age)]
-
-
-def get_effective_contacts(person, all_pools, contact_rates, infectious_period_lengths,
-    transmission_probability, mean_transmission_probability, overdispersion, contacts_only):
-
-    effective_contacts = 0
-
-    person_id = person["id"]
-    age = person["age"]
-
-    for pool_type, pools in all_pools.items():
-        pool_id = person[pool_type + "_id"]
-        if pool_id > 0:
-            pool_members = pools[pool_id]
-            pool_size = len(pool_members)
-            for infectious_period in infectious_period_lengths:
-                for member in pool_members:
-                    member_id = member[0]
-                    member_age = member[1]
-                    if member_id != person_id: # Check that this is not the same person
-                        # This is for aggregated contacts by age (participants -> contacts -> contact -> age = all)
-                        contact_rate1 = contact_rates[pool_type][age]
-                        contact_rate2 = contact_rates[pool_type][member_age]
-                        contact_probability1 = contact_rate1 / (pool_size - 1)
-                        contact_probability2 = contact_rate2 / (pool_size - 1)
-                        contact_probability = min(contact_probability1, contact_probability2)
-                        # Households are assumed to be fully connected in Stride
-                        if pool_type == "household":
-                            contact_probability = 0.999
-                            #contact_probability = 1
-                        if contact_probability >= 1:
-                            contact_probability = 0.999
-
-                        if contacts_only:
-                            effective_contacts += 1 - ((1 - contact_probability)**infectious_period)
-                        else:
-                            shape = overdispersion
-                            scale = mean_transmission_probability / shape
-                            effective_contacts += (1 - ((1 - (transmission_probability * contact_probability))**infectious_period) * (gamma.pdf(transmission_probability, shape, scale=scale) / (gamma.cdf(1, shape, scale=scale) - gamma.cdf(0, shape, scale=scale))))
-
+def get_contact_probabilities(pool_type, age, member_ages, pool_size, contact_rates):
+    # Households are assumed to be fully connected in Stride
+    if pool_type == "household":
+        return numpy.full(len(member_ages), 0.999)
+    # This is for aggregated contacts by age (participants -> contacts -> contact -> age = all)
+    rates = contact_rates[pool_type]
+    contact_probabilities = numpy.minimum(rates[age], rates[member_ages]) / (pool_size - 1)
+    return numpy.where(contact_probabilities >= 1, 0.999, contact_probabilities)
+
+def get_tp_density(transmission_probability, mean_transmission_probability, overdispersion):
+    # Density of individual transmission probabilities: gamma, truncated to [0, 1]
+    shape = overdispersion
+    scale = mean_transmission_probability / shape
+    return gamma.pdf(transmission_probability, shape, scale=scale) / (gamma.cdf(1, shape, scale=scale) - gamma.cdf(0, shape, scale=scale))
+
+def get_pool_contribution(pool, pool_type, age, transmission_probabilities, contact_rates, infectious_periods, contacts_only):
+    """
+    Effective contacts of a person of the given age in pool (ages, counts, size), for each
+    of the transmission probabilities, averaged over the infectious period lengths.
+    """
+    member_ages, member_counts, pool_size = pool
+    if pool_size < 2:
+        return numpy.zeros(len(transmission_probabilities))
+    # Leave out the person itself
+    member_counts = member_counts - (member_ages == age)
+    contact_probabilities = get_contact_probabilities(pool_type, age, member_ages, pool_size, contact_rates)
+    if contacts_only:
+        contact_probabilities = numpy.broadcast_to(contact_probabilities, (len(transmission_probabilities), len(member_ages)))
+    else:
+        contact_probabilities = numpy.multiply.outer(transmission_probabilities, contact_probabilities)
+    # (infectious periods, transmission probabilities, member ages)
+    infection_probabilities = 1 - (1 - contact_probabilities) ** infectious_periods[:, numpy.newaxis, numpy.newaxis]
     # Assuming uniform distribution of infectious period lengths
-    effective_contacts /= len(infectious_period_lengths)
+    return (infection_probabilities * member_counts).sum(axis=2).mean(axis=0)
+
+class PoolContributions:
+    """
+    Contributions (see get_pool_contribution) at a fixed set of transmission probabilities.
+    All members of a pool with the same age get the same contribution, so it is computed
+    once per (pool_type, pool_id, age) and kept in a bounded LRU cache per pool type.
+    """
+
+    def __init__(self, population, contact_rates, infectious_period_lengths, contacts_only, transmission_probabilities,
+                 cache_size=65536):
+        self.population = population
+        self.contact_rates = contact_rates
+        self.infectious_periods = numpy.asarray(infectious_period_lengths)
+        self.contacts_only = contacts_only
+        self.transmission_probabilities = numpy.asarray(transmission_probabilities)
+        self.cache_size = cache_size
+        self.caches = {pool_type: OrderedDict() for pool_type in POOL_TYPES}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pool_type, pool_id, age):
+        cache = self.caches[pool_type]
+        key = (pool_id, age)
+        if key in cache:
+            cache.move_to_end(key)
+            self.hits += 1
+            return cache[key]
+        self.misses += 1
+        contribution = get_pool_contribution(self.population.get_age_counts(pool_type, pool_id), pool_type, age,
+                                             self.transmission_probabilities, self.contact_rates,
+                                             self.infectious_periods, self.contacts_only)
+        cache[key] = contribution
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return contribution
+
+def get_effective_contacts(person, contributions):
+    """
+    Expected number of persons infected by person (an index in the population), summed over
+    the pools it belongs to, at each of the transmission probabilities of contributions
+    (a PoolContributions).
+    """
+    population = contributions.population
+    effective_contacts = numpy.zeros(len(contributions.transmission_probabilities))
+
+    for pool_type in POOL_TYPES:
+        pool_id = population.pool_ids[pool_type][person]
+        if pool_id > 0:
+            effective_contacts += contributions.get(pool_type, pool_id, population.ages[person])
 
     return effective_contacts
 
-def integr(person, pools, contact_rates, infectious_period_lengths, tp, overdispersion, contacts_only):
+################################################################################
+# Integration over individual transmission probabilities                      #
+# The integral of effective contacts weighted by the (truncated) gamma        #
+# density is a fixed Gauss-Jacobi rule: its weight function absorbs the       #
+# x^(shape - 1) singularity at 0. Nodes and normalized weights are computed   #
+# once per (mean transmission probability, overdispersion), and the           #
+# integrals of all persons of a chunk are a single matrix-vector product.     #
+# The error is estimated as the difference with a rule of half the nodes.     #
+################################################################################
+
+class Quadrature:
+    def __init__(self, nodes, weights, error_weights):
+        self.nodes = nodes
+        self.weights = weights
+        self.error_weights = error_weights
+
+    def integrate(self, values):
+        """Integrals and error estimates of values, an array with the nodes on its last axis."""
+        return values @ self.weights, numpy.abs(values @ self.error_weights)
+
+def _get_gamma_rule(shape, scale, num_nodes):
+    # int_0^1 x^(shape - 1) h(x) dx with x = (1 + t) / 2 is
+    # 2^-shape int_-1^1 (1 + t)^(shape - 1) h((1 + t) / 2) dt
+    t, w = roots_jacobi(num_nodes, 0, shape - 1)
+    nodes = (1 + t) / 2
+    weights = w * 2.0 ** -shape * numpy.exp(-nodes / scale) / (gamma_function(shape) * scale ** shape)
+    return nodes, weights / (gamma.cdf(1, shape, scale=scale) - gamma.cdf(0, shape, scale=scale))
+
+@functools.lru_cache(maxsize=None)
+def get_gamma_quadrature(mean_transmission_probability, overdispersion, num_nodes=32):
+    """
+    Quadrature over transmission probabilities in [0, 1], weighted by the gamma density
+    with the given mean and shape overdispersion, truncated to [0, 1].
+    """
+    shape = overdispersion
+    scale = mean_transmission_probability / shape
+    coarse_nodes, coarse_weights = _get_gamma_rule(shape, scale, num_nodes // 2)
+    nodes, weights = _get_gamma_rule(shape, scale, num_nodes)
+    zeros = numpy.zeros(len(coarse_nodes))
+    return Quadrature(numpy.concatenate([coarse_nodes, nodes]),
+                      numpy.concatenate([zeros, weights]),
+                      numpy.concatenate([-coarse_weights, weights]))
+
+# Effective contacts do not depend on the transmission probability with contacts_only
+CONTACTS_ONLY_QUADRATURE = Quadrature(numpy.zeros(1), numpy.ones(1), numpy.zeros(1))
+
+def get_quadrature(tp, overdispersion, contacts_only, num_nodes=32):
+    if contacts_only:
+        return CONTACTS_ONLY_QUADRATURE
+    return get_gamma_quadrature(tp, overdispersion, num_nodes)
+
+def integr(persons, population, contact_rates, infectious_period_lengths, tp, overdispersion, contacts_only, num_nodes=32,
+           contributions=None):
     # Get # of effective contacts in each of the contact pools
-    # to which this person belongs
-    #effective_contacts = get_effective_contacts(person, pools, contact_rates, infectious_period_lengths, tp, tp, overdispersion, contacts_only)
-    func = lambda x: get_effective_contacts(person, pools, contact_rates, infectious_period_lengths, x, tp, overdispersion, contacts_only)
-    integral, upper_error = integrate.quad(func, 0, 1, epsabs=1.49e-2)
-    return integral
-
-def estimate_transmission_probabilities(population_file, contact_matrix_file, infectious_period_lengths, transmission_probabilities, overdispersion=None, person_ids=[], get_mean=True, contacts_only=False):
+    # to which these persons belong, sharing pool contributions between them
+    # (and with earlier calls, if contributions at the nodes of this quadrature are passed in)
+    quadrature = get_quadrature(tp, overdispersion, contacts_only, num_nodes)
+    if contributions is None:
+        contributions = PoolContributions(population, contact_rates, infectious_period_lengths, contacts_only,
+                                          quadrature.nodes)
+    values = numpy.array([get_effective_contacts(person, contributions) for person in persons])
+    integrals, errors = quadrature.integrate(values)
+    return list(zip(integrals.tolist(), errors.tolist()))
+
+def integr_quad(persons, population, contact_rates, infectious_period_lengths, tp, overdispersion, contacts_only):
+    # Reference: adaptive quadrature of the gamma-weighted integrand, one person at a time
+    infectious_periods = numpy.asarray(infectious_period_lengths)
+    results = []
+    for person in persons:
+        def func(x):
+            effective_contacts = 0
+            for pool_type in POOL_TYPES:
+                pool_id = population.pool_ids[pool_type][person]
+                if pool_id > 0:
+                    effective_contacts += get_pool_contribution(population.get_age_counts(pool_type, pool_id), pool_type,
+                                                                population.ages[person], [x],
+                                                                contact_rates, infectious_periods, contacts_only)[0]
+            if not contacts_only:
+                # (1 - (1 - p)^T) * w per contact: the density weights the infection probability
+                effective_contacts *= get_tp_density(x, tp, overdispersion)
+            return effective_contacts
+        results.append(integrate.quad(func, 0, 1, epsabs=1.49e-2))
+    return results
+
+################################################################################
+# Worker state                                                                 #
+# The population, contact rates and selected persons are handed to every     #
+# worker once, by the pool initializer (inherited without copying when the    #
+# pool forks), so that tasks only carry a transmission probability and the   #
+# bounds of a chunk of selected persons. Each worker keeps its pool           #
+# contributions across chunks; tasks come in order of transmission           #
+# probability, so only those of the current quadrature nodes are kept.       #
+################################################################################
+
+_worker_state = {}
+
+def _init_worker(population, contact_rates, infectious_period_lengths, overdispersion, contacts_only, persons):
+    _worker_state.clear()
+    _worker_state.update(population=population, contact_rates=contact_rates,
+                         infectious_period_lengths=infectious_period_lengths, overdispersion=overdispersion,
+                         contacts_only=contacts_only, persons=persons)
+
+def _get_worker_contributions(tp, num_nodes=32):
+    state = _worker_state
+    quadrature = get_quadrature(tp, state["overdispersion"], state["contacts_only"], num_nodes)
+    key = (tp, state["overdispersion"], quadrature.nodes.tobytes())
+    if state.get("contributions_key") != key:
+        state["contributions_key"] = key
+        state["contributions"] = PoolContributions(state["population"], state["contact_rates"],
+                                                   state["infectious_period_lengths"], state["contacts_only"],
+                                                   quadrature.nodes)
+    return state["contributions"]
+
+def _integrate_chunk(method, tp, begin, end):
+    state = _worker_state
+    args = (state["persons"][begin:end], state["population"], state["contact_rates"],
+            state["infectious_period_lengths"], tp, state["overdispersion"], state["contacts_only"])
+    if method == "quad":
+        return integr_quad(*args)
+    return integr(*args, contributions=_get_worker_contributions(tp))
+
+def estimate_transmission_probabilities(population_file, contact_matrix_file, infectious_period_lengths, transmission_probabilities, overdispersion=None, person_ids=[], get_mean=True, contacts_only=False, chunk_size=1000, method="fixed", epsabs=1.49e-2):
     maxAge = 111
 
     ############################################################################
@@ -114,47 +267,14 @@ def estimate_transmission_probabilities(population_file, contact_matrix_file, in
     contact_rates["school"] = get_contact_rates("school", contact_matrix_tree, maxAge)
     contact_rates["primary_community"] = get_contact_rates("primary_community", contact_matrix_tree, maxAge)
     contact_rates["secondary_community"] = get_contact_rates("secondary_community", contact_matrix_tree, maxAge)
+    contact_rates = {pool_type: numpy.array(rates) for pool_type, rates in contact_rates.items()}
 
     ############################################################################
     # From population file, get age constitutions                              #
     # and sizes of different contact pools                                     #
     ############################################################################
 
-    households = {}
-    workplaces = {}
-    schools = {}
-    primary_communities = {}
-    secondary_communities = {}
-
-    population = []
-    person_id = 1
-
-    with open(population_file) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            age = int(row["age"])
-            # Keep track of pool constitutions
-            add_to_pool(households, int(float(row["household_id"])), person_id, age)
-            add_to_pool(workplaces, int(float(row["work_id"])), person_id, age)
-            add_to_pool(schools, int(float(row["school_id"])), person_id, age)
-            add_to_pool(primary_communities, int(float(row["primary_community"])), person_id, age)
-            add_to_pool(secondary_communities, int(float(row["secondary_community"])), person_id, age)
-            # Add person to population list
-            population.append({"id": person_id, "age": age,
-                                "household_id": int(float(row["household_id"])),
-                                "work_id": int(float(row["work_id"])),
-                                "school_id": int(float(row["school_id"])),
-                                "primary_community_id": int(float(row["primary_community"])),
-                                "secondary_community_id": int(float(row["secondary_community"]))})
-            person_id += 1
-
-    pools = {
-        "household": households,
-        "work": workplaces,
-        "school": schools,
-        "primary_community": primary_communities,
-        "secondary_community": secondary_communities
-    }
+    population = load_population_index(population_file)
 
     ############################################################################
     # For each transmission probability to be tested:                          #
@@ -163,26 +283,27 @@ def estimate_transmission_probabilities(population_file, contact_matrix_file, in
     # if infected in a completely susceptible population                       #
     # (cfr. theoretical description by A. Torneri)                             #
     ############################################################################
+    selected_population = numpy.arange(len(population))
+    if len(person_ids) > 0:
+        selected_population = numpy.asarray(person_ids)
+
+    # Persons are handed out in chunks in population order, so that members of
+    # the same pools mostly end up in the same chunk and share contributions
+    chunks = [(begin, min(begin + chunk_size, len(selected_population)))
+              for begin in range(0, len(selected_population), chunk_size)]
+    with multiprocessing.Pool(processes=4, initializer=_init_worker,
+                              initargs=(population, contact_rates, infectious_period_lengths, overdispersion,
+                                        contacts_only, selected_population)) as pool:
+        results = pool.starmap(_integrate_chunk,
+                               [(method, tp, begin, end) for tp in transmission_probabilities for begin, end in chunks])
+
     effective_contacts_by_tp = {}
-    for tp in transmission_probabilities:
-        all_effective_contacts = []
-        selected_population = population
-        if len(person_ids) > 0:
-            selected_population = [population[i] for i in person_ids]
-
-        with multiprocessing.Pool(processes=4) as pool:
-            all_effective_contacts = pool.starmap(integr,
-                                [(person, pools, contact_rates, infectious_period_lengths, tp, overdispersion, contacts_only) for person in selected_population[:3]])
-
-        '''for person in selected_population[:3]:
-            # Get # of effective contacts in each of the contact pools
-            # to which this person belongs
-            #effective_contacts = get_effective_contacts(person, pools, contact_rates, infectious_period_lengths, tp, tp, overdispersion, contacts_only)
-            func = lambda x: get_effective_contacts(person, pools, contact_rates, infectious_period_lengths, x, tp, overdispersion, contacts_only)
-            integral, upper_error = integrate.quad(func, 0, 1, epsabs=1.49e-4)
-            #1.49e-8
-            all_effective_contacts.append(integral)
-            print(integral)'''
+    for i, tp in enumerate(transmission_probabilities):
+        tp_results = [result for integrals in results[i * len(chunks):(i + 1) * len(chunks)] for result in integrals]
+        all_effective_contacts = [integral for integral, error in tp_results]
+        max_error = max([error for integral, error in tp_results], default=0)
+        if max_error > epsabs:
+            print("WARNING: quadrature error estimate {} exceeds {} for tp {}".format(max_error, epsabs, tp))
 
         if get_mean:
             mean_effective_contacts = sum(all_effective_contacts) / len(all_effective_contacts)
@@ -193,12 +314,13 @@ def estimate_transmission_probabilities(population_file, contact_matrix_file, in
     return effective_contacts_by_tp
 
 
-def main(population_file, contact_matrix_file, infectious_period_lengths, transmission_probabilities, person_ids, get_mean, contacts_only):
+def main(population_file, contact_matrix_file, infectious_period_lengths, transmission_probabilities, person_ids, get_mean, contacts_only, method):
     begin = time.perf_counter()
     effective_contacts_by_tp = estimate_transmission_probabilities(population_file, contact_matrix_file,
                                                             infectious_period_lengths, transmission_probabilities,
                                                             overdispersion=0.4, person_ids=person_ids,
-                                                            get_mean=get_mean, contacts_only=contacts_only)
+                                                            get_mean=get_mean, contacts_only=contacts_only,
+                                                            method=method)
     end = time.perf_counter()
     print("Runtime: {} seconds".format(end - begin))
     for tp in effective_contacts_by_tp:
@@ -213,5 +335,7 @@ if __name__=="__main__":
     parser.add_argument("--person_ids", type=int, nargs="+", default=[])
     parser.add_argument("--get_mean", action="store_false", default=True)
     parser.add_argument("--contacts_only", action="store_true", default=False)
+    parser.add_argument("--method", type=str, choices=["fixed", "quad"], default="fixed",
+                        help="Fixed gamma quadrature, or adaptive scipy quad (slow, for reference)")
     args = parser.parse_args()
-    main(args.population_file, args.contact_matrix_file, args.infectious_period_lengths, args.transmission_probabilities, args.person_ids, args.get_mean, args.contacts_only)
+    main(args.population_file, args.contact_matrix_file, args.infectious_period_lengths, args.transmission_probabilities, args.person_ids, args.get_mean, args.contacts_only, args.method)
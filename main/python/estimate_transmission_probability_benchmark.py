@@ -0,0 +1,36 @@
+import argparse
+import time
+
+from estimate_transmission_probability import estimate_transmission_probabilities
+
+def time_method(population_file, contact_matrix_file, infectious_period_lengths, tp, person_ids, method):
+    start = time.perf_counter()
+    effective_contacts = estimate_transmission_probabilities(population_file, contact_matrix_file,
+                                                             infectious_period_lengths, [tp], overdispersion=0.4,
+                                                             person_ids=person_ids, get_mean=False, method=method)[tp]
+    return time.perf_counter() - start, effective_contacts
+
+def main(population_file, contact_matrix_file, infectious_period_lengths, transmission_probabilities, num_persons):
+    person_ids = list(range(num_persons))
+    print("{:<8}{:>12}{:>12}{:>10}{:>12}{:>14}".format("tp", "quad (s)", "fixed (s)", "speedup", "mean R0", "max abs diff"))
+    for tp in transmission_probabilities:
+        quad_time, quad_contacts = time_method(population_file, contact_matrix_file, infectious_period_lengths,
+                                               tp, person_ids, "quad")
+        fixed_time, fixed_contacts = time_method(population_file, contact_matrix_file, infectious_period_lengths,
+                                                 tp, person_ids, "fixed")
+        max_diff = max(abs(q - f) for q, f in zip(quad_contacts, fixed_contacts))
+        # Both timings include reading the population
+        print("{:<8}{:>12.2f}{:>12.2f}{:>10.1f}{:>12.4f}{:>14.2e}".format(tp, quad_time, fixed_time, quad_time / fixed_time,
+              sum(fixed_contacts) / len(fixed_contacts), max_diff))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Compare adaptive and fixed quadrature of R0 estimates")
+    parser.add_argument("population_file", type=str)
+    parser.add_argument("contact_matrix_file", type=str)
+    parser.add_argument("--infectious_period_lengths", type=int, nargs="+", default=[6,7,8,9])
+    parser.add_argument("--transmission_probabilities", type=float, nargs="+", default=[0.05, 0.10])
+    parser.add_argument("--num_persons", type=int, default=200,
+                        help="Number of persons (the first ones of the population) to estimate R0 for")
+    args = parser.parse_args()
+    main(args.population_file, args.contact_matrix_file, args.infectious_period_lengths, args.transmission_probabilities,
+         args.num_persons)
@@ -0,0 +1,706 @@
+import argparse
+import csv
+import gzip
+import io
+import mmap
+import multiprocessing
+import numpy
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+################################################################################
+# Field layouts of the tagged lines in event_log.txt / contact_log.txt.       #
+# These follow the logger->info format strings in                            #
+# DiseaseSeeder.cpp ([PRIM], [TRAN_M]), Infector.cpp ([TRAN], [CONT],         #
+# [TRAN_M]) and NonComplianceSeeder.cpp ([NCOM]).                             #
+################################################################################
+
+def to_int(field):
+    return int(float(field))
+
+def to_bool(field):
+    field = field.strip()
+    return field == "true" or field == "1"
+
+def to_str(field):
+    return field.strip()
+
+TRANSMISSION_FIELDS = (
+    ("infected_id", to_int),
+    ("infector_id", to_int),
+    ("infected_age", to_int),
+    ("infector_age", to_int),
+    ("pool_type", to_str),
+    ("sim_day", to_int),
+    ("id_index_case", to_int),
+    ("start_infectiousness", to_int),
+    ("end_infectiousness", to_int),
+    ("start_symptoms", to_int),
+    ("end_symptoms", to_int),
+    ("infector_is_symptomatic", to_bool),
+    ("relative_infectiousness", float),
+    ("relative_susceptibility", float),
+)
+
+EVENT_FIELDS = {
+    # Index cases: infector_id, infector_age and pool_type are logged as -1
+    "PRIM": TRANSMISSION_FIELDS,
+    "TRAN": TRANSMISSION_FIELDS,
+    "TRAN_M": (
+        ("infected_age", to_int),
+        ("sim_day", to_int),
+        ("start_infectiousness", to_int),
+        ("start_symptoms", to_int),
+        ("end_symptoms", to_int),
+    ),
+    "CONT": (
+        ("person_id", to_int),
+        ("person_age", to_int),
+        ("contact_age", to_int),
+        ("household", to_int),
+        ("k12school", to_int),
+        ("college", to_int),
+        ("workplace", to_int),
+        ("primary_community", to_int),
+        ("secondary_community", to_int),
+        ("household_cluster", to_int),
+        ("sim_day", to_int),
+        ("contact_probability", float),
+        ("transmission_probability", float),
+        ("contact_is_symptomatic", to_bool),
+        ("person_is_symptomatic", to_bool),
+    ),
+    "NCOM": (
+        ("person_id", to_int),
+        ("age", to_int),
+        ("household_id", to_int),
+        ("household_nc", to_bool),
+        ("k12school_id", to_int),
+        ("k12school_nc", to_bool),
+        ("college_id", to_int),
+        ("college_nc", to_bool),
+        ("workplace_id", to_int),
+        ("workplace_nc", to_bool),
+        ("primary_community_id", to_int),
+        ("primary_community_nc", to_bool),
+        ("secondary_community_id", to_int),
+        ("secondary_community_nc", to_bool),
+    ),
+}
+
+def get_field_index(tag, field_name):
+    # Position of a field in the split line (position 0 holds the tag itself)
+    for i, (name, _) in enumerate(EVENT_FIELDS[tag]):
+        if name == field_name:
+            return i + 1
+    raise KeyError("Unknown field '{}' for tag [{}]".format(field_name, tag))
+
+################################################################################
+# Records                                                                      #
+################################################################################
+
+class EventRecord:
+    __slots__ = ()
+    tag = None
+
+    def __repr__(self):
+        values = ", ".join("{}={!r}".format(f, getattr(self, f)) for f in self.__slots__)
+        return "[{}]({})".format(self.tag, values)
+
+_record_types = {}
+
+def get_record_type(tag, field_names):
+    key = (tag, field_names)
+    if key not in _record_types:
+        name = tag.title().replace("_", "") + "Record"
+        _record_types[key] = type(name, (EventRecord,), {"__slots__": field_names, "tag": tag})
+    return _record_types[key]
+
+class _TagParser:
+    __slots__ = ("record_type", "columns", "max_split")
+
+    def __init__(self, tag, field_names):
+        if field_names is None:
+            field_names = tuple(name for name, _ in EVENT_FIELDS[tag])
+        field_names = tuple(field_names)
+        converters = dict(EVENT_FIELDS[tag])
+        self.record_type = get_record_type(tag, field_names)
+        self.columns = [(name, get_field_index(tag, name), converters[name]) for name in field_names]
+        # Only split as far as the right-most requested column
+        self.max_split = max([c[1] for c in self.columns], default=0) + 1
+
+    def parse(self, line):
+        fields = line.split(None, self.max_split)
+        record = self.record_type()
+        for name, index, convert in self.columns:
+            setattr(record, name, convert(fields[index]))
+        return record
+
+def _get_parsers(tags, fields):
+    if tags is None:
+        tags = EVENT_FIELDS.keys()
+    elif isinstance(tags, str):
+        tags = [tags]
+    parsers = {}
+    for tag in tags:
+        if isinstance(fields, dict):
+            field_names = fields.get(tag)
+        else:
+            field_names = fields
+        parsers["[" + tag + "]"] = _TagParser(tag, field_names)
+    return parsers
+
+################################################################################
+# Compressed logs                                                              #
+# Finished runs may be compressed to event_log.txt.gz, .zst or .lz4. Every    #
+# reader below resolves a log path to whichever variant exists and           #
+# decompresses while streaming, in the process that does the parsing.        #
+################################################################################
+
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".lz4")
+
+def resolve_log_file(log_file):
+    """Get log_file itself if it exists, otherwise its first existing compressed variant."""
+    if not os.path.exists(log_file):
+        for suffix in COMPRESSED_SUFFIXES:
+            if os.path.exists(log_file + suffix):
+                return log_file + suffix
+    return log_file
+
+def is_compressed(log_file):
+    return resolve_log_file(log_file).endswith(COMPRESSED_SUFFIXES)
+
+def open_log(log_file, binary=False):
+    """Open log_file (or its compressed variant) for streaming, as text unless binary."""
+    path = resolve_log_file(log_file)
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rb")
+    elif path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("Reading {} requires the zstandard package".format(path))
+        f = zstandard.open(path, "rb")
+    elif path.endswith(".lz4"):
+        if lz4 is None:
+            raise ImportError("Reading {} requires the lz4 package".format(path))
+        f = lz4.frame.open(path, "rb")
+    else:
+        return open(path, "rb" if binary else "r")
+    return f if binary else io.TextIOWrapper(f)
+
+################################################################################
+# Reading                                                                      #
+################################################################################
+
+def get_log_file(output_dir, scenario_name, experiment_id, log_name="event_log.txt"):
+    return os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), log_name)
+
+def get_experiment_ids(output_dir, scenario_name):
+    experiment_ids = []
+    summary_file = os.path.join(output_dir, scenario_name, scenario_name + "_summary.csv")
+    with open(summary_file) as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            experiment_ids.append(int(row["exp_id"]))
+    return experiment_ids
+
+def read_events(log_file, tags=None, fields=None):
+    """
+    Yield one record per line in log_file with a tag in tags.
+    fields is either a list of field names that is used for all tags,
+    or a dict mapping each tag to its list of field names.
+    Only the requested fields are converted and set on the records.
+    """
+    parsers = _get_parsers(tags, fields)
+    if is_sidecar_valid(log_file):
+        yield from _read_events_sidecar(log_file, parsers)
+        return
+    with open_log(log_file) as f:
+        yield from _parse_lines(f, parsers)
+
+def parse_lines(lines, tags=None, fields=None):
+    """Same as read_events, for lines that were already read from a log."""
+    yield from _parse_lines(lines, _get_parsers(tags, fields))
+
+def _parse_lines(lines, parsers):
+    for line in lines:
+        parser = parsers.get(line[:line.find(" ")])
+        if parser is not None:
+            yield parser.parse(line)
+
+def read_field(log_file, tag, field_name):
+    """Yield the value of a single field for every line with the given tag."""
+    if is_sidecar_valid(log_file):
+        yield from load_columns(log_file, tag, [field_name])[field_name].tolist()
+        return
+    prefix = "[" + tag + "] "
+    index = get_field_index(tag, field_name)
+    convert = dict(EVENT_FIELDS[tag])[field_name]
+    with open_log(log_file) as f:
+        for line in f:
+            if line.startswith(prefix):
+                yield convert(line.split(None, index + 1)[index])
+
+def count_events(log_file, tag):
+    if is_sidecar_valid(log_file):
+        return len(load_columns(log_file, tag, [])["line"])
+    prefix = "[" + tag + "] "
+    num_events = 0
+    with open_log(log_file) as f:
+        for line in f:
+            if line.startswith(prefix):
+                num_events += 1
+    return num_events
+
+################################################################################
+# Reducers                                                                     #
+# Several per-experiment computations can share one pass over a log: each    #
+# reducer declares the tags and fields it needs, and reduce_events reads     #
+# the union of those once and hands every record to the interested reducers. #
+################################################################################
+
+class EventReducer:
+    """
+    Base class for computations over the events of one log. Subclasses set tags
+    and fields (as for read_events, None meaning all fields), implement add(event)
+    and return their outcome from result().
+    """
+    tags = ()
+    fields = None
+
+    def get_fields(self, tag):
+        if isinstance(self.fields, dict):
+            return self.fields.get(tag)
+        return self.fields
+
+    def add(self, event):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+def reduce_events(log_file, reducers, stop_after_index_cases=False):
+    """
+    Feed the events of log_file to all reducers in a single read and return their results, in order.
+    With stop_after_index_cases, reading stops at the first [TRAN] event on or after the day by
+    which all index cases ([PRIM] events) have stopped being infectious, i.e. sim_day plus
+    end_infectiousness. Later transmissions cannot come from an index case (cfr. the simulator
+    option run.stop_after_index_cases).
+    """
+    reducers_by_tag = {}
+    fields = {}
+
+    def add_fields(tag, field_names):
+        reducers_by_tag.setdefault(tag, [])
+        fields.setdefault(tag, [])
+        fields[tag] += [name for name in field_names if name not in fields[tag]]
+
+    for reducer in reducers:
+        for tag in reducer.tags:
+            reducer_fields = reducer.get_fields(tag)
+            if reducer_fields is None:
+                reducer_fields = [name for name, _ in EVENT_FIELDS[tag]]
+            add_fields(tag, reducer_fields)
+            reducers_by_tag[tag].append(reducer)
+    if stop_after_index_cases:
+        add_fields("PRIM", ["sim_day", "end_infectiousness"])
+        add_fields("TRAN", ["sim_day"])
+
+    end_day = 0
+    events = read_events(log_file, list(reducers_by_tag), fields)
+    for event in events:
+        if stop_after_index_cases:
+            if event.tag == "PRIM":
+                end_day = max(end_day, event.sim_day + event.end_infectiousness)
+            elif event.tag == "TRAN" and event.sim_day >= end_day:
+                break
+        for reducer in reducers_by_tag[event.tag]:
+            reducer.add(event)
+    events.close()
+    return [reducer.result() for reducer in reducers]
+
+################################################################################
+# Following a log that is still being written                                 #
+################################################################################
+
+class LogTail:
+    """
+    Incrementally reads the lines appended to a log since the previous poll.
+    A partially written last line is held back until its line end arrives.
+    If the log shrinks (e.g. the experiment was restarted), reading starts
+    over from the beginning and restarted is set until the next poll.
+    """
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.offset = 0
+        self.restarted = False
+
+    def poll(self):
+        """Get an iterator over the complete lines that were added since the previous poll."""
+        self.restarted = os.path.exists(self.log_file) and os.path.getsize(self.log_file) < self.offset
+        if self.restarted:
+            self.offset = 0
+        return self._read_lines()
+
+    def _read_lines(self):
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                block = f.read(SCAN_CHUNK_SIZE)
+                end = block.rfind(b"\n") + 1
+                if end == 0:
+                    break
+                self.offset += end
+                f.seek(self.offset)
+                yield from block[:end].decode().splitlines()
+
+################################################################################
+# Columnar sidecar cache                                                       #
+# Each log is converted once into <log_file>.npz, holding one array per       #
+# (tag, field) plus the line numbers of the records, so that interleaved      #
+# tags can be replayed in their original order. The sidecar records the size #
+# and mtime of the log it was built from and is ignored once these change.    #
+################################################################################
+
+CONVERT_CHUNK_SIZE = 1 << 16
+
+COLUMN_DTYPES = {
+    to_int: numpy.int32,
+    to_bool: numpy.bool_,
+    to_str: numpy.str_,
+    float: numpy.float64,
+}
+
+def get_sidecar_file(log_file):
+    return log_file + ".npz"
+
+def _get_source_stamp(log_file):
+    stat = os.stat(resolve_log_file(log_file))
+    return numpy.array([stat.st_size, stat.st_mtime_ns], dtype=numpy.int64)
+
+def is_sidecar_valid(log_file):
+    sidecar_file = get_sidecar_file(log_file)
+    if not (os.path.exists(sidecar_file) and os.path.exists(resolve_log_file(log_file))):
+        return False
+    with numpy.load(sidecar_file) as sidecar:
+        return numpy.array_equal(sidecar["source_stamp"], _get_source_stamp(log_file))
+
+def _convert_rows(tag, rows, line_numbers):
+    # Typed arrays of a chunk of split [tag] lines: their line numbers, then one per field
+    arrays = [numpy.array(line_numbers, dtype=numpy.int64)]
+    for i, (name, convert) in enumerate(EVENT_FIELDS[tag]):
+        arrays.append(numpy.array([convert(row[i + 1]) for row in rows], dtype=COLUMN_DTYPES[convert]))
+    return arrays
+
+def convert_log(log_file, tags=None):
+    """Parse log_file once and store all columns of the given tags in its sidecar."""
+    if tags is None:
+        tags = EVENT_FIELDS.keys()
+    source_stamp = _get_source_stamp(log_file)
+    prefixes = {"[" + tag + "]": tag for tag in tags}
+    # Lines are converted to typed arrays CONVERT_CHUNK_SIZE at a time, so that only
+    # one chunk per tag is held as split strings
+    rows = {tag: [] for tag in tags}
+    lines = {tag: [] for tag in tags}
+    chunks = {tag: [] for tag in tags}
+    with open_log(log_file) as f:
+        for line_number, line in enumerate(f):
+            tag = prefixes.get(line[:line.find(" ")])
+            if tag is not None:
+                rows[tag].append(line.split())
+                lines[tag].append(line_number)
+                if len(rows[tag]) == CONVERT_CHUNK_SIZE:
+                    chunks[tag].append(_convert_rows(tag, rows[tag], lines[tag]))
+                    rows[tag] = []
+                    lines[tag] = []
+    for tag in tags:
+        chunks[tag].append(_convert_rows(tag, rows[tag], lines[tag]))
+
+    columns = {"source_stamp": source_stamp}
+    for tag in tags:
+        names = ["line"] + [name for name, _ in EVENT_FIELDS[tag]]
+        for i, name in enumerate(names):
+            columns[tag + "." + name] = numpy.concatenate([chunk[i] for chunk in chunks[tag]])
+        chunks[tag] = None
+
+    # Write to a temporary file first so readers never see a half-written sidecar
+    sidecar_file = get_sidecar_file(log_file)
+    tmp_file = sidecar_file + ".tmp.npz"
+    numpy.savez(tmp_file, **columns)
+    os.replace(tmp_file, sidecar_file)
+    return sidecar_file
+
+def load_columns(log_file, tag, field_names=None):
+    """
+    Get the requested fields of all [tag] lines as arrays, keyed by field name,
+    together with their line numbers under the key 'line'.
+    Reads from the sidecar if it is up to date, otherwise parses the text log.
+    """
+    if field_names is None:
+        field_names = [name for name, _ in EVENT_FIELDS[tag]]
+    if is_sidecar_valid(log_file):
+        with numpy.load(get_sidecar_file(log_file)) as sidecar:
+            columns = {"line": sidecar[tag + ".line"]}
+            for name in field_names:
+                columns[name] = sidecar[tag + "." + name]
+        return columns
+
+    converters = dict(EVENT_FIELDS[tag])
+    prefix = "[" + tag + "] "
+    indices = [get_field_index(tag, name) for name in field_names]
+    max_split = max(indices, default=0) + 1
+    lines = []
+    values = [[] for _ in field_names]
+    with open_log(log_file) as f:
+        for line_number, line in enumerate(f):
+            if line.startswith(prefix):
+                fields = line.split(None, max_split)
+                lines.append(line_number)
+                for i, index in enumerate(indices):
+                    values[i].append(fields[index])
+    columns = {"line": numpy.array(lines, dtype=numpy.int64)}
+    for name, raw in zip(field_names, values):
+        convert = converters[name]
+        columns[name] = numpy.array([convert(x) for x in raw], dtype=COLUMN_DTYPES[convert])
+    return columns
+
+def _read_events_sidecar(log_file, parsers):
+    record_types = []
+    all_columns = []
+    for parser in parsers.values():
+        record_type = parser.record_type
+        field_names = record_type.__slots__
+        record_types.append(record_type)
+        columns = load_columns(log_file, record_type.tag, field_names)
+        all_columns.append([columns["line"]] + [columns[name].tolist() for name in field_names])
+
+    # Replay the records of all requested tags in the order of the original log
+    line_numbers = numpy.concatenate([c[0] for c in all_columns])
+    sources = numpy.concatenate([numpy.full(len(c[0]), i) for i, c in enumerate(all_columns)])
+    positions = numpy.concatenate([numpy.arange(len(c[0])) for c in all_columns])
+    order = numpy.argsort(line_numbers, kind="stable")
+    for source, position in zip(sources[order].tolist(), positions[order].tolist()):
+        record_type = record_types[source]
+        record = record_type()
+        for name, values in zip(record_type.__slots__, all_columns[source][1:]):
+            setattr(record, name, values[position])
+        yield record
+
+################################################################################
+# Byte-level counting of events per simulation day                             #
+# The log is memory-mapped and scanned in newline-aligned chunks as raw      #
+# bytes: lines are selected on their tag prefix and only the sim_day column  #
+# of the selected lines is converted, without decoding or splitting lines.   #
+################################################################################
+
+SCAN_CHUNK_SIZE = 1 << 26
+
+def _parse_uints(chunk, starts, ends):
+    lengths = ends - starts
+    values = numpy.zeros(len(starts), dtype=numpy.int64)
+    for k in range(int(lengths.max(initial=0))):
+        has_digit = k < lengths
+        digits = chunk[numpy.minimum(starts + k, len(chunk) - 1)].astype(numpy.int64) - 48
+        values = numpy.where(has_digit, values * 10 + digits, values)
+    return values
+
+def _scan_sim_days(chunk, prefix, field_index):
+    # Field separators (spaces and line ends) of this chunk, from a single pass over the bytes
+    separators = numpy.flatnonzero(chunk <= 32)
+    line_ends = numpy.flatnonzero(chunk[separators] == 10)
+    # For every line: its start and the index of its first separator
+    first = numpy.concatenate(([0], line_ends[:-1] + 1))
+    line_starts = numpy.concatenate(([0], separators[line_ends[:-1]] + 1))
+    # Keep lines that start with the tag prefix
+    selected = numpy.flatnonzero(line_starts + len(prefix) <= len(chunk))
+    for k in range(len(prefix)):
+        selected = selected[chunk[line_starts[selected] + k] == prefix[k]]
+    # The field at field_index lies between the field_index-th and the next separator, so drop
+    # lines that are cut short before it (e.g. the last line of a crashed or running simulation)
+    selected = selected[first[selected] + field_index <= line_ends[selected]]
+    first = first[selected]
+    starts = separators[first + field_index - 1] + 1
+    ends = separators[first + field_index]
+    return _parse_uints(chunk, starts, ends)
+
+def _scan_mmap(mm, prefix, field_index):
+    data = numpy.frombuffer(mm, dtype=numpy.uint8)
+    chunk = None
+    all_sim_days = []
+    begin = 0
+    try:
+        while begin < len(data):
+            end = min(begin + SCAN_CHUNK_SIZE, len(data))
+            if end < len(data):
+                # Extend the chunk up to and including the end of its last line
+                end = mm.find(b"\n", end)
+                end = len(data) if end < 0 else end + 1
+            chunk = data[begin:end]
+            if chunk[-1] != 10:
+                chunk = numpy.append(chunk, numpy.uint8(10))
+            all_sim_days.append(_scan_sim_days(chunk, prefix, field_index))
+            begin = end
+    finally:
+        # The map can only be closed once no views on it are left, also when the scan fails
+        del data, chunk
+    return all_sim_days
+
+def _scan_stream(f, prefix, field_index):
+    # Same as _scan_mmap, for compressed logs that can only be read front to back
+    all_sim_days = []
+    rest = b""
+    while True:
+        block = f.read(SCAN_CHUNK_SIZE)
+        if not block:
+            break
+        block = rest + block
+        end = block.rfind(b"\n") + 1
+        rest = block[end:]
+        if end > 0:
+            all_sim_days.append(_scan_sim_days(numpy.frombuffer(block, dtype=numpy.uint8, count=end), prefix, field_index))
+    if rest:
+        all_sim_days.append(_scan_sim_days(numpy.frombuffer(rest + b"\n", dtype=numpy.uint8), prefix, field_index))
+    return all_sim_days
+
+def count_events_per_day(log_file, num_days=None, tag="TRAN"):
+    """
+    Get the number of [tag] lines per sim_day as an array of length num_days.
+    Events on days >= num_days are ignored. If num_days is None,
+    the array runs up to the last day with an event.
+    """
+    if is_sidecar_valid(log_file):
+        sim_days = load_columns(log_file, tag, ["sim_day"])["sim_day"]
+    else:
+        prefix = numpy.frombuffer(("[" + tag + "] ").encode(), dtype=numpy.uint8)
+        field_index = get_field_index(tag, "sim_day")
+        all_sim_days = []
+        if is_compressed(log_file):
+            with open_log(log_file, binary=True) as f:
+                all_sim_days = _scan_stream(f, prefix, field_index)
+        else:
+            with open(log_file, "rb") as f:
+                if os.fstat(f.fileno()).st_size > 0:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        all_sim_days = _scan_mmap(mm, prefix, field_index)
+        sim_days = numpy.concatenate(all_sim_days) if all_sim_days else numpy.zeros(0, dtype=numpy.int64)
+    if num_days is not None:
+        sim_days = sim_days[sim_days < num_days]
+    return numpy.bincount(sim_days, minlength=0 if num_days is None else num_days)
+
+################################################################################
+# Binary event log (run.event_log_format = Binary)                            #
+# The simulator then writes [PRIM], [TRAN], [CONT] and [NCOM] events as       #
+# packed fixed-width records to event_log_<tag>.bin next to event_log.txt.    #
+# These dtypes mirror the record structs in contact/BinaryEventLog.h.         #
+################################################################################
+
+# Names of the ContactType::Id values stored in the pool_type fields
+POOL_TYPES = ("Household", "K12School", "College", "Workplace",
+              "PrimaryCommunity", "SecondaryCommunity", "HouseholdCluster")
+
+_BINARY_TRANSMISSION_DTYPE = numpy.dtype([
+    ("infected_id", "<i4"),
+    ("infector_id", "<i4"),
+    ("infected_age", "<f4"),
+    ("infector_age", "<f4"),
+    ("pool_type", "i1"),
+    ("sim_day", "<u2"),
+    ("id_index_case", "<i4"),
+    ("start_infectiousness", "<u2"),
+    ("end_infectiousness", "<u2"),
+    ("start_symptoms", "<u2"),
+    ("end_symptoms", "<u2"),
+    ("infector_is_symptomatic", "i1"),
+    ("relative_infectiousness", "<f8"),
+    ("relative_susceptibility", "<f8"),
+])
+
+BINARY_DTYPES = {
+    "PRIM": _BINARY_TRANSMISSION_DTYPE,
+    "TRAN": _BINARY_TRANSMISSION_DTYPE,
+    "CONT": numpy.dtype([
+        ("person_id", "<i4"),
+        ("person_age", "<f4"),
+        ("contact_age", "<f4"),
+        ("pool_type", "i1"),
+        ("sim_day", "<u2"),
+        ("contact_probability", "<f8"),
+        ("transmission_probability", "<f8"),
+        ("contact_is_symptomatic", "u1"),
+        ("person_is_symptomatic", "u1"),
+    ]),
+    "NCOM": numpy.dtype([
+        ("person_id", "<i4"),
+        ("age", "<f4"),
+        ("household_id", "<u4"),
+        ("household_nc", "u1"),
+        ("k12school_id", "<u4"),
+        ("k12school_nc", "u1"),
+        ("college_id", "<u4"),
+        ("college_nc", "u1"),
+        ("workplace_id", "<u4"),
+        ("workplace_nc", "u1"),
+        ("primary_community_id", "<u4"),
+        ("primary_community_nc", "u1"),
+        ("secondary_community_id", "<u4"),
+        ("secondary_community_nc", "u1"),
+    ]),
+}
+
+# Sizes of the packed records in BinaryEventLog.h (static_asserts in BinaryEventLog.cpp)
+BINARY_RECORD_SIZES = {"PRIM": 48, "TRAN": 48, "CONT": 33, "NCOM": 38}
+
+def _check_binary_dtypes():
+    for tag, dtype in BINARY_DTYPES.items():
+        if dtype.itemsize != BINARY_RECORD_SIZES[tag]:
+            raise RuntimeError("BINARY_DTYPES[{}] has {} bytes, the simulator writes {}".format(
+                tag, dtype.itemsize, BINARY_RECORD_SIZES[tag]))
+
+_check_binary_dtypes()
+
+def get_binary_log_file(log_file, tag):
+    # <exp_dir>/event_log.txt -> <exp_dir>/event_log_tran.bin
+    return os.path.splitext(log_file)[0] + "_" + tag.lower() + ".bin"
+
+def open_binary_log(log_file, tag):
+    """
+    Map the binary records of the given tag that belong to log_file (the
+    experiment's event_log.txt) onto a read-only structured array, without copying.
+    """
+    binary_file = get_binary_log_file(log_file, tag)
+    if os.path.getsize(binary_file) == 0:
+        return numpy.zeros(0, dtype=BINARY_DTYPES[tag])
+    return numpy.memmap(binary_file, dtype=BINARY_DTYPES[tag], mode="r")
+
+def convert_experiment(output_dir, scenario_name, experiment_id, log_name):
+    log_file = get_log_file(output_dir, scenario_name, experiment_id, log_name)
+    if not is_sidecar_valid(log_file):
+        convert_log(log_file)
+    return experiment_id
+
+def main(output_dir, scenario_names, log_name, num_processes):
+    for scenario in scenario_names:
+        experiment_ids = get_experiment_ids(output_dir, scenario)
+        with multiprocessing.Pool(processes=num_processes) as pool:
+            pool.starmap(convert_experiment, [(output_dir, scenario, exp_id, log_name) for exp_id in experiment_ids])
+        print("{}: converted {} logs".format(scenario, len(experiment_ids)))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Convert event logs to columnar .npz sidecars")
+    parser.add_argument("output_dir", type=str, help="Directory containing simulation output")
+    parser.add_argument("scenario_names", type=str, nargs="+")
+    parser.add_argument("--log_name", type=str, default="event_log.txt")
+    parser.add_argument("--num_processes", type=int, default=4)
+    args = parser.parse_args()
+    main(args.output_dir, args.scenario_names, args.log_name, args.num_processes)
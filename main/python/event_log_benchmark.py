@@ -0,0 +1,81 @@
+import argparse
+import gzip
+import os
+import shutil
+import time
+
+from event_log import count_events, count_events_per_day, lz4, zstandard
+
+def compress_log(log_file, suffix):
+    compressed_file = log_file + suffix
+    if suffix == ".gz":
+        out = gzip.open(compressed_file, "wb", compresslevel=6)
+    elif suffix == ".zst":
+        out = zstandard.open(compressed_file, "wb")
+    else:
+        out = lz4.frame.open(compressed_file, "wb")
+    with open(log_file, "rb") as f, out:
+        shutil.copyfileobj(f, out, 1 << 24)
+    return compressed_file
+
+def drop_from_page_cache(file_name):
+    # Evict the file's pages so the next read has to go to disk
+    with open(file_name, "rb") as f:
+        os.fdatasync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+def time_reader(reader, log_file, file_name, cold, repeats):
+    timings = []
+    for _ in range(repeats):
+        if cold:
+            drop_from_page_cache(file_name)
+        else:
+            reader(log_file)
+        start = time.perf_counter()
+        reader(log_file)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(log_file, work_dir, repeats):
+    # Each variant lives in its own directory under the same name, so that the
+    # readers resolve exactly one of them
+    suffixes = [".gz"]
+    if zstandard is not None:
+        suffixes.append(".zst")
+    if lz4 is not None:
+        suffixes.append(".lz4")
+    log_name = os.path.basename(log_file)
+    text_size = os.path.getsize(log_file)
+    variants = []
+    for suffix in [""] + suffixes:
+        variant_dir = os.path.join(work_dir, "plain" if suffix == "" else suffix[1:])
+        os.makedirs(variant_dir, exist_ok=True)
+        variant_log = os.path.join(variant_dir, log_name)
+        shutil.copyfile(log_file, variant_log)
+        file_name = variant_log
+        if suffix != "":
+            file_name = compress_log(variant_log, suffix)
+            os.remove(variant_log)
+        variants.append((suffix[1:] if suffix else "text", variant_log, file_name))
+
+    readers = [
+        ("count_events", lambda f: count_events(f, "TRAN")),
+        ("count_events_per_day", lambda f: count_events_per_day(f)),
+    ]
+    print("{:<22}{:<8}{:>10}{:>12}{:>12}".format("reader", "format", "size (MB)", "cold MB/s", "warm MB/s"))
+    for reader_name, reader in readers:
+        for format_name, variant_log, file_name in variants:
+            cold = time_reader(reader, variant_log, file_name, True, repeats)
+            warm = time_reader(reader, variant_log, file_name, False, repeats)
+            # Throughput is expressed in uncompressed bytes for all formats
+            print("{:<22}{:<8}{:>10.1f}{:>12.1f}{:>12.1f}".format(reader_name, format_name,
+                  os.path.getsize(file_name) / 1e6, text_size / 1e6 / cold, text_size / 1e6 / warm))
+    shutil.rmtree(work_dir)
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Compare reading throughput of plain and compressed event logs")
+    parser.add_argument("log_file", type=str, help="Plain text event log to benchmark with")
+    parser.add_argument("--work_dir", type=str, default="event_log_benchmark")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    main(args.log_file, args.work_dir, args.repeats)
@@ -0,0 +1,61 @@
+import fnmatch
+import matplotlib.pyplot as plt
+import multiprocessing
+import os
+
+################################################################################
+# Figure lists                                                                 #
+# Scripts describe their figures as a list of (name, plot, args) entries,     #
+# where plot(*args) draws on the current pyplot figure without showing it.    #
+# Such a list is either shown one figure at a time, or rendered to files      #
+# with the Agg backend by a pool of processes, one figure per task.           #
+################################################################################
+
+FIGURE_FORMATS = ("png", "pdf", "svg")
+
+def select_figures(figures, patterns):
+    """Keep the figures whose name matches any of the (fnmatch) patterns, or all if patterns is None."""
+    if patterns is None:
+        return figures
+    return [f for f in figures if any(fnmatch.fnmatch(f[0], p) for p in patterns)]
+
+def _use_agg():
+    plt.switch_backend("Agg")
+
+def _render_figure(figure_dir, formats, name, plot, args):
+    plt.figure()
+    plot(*args)
+    for figure_format in formats:
+        plt.savefig(os.path.join(figure_dir, name + "." + figure_format))
+    plt.close()
+    return name
+
+def render_figures(figures, figure_dir, formats=("png",), num_processes=4):
+    for figure_format in formats:
+        if figure_format not in FIGURE_FORMATS:
+            raise ValueError("Unsupported figure format '{}'".format(figure_format))
+    os.makedirs(figure_dir, exist_ok=True)
+    with multiprocessing.Pool(processes=num_processes, initializer=_use_agg) as pool:
+        return pool.starmap(_render_figure, [(figure_dir, formats, name, plot, args) for name, plot, args in figures])
+
+def show_figures(figures):
+    for _, plot, args in figures:
+        plt.figure()
+        plot(*args)
+        plt.show()
+
+def draw_figures(figures, figure_dir=None, formats=("png",), num_processes=4):
+    """Render the figures to figure_dir if given, show them otherwise."""
+    if figure_dir is None:
+        show_figures(figures)
+    else:
+        for name in render_figures(figures, figure_dir, formats, num_processes):
+            print("Saved {}".format(name))
+
+def add_figure_arguments(parser):
+    parser.add_argument("--figure_dir", type=str, default=None,
+                        help="Save figures to this directory instead of showing them")
+    parser.add_argument("--formats", type=str, nargs="+", choices=FIGURE_FORMATS, default=["png"])
+    parser.add_argument("--figures", type=str, nargs="+", default=None,
+                        help="Names (or fnmatch patterns) of the figures to draw, default all")
+    parser.add_argument("--num_figure_processes", type=int, default=4)
@@ -0,0 +1,85 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+
+from event_log import LogTail, get_log_file, parse_lines
+
+class IncidenceTracker:
+    """Running incidence, cumulative cases and cases by age of the [TRAN] events seen so far."""
+
+    def __init__(self, max_age=111):
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self):
+        self.new_cases_per_day = []
+        self.cases_by_age = [0] * self.max_age
+
+    def add_lines(self, lines):
+        for record in parse_lines(lines, "TRAN", ["infected_age", "sim_day"]):
+            if record.sim_day >= len(self.new_cases_per_day):
+                self.new_cases_per_day.extend([0] * (record.sim_day + 1 - len(self.new_cases_per_day)))
+            self.new_cases_per_day[record.sim_day] += 1
+            self.cases_by_age[min(record.infected_age, self.max_age - 1)] += 1
+
+    def get_cumulative_cases_per_day(self):
+        return list(itertools.accumulate(self.new_cases_per_day))
+
+    def write_snapshot(self, snapshot_prefix):
+        cumulative_cases = self.get_cumulative_cases_per_day()
+        rows = zip(range(len(self.new_cases_per_day)), self.new_cases_per_day, cumulative_cases)
+        write_csv(snapshot_prefix + "_incidence.csv", ["sim_day", "new_cases", "cumulative_cases"], rows)
+        write_csv(snapshot_prefix + "_cases_by_age.csv", ["age", "cases"], enumerate(self.cases_by_age))
+
+def write_csv(file_name, header, rows):
+    # Replace the previous snapshot at once, so it can be read at any time
+    tmp_file = file_name + ".tmp"
+    with open(tmp_file, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_file, file_name)
+
+def main(output_dir, scenario_name, experiment_id, log_name, poll_interval, snapshot_interval, snapshot_prefix):
+    log_file = get_log_file(output_dir, scenario_name, experiment_id, log_name)
+    # The summary file is written when the simulation has finished
+    summary_file = os.path.join(os.path.dirname(log_file), "summary.csv")
+    if snapshot_prefix is None:
+        snapshot_prefix = os.path.join(os.path.dirname(log_file), "live")
+
+    tail = LogTail(log_file)
+    tracker = IncidenceTracker()
+    last_snapshot = time.monotonic()
+    while True:
+        finished = os.path.exists(summary_file)
+        lines = tail.poll()
+        if tail.restarted:
+            tracker.reset()
+        tracker.add_lines(lines)
+
+        num_days = len(tracker.new_cases_per_day)
+        if num_days > 0:
+            print("Day {}: {} new cases, {} cases in total".format(num_days - 1,
+                  tracker.new_cases_per_day[-1], sum(tracker.new_cases_per_day)))
+        if finished or time.monotonic() - last_snapshot >= snapshot_interval:
+            tracker.write_snapshot(snapshot_prefix)
+            last_snapshot = time.monotonic()
+        if finished:
+            break
+        time.sleep(poll_interval)
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Follow the event log of a running simulation and keep track of its incidence")
+    parser.add_argument("output_dir", type=str, help="Directory containing simulation output")
+    parser.add_argument("scenario_name", type=str)
+    parser.add_argument("experiment_id", type=int)
+    parser.add_argument("--log_name", type=str, default="event_log.txt")
+    parser.add_argument("--poll_interval", type=float, default=10, help="Seconds between reads of the log")
+    parser.add_argument("--snapshot_interval", type=float, default=300, help="Seconds between snapshots")
+    parser.add_argument("--snapshot_prefix", type=str, default=None,
+                        help="Prefix for the snapshot files (default: <experiment dir>/live)")
+    args = parser.parse_args()
+    main(args.output_dir, args.scenario_name, args.experiment_id, args.log_name,
+         args.poll_interval, args.snapshot_interval, args.snapshot_prefix)
@@ -3,8 +3,12 @@ import csv
 import datetime
 import matplotlib.pyplot as plt
 import multiprocessing
+import numpy as np
 import os
 
+from ensemble_plots import plot_fan_chart, plot_trajectories
+from event_log import count_events, count_events_per_day, get_log_file, read_field
+
 def get_experiment_ids(output_dir, scenario_name):
     experiment_ids = []
     summary_file = os.path.join(output_dir, scenario_name, scenario_name + "_summary.csv")
@@ -16,20 +20,10 @@ def get_experiment_ids(output_dir, scenario_name):
 
 
 def get_new_cases_per_day(output_dir, scenario_name, exp_id, num_days):
-    transmissions_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "contact_log.txt")
-
-    days = {}
-    for d in range(num_days):
-        days[d] = 0
-    with open(transmissions_file) as f:
-        for line in f:
-            line = line.split()
-            tag = line[0]
-            if tag == "[TRAN]":
-                sim_day = int(line[6])
-                days[sim_day] += 1
+    transmissions_file = get_log_file(output_dir, scenario_name, exp_id, "contact_log.txt")
 
-    return days
+    days = count_events_per_day(transmissions_file, num_days)
+    return dict(enumerate(days.tolist()))
 
 def get_attack_rate(output_dir, scenario_name, exp_id, num_days):
     pop_size = 0
@@ -39,29 +33,14 @@ def get_attack_rate(output_dir, scenario_name, exp_id, num_days):
         summary = next(reader)
         pop_size = int(summary["population_size"])
 
-    total_cases = 0
-    transmissions_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "contact_log.txt")
-    with open(transmissions_file) as f:
-        for line in f:
-            line = line.split()
-            tag = line[0]
-            if tag == "[TRAN]":
-                sim_day = int(line[6])
-                if sim_day < num_days:
-                    total_cases += 1
+    transmissions_file = get_log_file(output_dir, scenario_name, exp_id, "contact_log.txt")
+    total_cases = int(count_events_per_day(transmissions_file, num_days).sum())
     if pop_size > 0:
         return total_cases / pop_size
 
 def get_num_non_compliers(output_dir, scenario_name, exp_id):
-    num_non_compliers = 0
-    log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "contact_log.txt")
-    with open(log_file) as f:
-        for line in f:
-            line = line.split()
-            tag = line[0]
-            if tag == "[NCOM]":
-                num_non_compliers += 1
-    return num_non_compliers
+    log_file = get_log_file(output_dir, scenario_name, exp_id, "contact_log.txt")
+    return count_events(log_file, "NCOM")
 
 
 def get_num_non_compliers_by_age(output_dir, scenario_name, exp_id):
@@ -69,18 +48,28 @@ def get_num_non_compliers_by_age(output_dir, scenario_name, exp_id):
     by_age = {}
     for a in range(max_age):
         by_age[a] = 0
-    log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "contact_log.txt")
-    with open(log_file) as f:
-        for line in f:
-            line = line.split()
-            tag = line[0]
-            if tag == "[NCOM]":
-                nc_age = int(line[2])
-                by_age[nc_age] += 1
+    log_file = get_log_file(output_dir, scenario_name, exp_id, "contact_log.txt")
+    for nc_age in read_field(log_file, "NCOM", "age"):
+        by_age[nc_age] += 1
 
     return by_age
 
-def main(output_dir, scenario_names, scenario_display_names):
+def plot_ensembles(dates, scenario_names, scenario_display_names, all_results, plot_mode):
+    colors = ["green", "red", "blue", "yellow", "magenta"]
+    plots = []
+    for i, name in enumerate(scenario_names):
+        results = all_results[name]
+        if plot_mode == "fan":
+            p = plot_fan_chart(dates, results, colors[i])
+        elif plot_mode == "trajectories":
+            p = plot_trajectories(dates, results, colors[i])
+        else:
+            for r in results:
+                p, = plt.plot(dates, r, color=colors[i])
+        plots.append(p)
+    plt.legend(plots, scenario_display_names)
+
+def main(output_dir, scenario_names, scenario_display_names, plot_mode="fan"):
     if scenario_display_names == None:
         scenario_display_names = scenario_names
     # FIXME get from config file?
@@ -98,17 +87,10 @@ def main(output_dir, scenario_names, scenario_display_names):
         experiment_ids = get_experiment_ids(output_dir, name)
         with multiprocessing.Pool(processes=8) as pool:
             new_cases_per_day = pool.starmap(get_new_cases_per_day, [(output_dir, name, exp_id, num_days) for exp_id in experiment_ids])
-            cumulative_cases_per_day = []
-            for sim in new_cases_per_day:
-                cumulative_cases_sim = {}
-                total_cases = 0
-                for day in sim:
-                    total_cases += sim[day]
-                    cumulative_cases_sim[day] = total_cases
-                cumulative_cases_per_day.append(cumulative_cases_sim)
+            new_cases_per_day = np.array([[sim[day] for day in range(num_days)] for sim in new_cases_per_day])
 
             all_new_cases_per_day[name] = new_cases_per_day
-            all_cumulative_cases_per_day[name] = cumulative_cases_per_day
+            all_cumulative_cases_per_day[name] = np.cumsum(new_cases_per_day, axis=1)
 
             '''by_age = pool.starmap(get_num_non_compliers_by_age, [(output_dir, name, exp_id) for exp_id in experiment_ids])
             mean_by_age = []
@@ -141,45 +123,17 @@ def main(output_dir, scenario_names, scenario_display_names):
     plt.clf()
     """
 
-    i = 0
-    colors = ["green", "red", "blue", "yellow", "magenta"]
-    plots = []
-    for name in scenario_names:
-        results = all_new_cases_per_day[name]
-        for r in results:
-            new_cases = []
-            for d in range(num_days):
-                new_cases.append(r[d])
-            p, = plt.plot(dates, new_cases, color=colors[i])
-        plots.append(p)
-        i += 1
-
+    plot_ensembles(dates, scenario_names, scenario_display_names, all_new_cases_per_day, plot_mode)
     plt.xlabel("Day")
     plt.xticks(dates[::5], [x.strftime("%d/%m") for x in dates[::5]], rotation=45)
     plt.ylabel("New infections")
-
-    plt.legend(plots, scenario_display_names)
     plt.tight_layout()
     plt.show()
 
-
-    i = 0
-    colors = ["green", "red", "blue", "yellow", "magenta"]
-    plots = []
-    for name in scenario_names:
-        results = all_cumulative_cases_per_day[name]
-        for r in results:
-            cumulative_cases = []
-            for d in range(num_days):
-                cumulative_cases.append(r[d])
-            p, = plt.plot(dates, cumulative_cases, color=colors[i])
-        plots.append(p)
-        i += 1
-
+    plot_ensembles(dates, scenario_names, scenario_display_names, all_cumulative_cases_per_day, plot_mode)
     plt.xlabel("Day")
     plt.xticks(dates[::5], [x.strftime("%d/%m") for x in dates[::5]], rotation=45)
     plt.ylabel("Cumulative cases")
-    plt.legend(plots, scenario_display_names)
     plt.tight_layout()
     plt.show()
 
@@ -236,5 +190,7 @@ if __name__=="__main__":
     parser.add_argument("output_dir", type=str)
     parser.add_argument("scenario_names", type=str, nargs="+")
     parser.add_argument("--scenario_display_names", type=str, nargs="+", default=None)
+    parser.add_argument("--plot_mode", type=str, choices=["fan", "trajectories", "lines"], default="fan",
+                        help="Plot per-day quantile bands, a sample of the runs, or every run")
     args = parser.parse_args()
-    main(args.output_dir, args.scenario_names, args.scenario_display_names)
+    main(args.output_dir, args.scenario_names, args.scenario_display_names, args.plot_mode)
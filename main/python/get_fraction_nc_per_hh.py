@@ -1,9 +1,21 @@
 import argparse
 import csv
-import os
-import xml.etree.ElementTree as ET
 
-def main(population_dir, population_name, use_pct_of_exprob):
+from hotspots import HotspotsWriter, get_district_data_file, group_households_by_district
+
+def get_output_file(population_name, use_pct_of_exprob, output_format):
+    return population_name + "_non_compliers_by_exceedance_prob_" + str(use_pct_of_exprob) + "." + output_format
+
+def main(population_dir, population_name, use_pct_of_exprob, output_format="xml"):
+    """
+    Write the fraction of non-compliers per district, with the households of each district,
+    for every percentage in use_pct_of_exprob (a number or a list). As before, the
+    percentage only names the output file; all variants are written district by
+    district from a single read of the district and household data.
+    """
+    if not isinstance(use_pct_of_exprob, (list, tuple)):
+        use_pct_of_exprob = [use_pct_of_exprob]
+
     # Get proportion of non-compliers per NIS code
     nc_by_nis = {}
     with open("WAVE6_nc_by_nis.csv") as csvfile:
@@ -13,7 +25,7 @@ def main(population_dir, population_name, use_pct_of_exprob):
 
     # Match NIS codes to district IDs in the simulator population
     nc_by_district = {}
-    with open(os.path.join(population_dir, population_name + "_all", population_name + "_district_data.csv")) as csvfile:
+    with open(get_district_data_file(population_dir, population_name)) as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
             district_nis_code = int(row["city"])
@@ -24,38 +36,28 @@ def main(population_dir, population_name, use_pct_of_exprob):
             district_id = int(row["id"])
             nc_by_district[district_id] = nc
 
-
     # Match households to districts
-    households_by_district = {}
-    with open(os.path.join(population_dir, population_name + "_all", population_name + "_household_data.csv")) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            district_id = int(row["district_id"])
-            hh_id = int(row["hh_id"])
-            if district_id in households_by_district:
-                households_by_district[district_id].append(hh_id)
-            else:
-                households_by_district[district_id] = [hh_id]
+    district_ids, households_by_district = group_households_by_district(population_dir, population_name)
 
     # Write to file
-    root = ET.Element("hotspots")
-    for district_id in households_by_district:
-        new_district = ET.SubElement(root, "district")
-        new_district_id = ET.SubElement(new_district, "id")
-        new_district_id.text = str(district_id)
-        new_district_fraction_nc = ET.SubElement(new_district, "fraction_non_compliers")
-        new_district_fraction_nc.text = str(nc_by_district[district_id])
-        new_households = ET.SubElement(new_district, "households")
-        for hh_id in households_by_district[district_id]:
-            new_hh_id = ET.SubElement(new_households, "hh_id")
-            new_hh_id.text = str(hh_id)
-
-    ET.ElementTree(root).write(population_name + "_non_compliers_by_exceedance_prob_" + str(use_pct_of_exprob) + ".xml")
+    writers = [HotspotsWriter(get_output_file(population_name, pct, output_format), output_format) for pct in use_pct_of_exprob]
+    try:
+        for district_id, households in zip(district_ids.tolist(), households_by_district):
+            household_ids = households.tolist()
+            for writer in writers:
+                writer.write_district(district_id, nc_by_district[district_id], household_ids)
+    finally:
+        for writer in writers:
+            writer.close()
 
 if __name__=="__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--population_dir", type=str, default=".")
     parser.add_argument("--population_name", type=str, default="pop_belgium3000k_c500_teachers_censushh")
-    parser.add_argument("--use_pct_of_exprob", type=float, default=100)
+    parser.add_argument("--use_pct_of_exprob", type=float, nargs="+", default=[100],
+                        help="Percentages of the exceedance probability to write a variant for "
+                             "(used in the output file names only)")
+    parser.add_argument("--format", type=str, choices=["xml", "csv"], default="xml",
+                        help="xml, or the compact csv format of household id ranges")
     args = parser.parse_args()
-    main(args.population_dir, args.population_name, args.use_pct_of_exprob)
+    main(args.population_dir, args.population_name, args.use_pct_of_exprob, args.format)
@@ -1,4 +1,19 @@
+import argparse
 import csv
+import json
+import multiprocessing
+import numpy
+import os
+import re
+
+################################################################################
+# Weighted non-compliance from survey waves                                    #
+# Only the columns needed are read from each wave. Respondents are grouped    #
+# (by NIS code or age band) and the weighted fractions of non-compliers are   #
+# grouped sums (bincount) over arrays. Confidence intervals come from a       #
+# weighted bootstrap: every replicate resamples respondents with replacement #
+# and recomputes all grouped fractions at once; replicates run in parallel.  #
+################################################################################
 
 question_ids = {
     "age": "Q3",
@@ -9,58 +24,143 @@ question_ids = {
     "handshake_kiss_last_week_single": "Q63"
 }
 
-with open("2020_UA_Corona_golf6_data_weights.csv", encoding="latin-1") as csvfile:
-    reader = csv.DictReader(csvfile)
-    total = 0
-    nc = 0
-    total_by_nis = {}
-    nc_by_nis = {}
-    for row in reader:
-        single = int(row[question_ids["single"]])
-        nis_code = int(row["niscode"])
-        # TODO "NA"?
-        if single == 1:
-            non_complier = False if int(row[question_ids["handshake_kiss_last_week_single"]]) == 1 else True
-        else:
-            non_complier = False if int(row[question_ids["handshake_kiss_last_week"]]) == 1 else True
-
-        weight = float(row["w2"])
-        total += weight
-        if non_complier:
-            nc += weight
-        if nis_code in total_by_nis:
-            total_by_nis[nis_code] += weight
-        else:
-            total_by_nis[nis_code] = weight
-        if non_complier:
-            if nis_code in nc_by_nis:
-                nc_by_nis[nis_code] += weight
-            else:
-                nc_by_nis[nis_code] = weight
-
-
-    fraction_nc_by_nis = {}
-
-    for nis_code in total_by_nis:
-        total = total_by_nis[nis_code]
-        if nis_code in nc_by_nis:
-            nc = nc_by_nis[nis_code]
-        else:
-            nc = 0
-        fraction_nc_by_nis[nis_code] = nc / total
-
-    with open("WAVE6_nc_by_nis.csv", "w") as csvfile:
-        fieldnames = ["nis_code", "fraction_non_compliers"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for nis_code in fraction_nc_by_nis:
-            writer.writerow({"nis_code": nis_code, "fraction_non_compliers": fraction_nc_by_nis[nis_code]})
+DEFAULT_AGE_BANDS = (0, 18, 26, 36, 46, 56, 66, 76)
+
+def get_wave_name(survey_file):
+    # e.g. 2020_UA_Corona_golf6_data_weights.csv -> WAVE6
+    match = re.search(r"golf(\d+)", os.path.basename(survey_file))
+    if match is None:
+        return os.path.splitext(os.path.basename(survey_file))[0]
+    return "WAVE" + match.group(1)
+
+def to_float(field):
+    return numpy.nan if field in ("NA", "") else float(field)
+
+def read_survey(survey_file, columns):
+    """Get the given columns of a survey file as float arrays, with NaN for missing answers (NA or empty)."""
+    with open(survey_file, encoding="latin-1", newline="") as csvfile:
+        header = next(csv.reader(csvfile))
+    indices = [header.index(column) for column in columns]
+    # Only the requested columns are converted; quoted free-text answers may hold commas
+    values = numpy.loadtxt(survey_file, dtype=numpy.float64, delimiter=",", quotechar='"', skiprows=1,
+                           usecols=indices, converters=to_float, encoding="latin-1", ndmin=2)
+    return {column: values[:, i] for i, column in enumerate(columns)}
+
+def get_handshake_kiss_answers(survey, question_ids=question_ids):
+    # Persons living alone answered a separate question
+    single = survey[question_ids["single"]] == 1
+    return numpy.where(single, survey[question_ids["handshake_kiss_last_week_single"]],
+                       survey[question_ids["handshake_kiss_last_week"]])
 
+def get_non_compliers(survey, question_ids=question_ids):
+    """
+    Get whether each respondent did shake hands or kiss (anything but answer 1) last week,
+    and whether they answered the question at all.
+    """
+    answers = get_handshake_kiss_answers(survey, question_ids)
+    answered = ~numpy.isnan(answers)
+    return answered & (answers != 1), answered
 
+def get_weighted_fractions(group_indices, num_groups, non_compliers, weights):
+    """Weighted fraction of non-compliers in each group (NaN for groups without weight)."""
+    totals = numpy.bincount(group_indices, weights=weights, minlength=num_groups)
+    nc = numpy.bincount(group_indices, weights=weights * non_compliers, minlength=num_groups)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return nc / totals
 
+def _bootstrap_replicates(group_indices, num_groups, non_compliers, weights, num_replicates, seed):
+    rng = numpy.random.default_rng(seed)
+    fractions = numpy.empty((num_replicates, num_groups))
+    for r in range(num_replicates):
+        # Number of times each respondent is drawn
+        draws = numpy.bincount(rng.integers(0, len(weights), len(weights)), minlength=len(weights))
+        fractions[r] = get_weighted_fractions(group_indices, num_groups, non_compliers, weights * draws)
+    return fractions
 
+def bootstrap_weighted_fractions(group_indices, num_groups, non_compliers, weights, num_replicates=1000,
+                                 confidence=0.95, seed=0, pool=None, num_batches=8):
+    """
+    Get (lower, upper) bounds of the weighted fraction of non-compliers per group, from
+    num_replicates bootstrap replicates computed in batches (in parallel if a pool is given).
+    """
+    seeds = numpy.random.SeedSequence(seed).spawn(num_batches)
+    batch_sizes = [len(batch) for batch in numpy.array_split(numpy.arange(num_replicates), num_batches)]
+    tasks = [(group_indices, num_groups, non_compliers, weights, size, batch_seed)
+             for size, batch_seed in zip(batch_sizes, seeds) if size > 0]
+    if pool is None:
+        replicates = [_bootstrap_replicates(*task) for task in tasks]
+    else:
+        replicates = pool.starmap(_bootstrap_replicates, tasks)
+    replicates = numpy.concatenate(replicates)
+    alpha = (1 - confidence) / 2
+    return tuple(numpy.nanquantile(replicates, [alpha, 1 - alpha], axis=0))
 
+def aggregate_wave(survey_file, question_ids=question_ids, age_bands=DEFAULT_AGE_BANDS, weight_column="w2",
+                   nis_column="niscode", num_replicates=0, pool=None, seed=0):
+    """
+    Get the weighted fractions of non-compliers of a survey wave by NIS code and by age band,
+    as {"nis_code": (nis_codes, fractions, bounds), "age_band": (band lower ages, fractions, bounds)},
+    where bounds are bootstrap (lower, upper) arrays, or None without replicates.
+    """
+    columns = [question_ids["age"], question_ids["single"], question_ids["handshake_kiss_last_week"],
+               question_ids["handshake_kiss_last_week_single"], weight_column, nis_column]
+    survey = read_survey(survey_file, list(dict.fromkeys(columns)))
+    non_compliers, answered = get_non_compliers(survey, question_ids)
+    non_compliers = non_compliers.astype(numpy.float64)
+    weights = survey[weight_column]
+    # Respondents without an answer or a weight are left out of all fractions
+    answered &= ~numpy.isnan(weights)
 
+    # (keys, group index per respondent, respondents taken into account)
+    groupings = {}
+    nis = survey[nis_column]
+    has_nis = answered & ~numpy.isnan(nis)
+    nis_codes, nis_group_indices = numpy.unique(nis[has_nis].astype(numpy.int64), return_inverse=True)
+    nis_indices = numpy.full(len(nis), -1, dtype=numpy.int64)
+    nis_indices[has_nis] = nis_group_indices
+    groupings["nis_code"] = (nis_codes, nis_indices, has_nis)
+    ages = survey[question_ids["age"]]
+    age_band_indices = numpy.digitize(ages, age_bands) - 1
+    # Respondents without (valid) age are left out of the age bands
+    groupings["age_band"] = (numpy.array(age_bands), age_band_indices,
+                             answered & ~numpy.isnan(ages) & (age_band_indices >= 0))
+
+    results = {}
+    for grouping, (keys, indices, selected) in groupings.items():
+        args = (indices[selected], len(keys), non_compliers[selected], weights[selected])
+        fractions = get_weighted_fractions(*args)
+        bounds = None
+        if num_replicates > 0:
+            bounds = bootstrap_weighted_fractions(*args, num_replicates=num_replicates, seed=seed, pool=pool)
+        results[grouping] = (keys, fractions, bounds)
+    return results
+
+def write_fractions(output_file, key_name, keys, fractions, bounds):
+    with open(output_file, "w", newline="") as csvfile:
+        fieldnames = [key_name, "fraction_non_compliers"]
+        if bounds is not None:
+            fieldnames += ["ci_lower", "ci_upper"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for i, key in enumerate(keys.tolist()):
+            row = {key_name: key, "fraction_non_compliers": fractions[i]}
+            if bounds is not None:
+                row["ci_lower"] = bounds[0][i]
+                row["ci_upper"] = bounds[1][i]
+            writer.writerow(row)
+
+def main(survey_files, question_ids_file=None, num_replicates=0, num_processes=4, seed=0):
+    survey_question_ids = question_ids
+    if question_ids_file is not None:
+        with open(question_ids_file) as f:
+            survey_question_ids = json.load(f)
+    with multiprocessing.Pool(processes=num_processes) as pool:
+        for survey_file in survey_files:
+            wave_name = get_wave_name(survey_file)
+            results = aggregate_wave(survey_file, survey_question_ids, num_replicates=num_replicates, pool=pool, seed=seed)
+            write_fractions(wave_name + "_nc_by_nis.csv", "nis_code", *results["nis_code"])
+            write_fractions(wave_name + "_nc_by_age.csv", "age_band_min", *results["age_band"])
+            print("Wrote {0}_nc_by_nis.csv and {0}_nc_by_age.csv".format(wave_name))
 
 '''
 ['', 'UNID6',
@@ -82,3 +182,14 @@ with open("2020_UA_Corona_golf6_data_weights.csv", encoding="latin-1") as csvfil
 'Q2_6', 'Q2_3', 'Q160_Browser', 'Q160_Version', 'Q160_Operating_System', 'Q160_Resolution',
 'Q3', 'Q4', 'Q5', 'Q68', 'Q6', 'Q6_8_TEXT', 'Q7', 'Q64', 'Q65', 'Q66', 'Q67', 'Q9', 'Q10', 'Q62', 'Q63', 'Q136', 'Q137_1', 'Q137_2', 'Q137_3', 'Q137_4', 'Q137_5', 'Q137_6', 'Q137_7', 'Q137_8', 'Q137_9', 'Q137_10', 'Q137_11', 'Q11', 'Q69', 'Q15_1', 'Q15_2', 'Q15_3', 'Q15_4', 'Q15_5', 'Q15_6', 'Q15_7', 'Q15_8', 'Q15_9', 'Q15_10', 'Q15_11', 'Q15_12', 'Q15_13', 'Q15_14', 'Q15_15', 'Q15_16', 'Q15_17', 'Q15_17_TEXT', 'Q16', 'Q12', 'Q13', 'Q14', 'Q14_8_TEXT', 'Q17', 'Q17_20_TEXT', 'Q18', 'Q19_1', 'Q19_2', 'Q19_3', 'Q19_4', 'Q19_5', 'Q19_6', 'Q19_7', 'Q20_1', 'Q20_2', 'Q20_3', 'Q20_4', 'Q20_5', 'Q20_6', 'Q20_7', 'Q21', 'Q21_4_TEXT', 'Q22', 'Q23', 'Q24', 'Q24_10_TEXT', 'Q25', 'Q25_3_TEXT', 'Q26', 'Q26_4_TEXT', 'Q27', 'Q27_5_TEXT', 'Q28', 'Q29_1', 'Q29_2', 'Q29_3', 'Q29_4', 'Q29_5', 'Q29_6', 'Q29_7', 'Q29_8', 'Q29_9', 'Q29_10', 'Q29_11', 'Q29_12', 'Q29_13', 'Q29_14', 'Q29_15', 'Q29_16', 'Q29_14_TEXT', 'Q30', 'Q31', 'Q32', 'Q33', 'Q34', 'Q35', 'Q36', 'Q127', 'Q128', 'Q40_1', 'Q40_2', 'Q40_3', 'Q40_4', 'Q40_5', 'Q40_6', 'Q40_7', 'Q40_8', 'Q87_1', 'Q87_2', 'Q87_3', 'Q87_4', 'Q163_1', 'Q163_2', 'Q163_3', 'Q163_20', 'Q163_4', 'Q163_5', 'Q163_6', 'Q163_7', 'Q163_8', 'Q163_9', 'Q163_10', 'Q163_11', 'Q163_12', 'Q163_13', 'Q163_14', 'Q163_15', 'Q163_16', 'Q163_17', 'Q163_21', 'Q163_18', 'Q163_19', 'Q163_19_TEXT', 'Q162_1_1', 'Q162_2_1', 'Q162_3_1', 'Q162_36_1', 'Q162_4_1', 'Q162_5_1', 'Q162_6_1', 'Q162_7_1', 'Q162_8_1', 'Q162_9_1', 'Q162_10_1', 'Q162_11_1', 'Q162_12_1', 'Q162_13_1', 'Q162_14_1', 'Q162_15_1', 'Q162_16_1', 'Q162_17_1', 'Q162_18_1', 'Q162_37_1', 'Q162_19_1', 'Q162_1_2', 'Q162_2_2', 'Q162_3_2', 'Q162_36_2', 'Q162_4_2', 'Q162_5_2', 'Q162_6_2', 'Q162_7_2', 'Q162_8_2', 'Q162_9_2', 'Q162_10_2', 'Q162_11_2', 'Q162_12_2', 'Q162_13_2', 'Q162_14_2', 'Q162_15_2', 'Q162_16_2', 'Q162_17_2', 'Q162_18_2', 'Q162_37_2', 'Q162_19_2', 'Q162_1_3', 'Q162_2_3', 'Q162_3_3', 'Q162_36_3', 'Q162_4_3', 'Q162_5_3', 'Q162_6_3', 'Q162_7_3', 'Q162_8_3', 'Q162_9_3', 'Q162_10_3', 'Q162_11_3', 'Q162_12_3', 'Q162_13_3', 'Q162_14_3', 'Q162_15_3', 'Q162_16_3', 'Q162_17_3', 'Q162_18_3', 'Q162_37_3', 'Q162_19_3', 'Q75_1', 'Q75_2', 'Q75_3', 'Q75_4', 'Q75_5', 'Q76', 'Q80', 'Q79_1', 'Q79_2', 'Q79_3', 'Q79_4', 'Q79_5', 'Q81', 'Q78', 'Q82_1', 'Q82_2', 'Q82_3', 'Q82_4', 'Q82_5', 'Q83', 'Q84', 'Q85_1', 'Q85_2', 'Q85_3', 'Q85_4', 'Q85_5', 'Q86', 'Q87', 'Q91_1', 'Q91_2', 'Q91_3', 'Q91_4', 'Q91_5', 'Q91_6', 'Q91_5_TEXT', 'Q38_1', 'Q38_2', 'Q38_3', 'Q39_1', 'Q39_2', 'Q39_3', 'Q42', 'Q43', 'Q44', 'Q45', 'Q46', 'Q47', 'Q48', 'Q49', 'Q50', 'Q51', 'Q52', 'Q53', 'Q54', 'Q55', 'Q199_1', 'Q199_2', 'Q199_3', 'Q199_4', 'Q199_5', 'Q199_6', 'Q150_1', 'Q57_1', 'Q57_2', 'Q57_3', 'Q57_4', 'Q57_5', 'Q151', 'Q197', 'Q92', 'Q92_9_TEXT', 'Q196', 'Q58_1', 'Q58_2', 'Q58_3', 'Q58_4', 'Q58_5', 'Q58_6', 'Q58_7', 'Q58_8', 'Q59', 'Q74', 'niscode', 'gemeente', 'provin', 'Q64_group', 'Q65_group', 'Q66_group', 'Q67_group', 'Q8_child', 'Q8_child_group', 'Q9_group', 'Q8_sum', 'Q8_sum_group', 'gewest', 'COVID_symptoms', 'Single_HH', 'Q59_teller', 'Q74_teller', 'age_range', 'WB_1', 'Age_9klas', 'Q9_Q62', 'Q10_Q63', 'echt_alleen', 'centrumstad', 'male', 'fam_symp', 'covid', 'single', 'wb_2binary', 'uls6_score', 'gender', 'agecat', 'province', 'w1', 'w2']
 '''
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Weighted fractions of non-compliers per NIS code and age band from survey waves")
+    parser.add_argument("survey_files", type=str, nargs="*", default=["2020_UA_Corona_golf6_data_weights.csv"])
+    parser.add_argument("--question_ids_file", type=str, default=None,
+                        help="JSON file mapping question names to survey columns, if they differ from wave 6")
+    parser.add_argument("--num_replicates", type=int, default=0, help="Bootstrap replicates for confidence intervals")
+    parser.add_argument("--num_processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.survey_files, args.question_ids_file, args.num_replicates, args.num_processes, args.seed)
@@ -2,6 +2,8 @@ import argparse
 import csv
 import os
 
+from event_log import count_events, get_log_file
+
 def main(output_dir, scenario_name):
     # Get experiment IDs
     experiment_ids = []
@@ -14,14 +16,8 @@ def main(output_dir, scenario_name):
     # Count number of non-compliers in each experiment
     all_nums_non_compliers = []
     for exp_id in experiment_ids:
-        num_non_compliers = 0
-        log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "contact_log.txt")
-        with open(log_file) as f:
-            for line in f:
-                line = line.split()
-                tag = line[0]
-                if tag == "[NCOM]":
-                    num_non_compliers += 1
+        log_file = get_log_file(output_dir, scenario_name, exp_id, "contact_log.txt")
+        num_non_compliers = count_events(log_file, "NCOM")
         all_nums_non_compliers.append(num_non_compliers)
 
     avg_num_non_compliers = sum(all_nums_non_compliers) / len(all_nums_non_compliers)
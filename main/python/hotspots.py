@@ -0,0 +1,92 @@
+import csv
+import numpy
+import os
+
+################################################################################
+# Hotspot files                                                                #
+# Hotspot districts for the NonComplianceSeeder (non_compliance_type          #
+# "Hotspots"), in the compact csv format: one line per run of consecutive    #
+# household ids of a district,                                               #
+#   district_id,fraction_non_compliers,first_hh_id,last_hh_id                #
+# with the lines of a district kept together. Households keep the order in  #
+# which they are given, as in the xml format, so that both formats seed the  #
+# same non-compliers.                                                        #
+################################################################################
+
+HOTSPOTS_HEADER = ["district_id", "fraction_non_compliers", "first_hh_id", "last_hh_id"]
+
+def get_id_ranges(ids):
+    """Get the (first, last) runs of consecutive increasing values in ids, in the order of ids."""
+    ids = numpy.asarray(ids, dtype=numpy.int64)
+    if len(ids) == 0:
+        return []
+    breaks = numpy.flatnonzero(numpy.diff(ids) != 1)
+    firsts = numpy.concatenate([ids[:1], ids[breaks + 1]])
+    lasts = numpy.concatenate([ids[breaks], ids[-1:]])
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+class HotspotsWriter:
+    """
+    Write hotspot districts to disk one at a time, either as xml (the layout
+    NonComplianceSeeder reads: hotspots -> district -> id, fraction_non_compliers,
+    households -> hh_id) or in the compact csv format.
+    """
+
+    def __init__(self, hotspots_file, output_format="xml"):
+        self.output_format = output_format
+        self.file = open(hotspots_file, "w", newline="")
+        if output_format == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(HOTSPOTS_HEADER)
+        else:
+            self.file.write("<hotspots>")
+
+    def write_district(self, district_id, fraction_non_compliers, household_ids):
+        if self.output_format == "csv":
+            for first, last in get_id_ranges(household_ids):
+                self.writer.writerow([district_id, fraction_non_compliers, first, last])
+        else:
+            self.file.write("<district><id>{}</id><fraction_non_compliers>{}</fraction_non_compliers><households>".format(
+                district_id, fraction_non_compliers))
+            self.file.write("".join(["<hh_id>{}</hh_id>".format(hh_id) for hh_id in household_ids]))
+            self.file.write("</households></district>")
+
+    def close(self):
+        if self.output_format != "csv":
+            self.file.write("</hotspots>")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def read_columns(csv_file, columns, dtype=numpy.int64):
+    """Get the given columns of a csv file as arrays, parsing only those."""
+    with open(csv_file) as f:
+        header = f.readline().strip().split(",")
+    data = numpy.loadtxt(csv_file, delimiter=",", skiprows=1, dtype=dtype, ndmin=2,
+                         usecols=[header.index(column) for column in columns])
+    return [data[:, i] for i in range(len(columns))]
+
+def get_household_data_file(population_dir, population_name):
+    return os.path.join(population_dir, population_name + "_all", population_name + "_household_data.csv")
+
+def get_district_data_file(population_dir, population_name):
+    return os.path.join(population_dir, population_name + "_all", population_name + "_district_data.csv")
+
+def group_households_by_district(population_dir, population_name):
+    """
+    Get the district ids and, per district, the ids of its households, both in order of
+    first appearance in the household data.
+    """
+    hh_ids, district_ids = read_columns(get_household_data_file(population_dir, population_name), ["hh_id", "district_id"])
+    unique_district_ids, first_rows, district_indices = numpy.unique(district_ids, return_index=True, return_inverse=True)
+    district_order = numpy.argsort(first_rows)
+    district_ranks = numpy.empty(len(district_order), dtype=numpy.int64)
+    district_ranks[district_order] = numpy.arange(len(district_order))
+    ranks = district_ranks[district_indices]
+    hh_ids = hh_ids[numpy.argsort(ranks, kind="stable")]
+    ends = numpy.cumsum(numpy.bincount(ranks, minlength=len(district_order)))
+    return unique_district_ids[district_order], numpy.split(hh_ids, ends[:-1])
@@ -0,0 +1,33 @@
+import argparse
+
+import superspreading_postprocessing
+import superspreading_r0_postprocessing
+import transmission_probability_comparison
+
+from figures import FIGURE_FORMATS, render_figures, select_figures
+
+def get_report_figures(output_dir, scenario_names, scenario_display_names):
+    figures = superspreading_postprocessing.get_figures(output_dir, scenario_names, scenario_display_names)
+    figures += superspreading_r0_postprocessing.get_figures(output_dir, scenario_names)
+    for scenario in scenario_names:
+        figures += transmission_probability_comparison.get_figures(output_dir, scenario)
+    return figures
+
+def main(output_dir, scenario_names, scenario_display_names, figure_dir, formats, figure_names, num_processes):
+    figures = select_figures(get_report_figures(output_dir, scenario_names, scenario_display_names), figure_names)
+    for name in render_figures(figures, figure_dir, formats, num_processes):
+        print("Saved {}".format(name))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Render the figures of all postprocessing scripts for a scenario sweep to files")
+    parser.add_argument("output_dir", type=str, help="Directory containing simulation output")
+    parser.add_argument("scenario_names", type=str, nargs="+")
+    parser.add_argument("--scenario_display_names", type=str, nargs="+", default=None)
+    parser.add_argument("--figure_dir", type=str, default="figures")
+    parser.add_argument("--formats", type=str, nargs="+", choices=FIGURE_FORMATS, default=["png", "pdf"])
+    parser.add_argument("--figures", type=str, nargs="+", default=None,
+                        help="Names (or fnmatch patterns) of the figures to render, default all")
+    parser.add_argument("--num_processes", type=int, default=4)
+    args = parser.parse_args()
+    main(args.output_dir, args.scenario_names, args.scenario_display_names, args.figure_dir, args.formats,
+         args.figures, args.num_processes)
@@ -1,88 +1,8 @@
 import argparse
-import csv
-import math
 import matplotlib.pyplot as plt
 import numpy as np
-import os
 
-def getNumExperiments(outputDir, popSize):
-    popSizeOutputDir = os.path.join(outputDir, "popSizes_" + popSize)
-    summaryFile = os.path.join(popSizeOutputDir, "popsizes_" + popSize + "_summary.csv")
-    numExperiments = 0
-    with open(summaryFile) as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            numExperiments += 1
-    return numExperiments
-
-def getParams(outputDir, popSize, experimentID):
-    params = {}
-    experimentDir = os.path.join(outputDir, "popsizes_" + popSize, "exp" + "{:04}".format(experimentID))
-    summaryFile = os.path.join(experimentDir, "summary.csv")
-    with open(summaryFile) as csvfile:
-        reader = csv.DictReader(csvfile)
-        row = next(reader)
-        params['num_days'] = int(row["num_days"])
-        params['r0'] = float(row["r0"])
-        params['population_size'] = int(row["population_size"])
-    return params
-
-def getNewCasesPerDay(transmissionsFile, numDays):
-    transmissions = {}
-    for i in range(numDays):
-        transmissions[i] = 0
-    with open(transmissionsFile) as f:
-        for line in f:
-            line = line.split(" ")
-            if line[0] == "[TRAN]":
-                simDay = int(line[6])
-                if simDay < numDays:
-                    transmissions[simDay] += 1
-    return transmissions
-
-def getAttackRatesByR0(outputDir, popSize, numExperiments):
-    attackRates = {}
-    for experimentID in range(1, numExperiments + 1):
-        experimentDir = os.path.join(outputDir, "popsizes_" + popSize, "exp" + "{:04}".format(experimentID))
-        transmissionsFile = os.path.join(experimentDir, "event_log.txt")
-        params = getParams(outputDir, popSize, experimentID)
-        newCasesPerDay = getNewCasesPerDay(transmissionsFile, params["num_days"])
-        attackRate = sum([newCasesPerDay[day] for day in newCasesPerDay.keys()]) / params['population_size']
-        if params['r0'] in attackRates:
-            attackRates[params['r0']].append(attackRate)
-        else:
-            attackRates[params['r0']] = [attackRate]
-    return attackRates
-
-def getPeakIncidenceRatiosByR0(outputDir, popSize, numExperiments):
-    peakIncidenceRatios = {}
-    for experimentID in range(1, numExperiments + 1):
-        experimentDir = os.path.join(outputDir, "popsizes_" + popSize, "exp" + "{:04}".format(experimentID))
-        transmissionsFile = os.path.join(experimentDir, "event_log.txt")
-        params = getParams(outputDir, popSize, experimentID)
-        newCasesPerDay = getNewCasesPerDay(transmissionsFile, params["num_days"])
-        peakIncidenceRatio = max([newCasesPerDay[day] for day in newCasesPerDay.keys()]) / params['population_size']
-        if params['r0'] in peakIncidenceRatios:
-            peakIncidenceRatios[params['r0']].append(peakIncidenceRatio)
-        else:
-            peakIncidenceRatios[params['r0']] = [peakIncidenceRatio]
-    return peakIncidenceRatios
-
-def getDayOfPeakByR0(outputDir, popSize, numExperiments):
-    daysOfPeak = {}
-    for experimentID in range(1, numExperiments + 1):
-        experimentDir = os.path.join(outputDir, "popsizes_" + popSize, "exp" + "{:04}".format(experimentID))
-        transmissionsFile = os.path.join(experimentDir, "event_log.txt")
-        params = getParams(outputDir, popSize, experimentID)
-        newCasesPerDay = getNewCasesPerDay(transmissionsFile, params["num_days"])
-        peakIncidence = max([newCasesPerDay[day] for day in newCasesPerDay.keys()])
-        dayOfPeak = [day for day in newCasesPerDay.keys() if newCasesPerDay[day] == peakIncidence]
-        dayOfPeak = min(dayOfPeak)
-        if params['r0'] in daysOfPeak:
-            daysOfPeak[params['r0']].append(dayOfPeak)
-        else:
-            daysOfPeak[params['r0']] = [dayOfPeak]
-    return daysOfPeak
+from curve_metrics import get_scenario_curve_metrics, group_by
 
 def set_box_color(bp, color):
     plt.setp(bp['boxes'], color=color)
@@ -157,17 +77,11 @@ def main(outputDir, popSizes):
     allPeakIncidenceRatios = []
     allDaysOfPeak = []
     for size in popSizes:
-        #numExperiments = getNumExperiments(outputDir, size)
-        numExperiments = 200
-        # Get attack rates
-        attackRatesByR0 = getAttackRatesByR0(outputDir, size, numExperiments)
-        allAttackRates.append(attackRatesByR0)
-        # Get peak incidence ratios
-        peakIncidenceRatiosByR0 = getPeakIncidenceRatiosByR0(outputDir, size, numExperiments)
-        allPeakIncidenceRatios.append(peakIncidenceRatiosByR0)
-        # Get day of peak
-        dayOfPeakByR0 = getDayOfPeakByR0(outputDir, size, numExperiments)
-        allDaysOfPeak.append(dayOfPeakByR0)
+        # All curve metrics of all experiments (as listed in the scenario summary) in one pass
+        metrics, summary = get_scenario_curve_metrics(outputDir, "popsizes_" + size)
+        allAttackRates.append(group_by(metrics["attack_rate"], summary, "r0"))
+        allPeakIncidenceRatios.append(group_by(metrics["peak_incidence_ratio"], summary, "r0"))
+        allDaysOfPeak.append(group_by(metrics["peak_day"], summary, "r0"))
     # Plot results
     plotAttackRates(outputDir, popSizes, allAttackRates)
     plotPeakIncidenceRatios(outputDir, popSizes, allPeakIncidenceRatios)
@@ -0,0 +1,131 @@
+import argparse
+import numpy
+import os
+
+################################################################################
+# Population index                                                             #
+# A population file (pop_*.csv, one row per person, person id = row index)    #
+# as NumPy arrays: the age and pool ids of every person, and per pool type    #
+# the members of every pool in CSR form: the members of pool i are            #
+# members[offsets[i]:offsets[i + 1]]. Pool id 0 means "not in a pool of this  #
+# type". The index is stored next to the population file (.npz), or in an    #
+# index directory for read-only data directories, and is ignored once the     #
+# size or mtime of the population file changes.                               #
+################################################################################
+
+POOL_TYPES = ("household", "work", "school", "primary_community", "secondary_community")
+
+POOL_COLUMNS = {
+    "household": "household_id",
+    "work": "work_id",
+    "school": "school_id",
+    "primary_community": "primary_community",
+    "secondary_community": "secondary_community",
+}
+
+class PopulationIndex:
+    def __init__(self, ages, pool_ids, offsets, members):
+        self.ages = ages
+        self.pool_ids = pool_ids
+        self.offsets = offsets
+        self.members = members
+
+    def __len__(self):
+        return len(self.ages)
+
+    def get_members(self, pool_type, pool_id):
+        offsets = self.offsets[pool_type]
+        return self.members[pool_type][offsets[pool_id]:offsets[pool_id + 1]]
+
+    def get_age_counts(self, pool_type, pool_id):
+        """The ages occurring in a pool, how many members have each of these ages, and the pool size."""
+        member_ages, member_counts = numpy.unique(self.ages[self.get_members(pool_type, pool_id)], return_counts=True)
+        return member_ages, member_counts, len(self.get_members(pool_type, pool_id))
+
+def build_population_index(ages, pool_ids):
+    offsets = {}
+    members = {}
+    for pool_type, ids in pool_ids.items():
+        # Stable, so the members of a pool are in order of person id
+        members[pool_type] = numpy.argsort(ids, kind="stable").astype(numpy.int32)
+        counts = numpy.bincount(ids, minlength=1)
+        offsets[pool_type] = numpy.concatenate([[0], numpy.cumsum(counts)]).astype(numpy.int64)
+    return PopulationIndex(ages, pool_ids, offsets, members)
+
+def read_population_file(population_file):
+    """Get the ages and the pool ids per pool type of all persons in a population file."""
+    with open(population_file) as f:
+        header = f.readline().strip().split(",")
+    columns = ["age"] + [POOL_COLUMNS[pool_type] for pool_type in POOL_TYPES]
+    # Ids may be written as floats (e.g. 12.0)
+    data = numpy.loadtxt(population_file, delimiter=",", skiprows=1, dtype=numpy.float64, ndmin=2,
+                         usecols=[header.index(column) for column in columns])
+    ages = data[:, 0].astype(numpy.int16)
+    pool_ids = {pool_type: data[:, i + 1].astype(numpy.int32) for i, pool_type in enumerate(POOL_TYPES)}
+    return ages, pool_ids
+
+def get_index_file(population_file, index_dir=None):
+    index_file = os.path.splitext(population_file)[0] + "_index.npz"
+    if index_dir is not None:
+        index_file = os.path.join(index_dir, os.path.basename(index_file))
+    return index_file
+
+def _get_source_stamp(population_file):
+    stat = os.stat(population_file)
+    return numpy.array([stat.st_size, stat.st_mtime_ns], dtype=numpy.int64)
+
+def is_index_valid(population_file, index_dir=None):
+    index_file = get_index_file(population_file, index_dir)
+    if not os.path.exists(index_file):
+        return False
+    with numpy.load(index_file) as index:
+        return numpy.array_equal(index["source_stamp"], _get_source_stamp(population_file))
+
+def save_population_index(population_file, index, index_dir=None):
+    arrays = {"source_stamp": _get_source_stamp(population_file), "ages": index.ages}
+    for pool_type in POOL_TYPES:
+        arrays[pool_type + ".ids"] = index.pool_ids[pool_type]
+        arrays[pool_type + ".offsets"] = index.offsets[pool_type]
+        arrays[pool_type + ".members"] = index.members[pool_type]
+    # Write to a temporary file first so readers never see a half-written index
+    if index_dir is not None:
+        os.makedirs(index_dir, exist_ok=True)
+    index_file = get_index_file(population_file, index_dir)
+    tmp_file = index_file + ".tmp.npz"
+    numpy.savez(tmp_file, **arrays)
+    os.replace(tmp_file, index_file)
+    return index_file
+
+def load_population_index(population_file, save=True, index_dir=None):
+    """
+    Get the PopulationIndex of a population file, from its stored index if that is up to date,
+    otherwise by parsing the file (and storing the index if save). The index is stored next
+    to the population file, or in index_dir; if it cannot be written there, the index is
+    only kept in memory.
+    """
+    if is_index_valid(population_file, index_dir):
+        with numpy.load(get_index_file(population_file, index_dir)) as arrays:
+            return PopulationIndex(arrays["ages"],
+                                   {pool_type: arrays[pool_type + ".ids"] for pool_type in POOL_TYPES},
+                                   {pool_type: arrays[pool_type + ".offsets"] for pool_type in POOL_TYPES},
+                                   {pool_type: arrays[pool_type + ".members"] for pool_type in POOL_TYPES})
+    index = build_population_index(*read_population_file(population_file))
+    if save:
+        try:
+            save_population_index(population_file, index, index_dir)
+        except OSError as error:
+            print("WARNING: could not store the index of {}: {}".format(population_file, error))
+    return index
+
+def main(population_files, index_dir):
+    for population_file in population_files:
+        load_population_index(population_file, index_dir=index_dir)
+        print("Indexed {}".format(population_file))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Build the population index of population files ahead of time")
+    parser.add_argument("population_files", type=str, nargs="+")
+    parser.add_argument("--index_dir", type=str, default=None,
+                        help="Directory to store the indexes in, instead of next to the population files")
+    args = parser.parse_args()
+    main(args.population_files, args.index_dir)
@@ -0,0 +1,104 @@
+import argparse
+import hashlib
+import json
+import numpy
+import os
+
+from estimate_transmission_probability import estimate_transmission_probabilities
+
+################################################################################
+# R0 curves                                                                    #
+# Estimated R0 on a grid of transmission probabilities, computed once per     #
+# (population, contact matrices, infectious period lengths, overdispersion,   #
+# grid) and stored on disk under a hash of their contents. R0 at other        #
+# transmission probabilities, and the transmission probability that gives a   #
+# target R0, are interpolated linearly (R0 increases with the transmission    #
+# probability).                                                               #
+################################################################################
+
+DEFAULT_TRANSMISSION_PROBABILITIES = tuple(numpy.round(numpy.arange(0.01, 0.31, 0.01), 2).tolist())
+
+class R0Curve:
+    def __init__(self, transmission_probabilities, r0s):
+        # Without transmission there are no secondary cases
+        self.transmission_probabilities = numpy.concatenate([[0.0], transmission_probabilities])
+        self.r0s = numpy.concatenate([[0.0], r0s])
+
+    def get_r0(self, transmission_probability):
+        if numpy.any(numpy.asarray(transmission_probability) > self.transmission_probabilities[-1]):
+            raise ValueError("Transmission probability {} is beyond the curve (max. {})".format(
+                transmission_probability, self.transmission_probabilities[-1]))
+        return numpy.interp(transmission_probability, self.transmission_probabilities, self.r0s)
+
+    def get_transmission_probability(self, r0):
+        if numpy.any(numpy.asarray(r0) > self.r0s[-1]):
+            raise ValueError("R0 {} is beyond the curve (max. {} at tp {})".format(
+                r0, self.r0s[-1], self.transmission_probabilities[-1]))
+        return numpy.interp(r0, self.r0s, self.transmission_probabilities)
+
+def _hash_file(file_name, h):
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(1 << 24), b""):
+            h.update(block)
+
+def get_curve_key(population_file, contact_matrix_file, infectious_period_lengths, overdispersion,
+                  transmission_probabilities):
+    h = hashlib.sha256()
+    _hash_file(population_file, h)
+    _hash_file(contact_matrix_file, h)
+    parameters = {
+        "infectious_period_lengths": list(infectious_period_lengths),
+        "overdispersion": overdispersion,
+        "transmission_probabilities": list(transmission_probabilities),
+    }
+    h.update(json.dumps(parameters, sort_keys=True).encode())
+    return h.hexdigest()
+
+def get_curve_dir(population_file):
+    return os.path.join(os.path.dirname(os.path.abspath(population_file)), "r0_curves")
+
+def load_r0_curve(population_file, contact_matrix_file, infectious_period_lengths, overdispersion=0.4,
+                  transmission_probabilities=DEFAULT_TRANSMISSION_PROBABILITIES, curve_dir=None):
+    """
+    Get the R0Curve of a population and contact matrices, from disk if it was computed before,
+    otherwise by estimating R0 at every transmission probability of the grid and storing it.
+    """
+    if curve_dir is None:
+        curve_dir = get_curve_dir(population_file)
+    key = get_curve_key(population_file, contact_matrix_file, infectious_period_lengths, overdispersion,
+                        transmission_probabilities)
+    curve_file = os.path.join(curve_dir, key + ".npz")
+    if os.path.exists(curve_file):
+        with numpy.load(curve_file) as curve:
+            return R0Curve(curve["transmission_probabilities"], curve["r0s"])
+
+    r0_by_tp = estimate_transmission_probabilities(population_file, contact_matrix_file, infectious_period_lengths,
+                                                   transmission_probabilities, overdispersion=overdispersion)
+    tps = numpy.array(transmission_probabilities, dtype=numpy.float64)
+    r0s = numpy.array([r0_by_tp[tp] for tp in transmission_probabilities], dtype=numpy.float64)
+    # Write to a temporary file first so readers never see a half-written curve
+    os.makedirs(curve_dir, exist_ok=True)
+    tmp_file = curve_file + ".tmp.npz"
+    numpy.savez(tmp_file, transmission_probabilities=tps, r0s=r0s)
+    os.replace(tmp_file, curve_file)
+    return R0Curve(tps, r0s)
+
+def main(population_file, contact_matrix_file, infectious_period_lengths, overdispersion, tps, r0s):
+    curve = load_r0_curve(population_file, contact_matrix_file, infectious_period_lengths, overdispersion)
+    for tp in tps:
+        print("tp {}: R0 {}".format(tp, curve.get_r0(tp)))
+    for r0 in r0s:
+        print("R0 {}: tp {}".format(r0, curve.get_transmission_probability(r0)))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Look up R0 for transmission probabilities and vice versa, "
+                                                 "computing the R0 curve of a population only once")
+    parser.add_argument("population_file", type=str)
+    parser.add_argument("contact_matrix_file", type=str)
+    parser.add_argument("--infectious_period_lengths", type=int, nargs="+", default=[6,7,8,9])
+    parser.add_argument("--overdispersion", type=float, default=0.4)
+    parser.add_argument("--tp", type=float, nargs="+", default=[], help="Transmission probabilities to get R0 for")
+    parser.add_argument("--r0", type=float, nargs="+", default=[], help="R0 values to get transmission probabilities for")
+    args = parser.parse_args()
+    main(args.population_file, args.contact_matrix_file, args.infectious_period_lengths, args.overdispersion, args.tp,
+         args.r0)
@@ -0,0 +1,133 @@
+import functools
+import multiprocessing
+import numpy
+import os
+import sys
+
+from event_log import count_events_per_day, get_experiment_ids, get_log_file, resolve_log_file
+
+################################################################################
+# Scenario-level store of per-day metrics                                      #
+# Every metric of a scenario is kept on disk as an .npy array of shape        #
+# (number of experiments, num_days), with one row per exp_id in the order of  #
+# <scenario>_summary.csv (or (number of experiments,) + row_shape for metrics #
+# with more axes). Rows are filled one experiment at a time and the           #
+# arrays are opened as memory maps, so that neither building nor reading a    #
+# store needs more memory than a few rows or a slice of days. Each row keeps  #
+# the size and mtime of the log it was computed from and is recomputed once  #
+# these change.                                                               #
+################################################################################
+
+def get_store_dir(output_dir, scenario_name):
+    return os.path.join(output_dir, scenario_name, scenario_name + "_store")
+
+def get_metric_file(output_dir, scenario_name, metric_name):
+    return os.path.join(get_store_dir(output_dir, scenario_name), metric_name + ".npy")
+
+def get_new_cases_per_day(output_dir, scenario_name, experiment_id, num_days):
+    return count_events_per_day(get_log_file(output_dir, scenario_name, experiment_id), num_days)
+
+def _get_row(get_metric, output_dir, scenario_name, experiment_id, num_days, row_shape=None):
+    # get_metric may return a sequence or a dict keyed by day, or an array of row_shape
+    values = get_metric(output_dir, scenario_name, experiment_id, num_days)
+    if row_shape is not None:
+        return numpy.asarray(values, dtype=numpy.float64).reshape(row_shape)
+    return numpy.fromiter((values[day] for day in range(num_days)), dtype=numpy.float64, count=num_days)
+
+def _get_row_star(args):
+    return _get_row(*args)
+
+def get_log_stamp(output_dir, scenario_name, experiment_id):
+    """Size and mtime of an experiment's event log (or its compressed variant), (-1, -1) if there is none."""
+    log_file = resolve_log_file(get_log_file(output_dir, scenario_name, experiment_id))
+    if not os.path.exists(log_file):
+        return (-1, -1)
+    stat = os.stat(log_file)
+    return (stat.st_size, stat.st_mtime_ns)
+
+def get_metric_key(get_metric, version=None):
+    """
+    Identify get_metric (module and name, plus the arguments bound by functools.partial)
+    and version, so that rows stored by another metric function are not reused.
+    """
+    parts = []
+    while isinstance(get_metric, functools.partial):
+        parts.append(repr(get_metric.args) + repr(sorted(get_metric.keywords.items())))
+        get_metric = get_metric.func
+    module = get_metric.__module__
+    if module == "__main__":
+        # The same function whether the module is run as a script or imported
+        module = os.path.splitext(os.path.basename(sys.modules["__main__"].__file__))[0]
+    parts.insert(0, module + "." + get_metric.__qualname__)
+    parts.append(repr(version))
+    return "|".join(parts)
+
+def build_metric(output_dir, scenario_name, metric_name, get_metric, num_days, num_processes=4, row_shape=None,
+                 version=None):
+    """
+    Store get_metric(output_dir, scenario_name, exp_id, num_days) for all
+    experiments of the scenario. Rows that were filled before, for the same
+    experiments, number of days (or row_shape) and metric (see get_metric_key)
+    and from an event log that did not change since, are not computed again.
+    Bump version when get_metric changes in a way its name does not show.
+    """
+    store_dir = get_store_dir(output_dir, scenario_name)
+    os.makedirs(store_dir, exist_ok=True)
+    experiment_ids = numpy.array(get_experiment_ids(output_dir, scenario_name), dtype=numpy.int64)
+    metric_file = get_metric_file(output_dir, scenario_name, metric_name)
+    exp_ids_file = os.path.join(store_dir, metric_name + ".exp_ids.npy")
+    done_file = os.path.join(store_dir, metric_name + ".done.npy")
+    stamps_file = os.path.join(store_dir, metric_name + ".stamps.npy")
+    key_file = os.path.join(store_dir, metric_name + ".key.txt")
+    shape = (len(experiment_ids),) + (tuple(row_shape) if row_shape is not None else (num_days,))
+    key = get_metric_key(get_metric, version)
+
+    reuse = all(os.path.exists(f) for f in (metric_file, exp_ids_file, done_file, stamps_file, key_file))
+    if reuse:
+        with open(key_file) as f:
+            reuse = f.read() == key
+    if reuse:
+        metric = numpy.load(metric_file, mmap_mode="r+")
+        reuse = metric.shape == shape and numpy.array_equal(numpy.load(exp_ids_file), experiment_ids)
+    if not reuse:
+        metric = numpy.lib.format.open_memmap(metric_file, mode="w+", dtype=numpy.float64, shape=shape)
+        numpy.save(exp_ids_file, experiment_ids)
+        numpy.save(done_file, numpy.zeros(len(experiment_ids), dtype=numpy.bool_))
+        numpy.save(stamps_file, numpy.full((len(experiment_ids), 2), -1, dtype=numpy.int64))
+        with open(key_file, "w") as f:
+            f.write(key)
+    done = numpy.load(done_file, mmap_mode="r+")
+    stamps = numpy.load(stamps_file, mmap_mode="r+")
+
+    # Rows of logs that were rewritten (e.g. a rerun experiment) are computed again
+    log_stamps = numpy.array([get_log_stamp(output_dir, scenario_name, int(exp_id)) for exp_id in experiment_ids],
+                             dtype=numpy.int64).reshape(-1, 2)
+    todo = numpy.flatnonzero(~done | numpy.any(stamps != log_stamps, axis=1))
+    args = [(get_metric, output_dir, scenario_name, int(experiment_ids[i]), num_days, row_shape) for i in todo]
+    with multiprocessing.Pool(processes=num_processes) as pool:
+        # Rows arrive in order and go to disk immediately
+        for i, row in zip(todo, pool.imap(_get_row_star, args)):
+            metric[i] = row
+            stamps[i] = log_stamps[i]
+            done[i] = True
+    metric.flush()
+    stamps.flush()
+    done.flush()
+    return metric_file
+
+def open_metric(output_dir, scenario_name, metric_name):
+    """Get the stored metric as a read-only memory-mapped (experiments, days) (or (experiments,) + row_shape) array."""
+    return numpy.load(get_metric_file(output_dir, scenario_name, metric_name), mmap_mode="r")
+
+def get_experiment_ids_of_metric(output_dir, scenario_name, metric_name):
+    return numpy.load(os.path.join(get_store_dir(output_dir, scenario_name), metric_name + ".exp_ids.npy"))
+
+def iter_row_blocks(metric, block_size=1024):
+    """Yield (first row, block of rows) so that a metric can be processed a block of experiments at a time."""
+    for begin in range(0, metric.shape[0], block_size):
+        yield begin, numpy.asarray(metric[begin:begin + block_size])
+
+def iter_day_blocks(metric, block_size=16):
+    """Yield (first day, block of days for all experiments), for statistics across experiments per day."""
+    for begin in range(0, metric.shape[1], block_size):
+        yield begin, numpy.asarray(metric[:, begin:begin + block_size])
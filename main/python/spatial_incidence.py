@@ -0,0 +1,141 @@
+import argparse
+import csv
+import functools
+import numpy
+import os
+
+from curve_metrics import read_summary
+from event_log import get_log_file, load_columns
+from hotspots import get_district_data_file, get_household_data_file, read_columns
+from population_index import load_population_index
+from scenario_store import build_metric, iter_row_blocks, open_metric
+
+################################################################################
+# Spatial incidence                                                            #
+# Infections are located through person -> household (population file),      #
+# household -> district (<population>_household_data.csv) and district -> NIS #
+# code (<population>_district_data.csv), joined once into a lookup array of   #
+# district index per person. An experiment's incidence is then a single      #
+# bincount over its TRAN records into a (district, day) cube, stored per      #
+# scenario as an (experiments, districts, days) metric.                       #
+################################################################################
+
+class DistrictLookup:
+    def __init__(self, district_ids, nis_codes, district_by_person):
+        self.district_ids = district_ids
+        self.nis_codes = nis_codes
+        # Index into district_ids per person id, -1 if the person's household has no district
+        self.district_by_person = district_by_person
+
+def _build_lookup(population_file, population_dir, population_name):
+    district_ids, nis_codes = read_columns(get_district_data_file(population_dir, population_name), ["id", "city"])
+    order = numpy.argsort(district_ids)
+    district_ids = district_ids[order]
+    nis_codes = nis_codes[order]
+
+    hh_ids, hh_district_ids = read_columns(get_household_data_file(population_dir, population_name), ["hh_id", "district_id"])
+    household_ids = load_population_index(population_file).pool_ids["household"]
+    district_by_household = numpy.full(max(hh_ids.max(initial=0), household_ids.max(initial=0)) + 1, -1, dtype=numpy.int32)
+    district_indices = numpy.searchsorted(district_ids, hh_district_ids)
+    known = (district_indices < len(district_ids)) & (district_ids[numpy.minimum(district_indices, len(district_ids) - 1)] == hh_district_ids)
+    district_by_household[hh_ids[known]] = district_indices[known]
+    return DistrictLookup(district_ids, nis_codes, district_by_household[household_ids])
+
+_lookups = {}
+
+def get_district_lookup(population_file, population_dir, population_name):
+    """Get the DistrictLookup of a population, built once per process."""
+    key = (population_file, population_dir, population_name)
+    if key not in _lookups:
+        _lookups[key] = _build_lookup(population_file, population_dir, population_name)
+    return _lookups[key]
+
+def get_district_incidence(lookup, infected_ids, sim_days, num_days):
+    """Get the number of infections per (district index, day) as a (districts, num_days) array."""
+    districts = lookup.district_by_person[infected_ids]
+    selected = (districts >= 0) & (sim_days >= 0) & (sim_days < num_days)
+    cells = districts[selected].astype(numpy.int64) * num_days + sim_days[selected]
+    num_districts = len(lookup.district_ids)
+    return numpy.bincount(cells, minlength=num_districts * num_days).reshape(num_districts, num_days)
+
+def get_experiment_district_incidence(population_file, population_dir, population_name,
+                                      output_dir, scenario_name, experiment_id, num_days):
+    lookup = get_district_lookup(population_file, population_dir, population_name)
+    columns = load_columns(get_log_file(output_dir, scenario_name, experiment_id), "TRAN", ["infected_id", "sim_day"])
+    return get_district_incidence(lookup, columns["infected_id"], columns["sim_day"], num_days)
+
+def build_district_incidence(output_dir, scenario_name, population_file, population_dir, population_name,
+                             num_processes=4):
+    """
+    Store the (district, day) incidence of all experiments of a scenario as the metric
+    "district_incidence" and return it with the DistrictLookup.
+    """
+    summary = read_summary(output_dir, scenario_name)
+    num_days = max([int(row["num_days"]) for row in summary], default=0)
+    lookup = get_district_lookup(population_file, population_dir, population_name)
+    get_metric = functools.partial(get_experiment_district_incidence, population_file, population_dir, population_name)
+    build_metric(output_dir, scenario_name, "district_incidence", get_metric, num_days, num_processes,
+                 row_shape=(len(lookup.district_ids), num_days))
+    return open_metric(output_dir, scenario_name, "district_incidence"), lookup
+
+def get_ensemble_mean(cube):
+    """Mean of an (experiments, districts, days) cube over the experiments, a block of experiments at a time."""
+    total = numpy.zeros(cube.shape[1:])
+    for _, block in iter_row_blocks(cube, block_size=64):
+        total += block.sum(axis=0)
+    return total / max(cube.shape[0], 1)
+
+def read_hotspot_district_ids(hotspots_file):
+    """Get the ids of the districts in a compact (csv) hotspots file."""
+    if os.path.splitext(hotspots_file)[1].lower() != ".csv":
+        raise ValueError("{} is not a compact (.csv) hotspots file; write one with "
+                         "get_hh_ids_in_hotspots.py --format csv".format(hotspots_file))
+    district_ids, = read_columns(hotspots_file, ["district_id"], dtype=numpy.float64)
+    return numpy.unique(district_ids.astype(numpy.int64))
+
+def write_district_summary(output_file, lookup, mean_cube, hotspot_district_ids=None):
+    with open(output_file, "w", newline="") as csvfile:
+        fieldnames = ["district_id", "nis_code", "mean_cases", "peak_day_of_mean"]
+        if hotspot_district_ids is not None:
+            fieldnames.append("hotspot")
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        totals = mean_cube.sum(axis=1)
+        # Peak of the ensemble mean curve, not a mean of peak days
+        peak_days = mean_cube.argmax(axis=1)
+        for i, district_id in enumerate(lookup.district_ids.tolist()):
+            row = {"district_id": district_id, "nis_code": int(lookup.nis_codes[i]),
+                   "mean_cases": totals[i], "peak_day_of_mean": int(peak_days[i])}
+            if hotspot_district_ids is not None:
+                row["hotspot"] = int(district_id in hotspot_district_ids)
+            writer.writerow(row)
+
+def main(output_dir, scenario_name, population_file, population_dir, population_name, hotspots_file, num_processes):
+    cube, lookup = build_district_incidence(output_dir, scenario_name, population_file, population_dir, population_name,
+                                            num_processes)
+    mean_cube = get_ensemble_mean(cube)
+    hotspot_district_ids = None
+    if hotspots_file is not None:
+        hotspot_district_ids = set(read_hotspot_district_ids(hotspots_file).tolist())
+        in_hotspots = numpy.isin(lookup.district_ids, list(hotspot_district_ids))
+        total = mean_cube.sum()
+        print("Share of infections in hotspot districts: {}".format(mean_cube[in_hotspots].sum() / total if total > 0 else 0))
+    output_file = os.path.join(output_dir, scenario_name, scenario_name + "_incidence_by_district.csv")
+    write_district_summary(output_file, lookup, mean_cube, hotspot_district_ids)
+    print("Wrote {}".format(output_file))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Infections per district and day, per experiment and over the ensemble")
+    parser.add_argument("output_dir", type=str)
+    parser.add_argument("scenario_name", type=str)
+    parser.add_argument("population_file", type=str, help="Population the scenario was run with (pop_*.csv)")
+    parser.add_argument("--population_dir", type=str, default=".",
+                        help="Directory containing <population_name>_all with the household and district data")
+    parser.add_argument("--population_name", type=str, default="pop_belgium3000k_c500_teachers_censushh")
+    parser.add_argument("--hotspots_file", type=str, default=None,
+                        help="Compact hotspots file (.csv, see get_hh_ids_in_hotspots.py --format csv), "
+                             "to report the infections in hotspot districts")
+    parser.add_argument("--num_processes", type=int, default=4)
+    args = parser.parse_args()
+    main(args.output_dir, args.scenario_name, args.population_file, args.population_dir, args.population_name,
+         args.hotspots_file, args.num_processes)
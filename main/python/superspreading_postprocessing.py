@@ -190,10 +190,13 @@ import argparse
 import collections
 import csv
 import matplotlib.pyplot as plt
-import multiprocessing
 import numpy as np
 import os
-import statistics
+
+from event_log import get_log_file, read_events
+from figures import add_figure_arguments, draw_figures, select_figures
+from scenario_store import build_metric, iter_day_blocks, iter_row_blocks, open_metric
+from spatial_incidence import build_district_incidence, get_ensemble_mean, read_hotspot_district_ids
 
 def get_experiment_ids(output_dir, scenario_name):
     experiment_ids = []
@@ -206,56 +209,16 @@ def get_experiment_ids(output_dir, scenario_name):
     return experiment_ids
 
 def get_secondary_cases_by_individual(output_dir, scenario_name, experiment_id, num_days):
-    log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), "event_log.txt")
-    potential_infectors = {}
-    with open(log_file) as f:
-        for line in f:
-            line = line.split(" ")
-            tag = line[0]
-            sim_day = int(line[6])
-            if sim_day < num_days:
-                if tag == "[PRIM]":
-                    infected_id = int(float(line[1]))
-                    if infected_id not in potential_infectors:
-                        potential_infectors[infected_id] = 0
-                elif tag == "[TRAN]":
-                    infector_id = int(float(line[2]))
-                    infected_id = int(float(line[1]))
-                    # Add infected to potential infectors
-                    if infected_id not in potential_infectors:
-                        potential_infectors[infected_id] = 0
-                    # Add infector to infectors (if not yet done)
-                    # And add this infection to total secondary cases count
-                    if infector_id not in potential_infectors:
-                        potential_infectors[infector_id] = 1
-                    else:
-                        potential_infectors[infector_id] += 1
-    return potential_infectors
-
-def get_effective_r_per_day(output_dir, scenario_name, experiment_id, num_days):
-    infected_by_day = {}
+    log_file = get_log_file(output_dir, scenario_name, experiment_id)
     potential_infectors = {}
-
-    for day in range(num_days):
-        infected_by_day[day] = []
-
-    log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), "event_log.txt")
-    with open(log_file) as f:
-        for line in f:
-            line = line.split(" ")
-            tag = line[0]
-            if tag == "[PRIM]":
-                infected_id = int(float(line[1]))
-                sim_day = int(line[6])
-                infected_by_day[sim_day].append(infected_id)
+    for event in read_events(log_file, ["PRIM", "TRAN"], ["infected_id", "infector_id", "sim_day"]):
+        if event.sim_day < num_days:
+            infected_id = event.infected_id
+            if event.tag == "PRIM":
                 if infected_id not in potential_infectors:
                     potential_infectors[infected_id] = 0
-            elif tag == "[TRAN]":
-                infected_id = int(float(line[1]))
-                sim_day = int(line[6])
-                infected_by_day[sim_day].append(infected_id)
-
-                infector_id = int(float(line[2]))
+            else:
+                infector_id = event.infector_id
                 # Add infected to potential infectors
                 if infected_id not in potential_infectors:
                     potential_infectors[infected_id] = 0
@@ -265,6 +228,33 @@ def get_effective_r_per_day(output_dir, scenario_name, experiment_id, num_days):
                     potential_infectors[infector_id] = 1
                 else:
                     potential_infectors[infector_id] += 1
+    return potential_infectors
+
+def get_effective_r_per_day(output_dir, scenario_name, experiment_id, num_days):
+    infected_by_day = {}
+    potential_infectors = {}
+
+    for day in range(num_days):
+        infected_by_day[day] = []
+
+    log_file = get_log_file(output_dir, scenario_name, experiment_id)
+    for event in read_events(log_file, ["PRIM", "TRAN"], ["infected_id", "infector_id", "sim_day"]):
+        infected_id = event.infected_id
+        infected_by_day[event.sim_day].append(infected_id)
+        if event.tag == "PRIM":
+            if infected_id not in potential_infectors:
+                potential_infectors[infected_id] = 0
+        else:
+            infector_id = event.infector_id
+            # Add infected to potential infectors
+            if infected_id not in potential_infectors:
+                potential_infectors[infected_id] = 0
+            # Add infector to infectors (if not yet done)
+            # And add this infection to total secondary cases count
+            if infector_id not in potential_infectors:
+                potential_infectors[infector_id] = 1
+            else:
+                potential_infectors[infector_id] += 1
 
     rt_by_day = {}
     for day in infected_by_day:
@@ -340,7 +330,43 @@ def plot_extinction_probabilities(all_total_cases, scenario_display_names, extin
     plt.tight_layout()
     plt.show()
 
-def main(output_dir, scenario_names, scenario_display_names):
+def plot_effective_r(num_days, mean_effective_rs, lower_effective_rs, upper_effective_rs):
+    plt.fill_between(range(num_days), lower_effective_rs, upper_effective_rs, color="lightgrey")
+    plt.plot(range(num_days), mean_effective_rs)
+    plt.plot(range(num_days), [1] * num_days)
+    plt.xlabel("Simulation day")
+    plt.ylabel("Rt")
+    plt.ylim(0, 30)
+
+def plot_hotspot_incidence(num_days, mean_cases_in_hotspots, mean_cases_elsewhere):
+    plt.plot(range(num_days), mean_cases_in_hotspots, label="Hotspot districts")
+    plt.plot(range(num_days), mean_cases_elsewhere, label="Other districts")
+    plt.xlabel("Simulation day")
+    plt.ylabel("Mean new cases")
+    plt.legend()
+
+def plot_district_incidence(mean_cases_by_district, nis_codes, num_districts=30):
+    # Districts with the most cases on top
+    top = np.argsort(mean_cases_by_district.sum(axis=1))[::-1][:num_districts]
+    plt.imshow(mean_cases_by_district[top], aspect="auto", interpolation="nearest", cmap="viridis")
+    plt.yticks(range(len(top)), nis_codes[top])
+    plt.xlabel("Simulation day")
+    plt.ylabel("NIS code")
+    plt.colorbar(label="Mean new cases")
+
+def get_spatial_figures(output_dir, scenario, population_file, population_dir, population_name, hotspots_file):
+    cube, lookup = build_district_incidence(output_dir, scenario, population_file, population_dir, population_name)
+    mean_cube = get_ensemble_mean(cube)
+    figures = [("district_incidence_" + scenario, plot_district_incidence, (mean_cube, lookup.nis_codes))]
+    if hotspots_file is not None:
+        in_hotspots = np.isin(lookup.district_ids, read_hotspot_district_ids(hotspots_file))
+        figures.append(("hotspot_incidence_" + scenario, plot_hotspot_incidence,
+                        (mean_cube.shape[1], mean_cube[in_hotspots].sum(axis=0), mean_cube[~in_hotspots].sum(axis=0))))
+    return figures
+
+def get_figures(output_dir, scenario_names, scenario_display_names, population_file=None, population_dir=".",
+                population_name=None, hotspots_file=None):
+    figures = []
     extinction_threshold = 20
     num_days = 120
 
@@ -352,52 +378,48 @@ def main(output_dir, scenario_names, scenario_display_names):
     all_total_cases = []
     for scenario in scenario_names:
         print(scenario)
-        experiment_ids = get_experiment_ids(output_dir, scenario)
-        with multiprocessing.Pool(processes=4) as pool:
-            #secondary_cases = pool.starmap(get_secondary_cases_by_individual,
-            #                                [(output_dir, scenario, exp_id, num_days) for exp_id in experiment_ids])
-            effective_r_by_day = pool.starmap(get_effective_r_per_day,
-                                            [(output_dir, scenario, exp_id, num_days) for exp_id in experiment_ids])
-            '''for run in effective_r_by_day:
-                if (sum(run.values())) > extinction_threshold:
-                    plt.plot(range(num_days), [run[day] for day in range(num_days)])
-                else:
-                    print(sum(run.values()))'''
-            effective_r_by_day_no_extinction = [run for run in effective_r_by_day if sum(run.values()) > extinction_threshold]
-
-            mean_effective_rs = []
-            median_effetive_rs = []
-            lower_effective_rs = []
-            upper_effective_rs = []
-            for day in range(num_days):
-                all_effective_rs_on_day = [run[day] for run in effective_r_by_day_no_extinction]
-                mean = sum(all_effective_rs_on_day) / len(all_effective_rs_on_day)
-                mean_effective_rs.append(mean)
-                median = statistics.median(all_effective_rs_on_day)
-                median_effetive_rs.append(median)
-                ll = np.percentile(all_effective_rs_on_day, 2.5)
-                lower_effective_rs.append(ll)
-                hh = np.percentile(all_effective_rs_on_day, 97.5)
-                upper_effective_rs.append(hh)
-            plt.fill_between(range(num_days), lower_effective_rs, upper_effective_rs, color="lightgrey")
-            plt.plot(range(num_days), mean_effective_rs)
-            plt.plot(range(num_days), [1] * num_days)
-            plt.xlabel("Simulation day")
-            plt.ylabel("Rt")
-            plt.ylim(0, 30)
-            plt.show()
-
-            #total_cases = [sum(x.values()) for x in secondary_cases]
-            #all_total_cases.append(total_cases)
-
-            #total_cases.sort(reverse=True)
-            #print(total_cases)
-
-            #all_p80s.append(get_p80(secondary_cases, extinction_threshold=extinction_threshold))
-            #plot_secondary_cases_frequency(scenario, secondary_cases, extinction_threshold=1)
+        build_metric(output_dir, scenario, "effective_r", get_effective_r_per_day, num_days)
+        effective_r_by_day = open_metric(output_dir, scenario, "effective_r")
+        #secondary_cases = pool.starmap(get_secondary_cases_by_individual,
+        #                                [(output_dir, scenario, exp_id, num_days) for exp_id in experiment_ids])
+        no_extinction = np.zeros(effective_r_by_day.shape[0], dtype=bool)
+        for begin, runs in iter_row_blocks(effective_r_by_day):
+            no_extinction[begin:begin + len(runs)] = runs.sum(axis=1) > extinction_threshold
+
+        mean_effective_rs = []
+        median_effetive_rs = []
+        lower_effective_rs = []
+        upper_effective_rs = []
+        for _, days in iter_day_blocks(effective_r_by_day):
+            days = days[no_extinction]
+            mean_effective_rs.extend(days.mean(axis=0))
+            median_effetive_rs.extend(np.median(days, axis=0))
+            lower_effective_rs.extend(np.percentile(days, 2.5, axis=0))
+            upper_effective_rs.extend(np.percentile(days, 97.5, axis=0))
+        figures.append(("effective_r_" + scenario, plot_effective_r,
+                        (num_days, mean_effective_rs, lower_effective_rs, upper_effective_rs)))
+        if population_file is not None:
+            figures.extend(get_spatial_figures(output_dir, scenario, population_file, population_dir, population_name,
+                                               hotspots_file))
+
+        #total_cases = [sum(x.values()) for x in secondary_cases]
+        #all_total_cases.append(total_cases)
+
+        #total_cases.sort(reverse=True)
+        #print(total_cases)
+
+        #all_p80s.append(get_p80(secondary_cases, extinction_threshold=extinction_threshold))
+        #plot_secondary_cases_frequency(scenario, secondary_cases, extinction_threshold=1)
 
     #plot_extinction_probabilities(all_total_cases, scenario_display_names, extinction_threshold)
     #plot_p80(all_p80s, scenario_display_names)
+    return figures
+
+def main(output_dir, scenario_names, scenario_display_names, figure_dir=None, formats=("png",), figure_names=None,
+         num_figure_processes=4, population_file=None, population_dir=".", population_name=None, hotspots_file=None):
+    figures = select_figures(get_figures(output_dir, scenario_names, scenario_display_names, population_file,
+                                         population_dir, population_name, hotspots_file), figure_names)
+    draw_figures(figures, figure_dir, formats, num_figure_processes)
 
 
 
@@ -415,5 +437,15 @@ if __name__=="__main__":
     parser.add_argument("output_dir", type=str)
     parser.add_argument("scenario_names", type=str, nargs="+")
     parser.add_argument("--scenario_display_names", type=str, nargs="+", default=None)
+    parser.add_argument("--population_file", type=str, default=None,
+                        help="Population the scenarios were run with, to plot infections per district")
+    parser.add_argument("--population_dir", type=str, default=".")
+    parser.add_argument("--population_name", type=str, default="pop_belgium3000k_c500_teachers_censushh")
+    parser.add_argument("--hotspots_file", type=str, default=None,
+                        help="Compact hotspots file (.csv only, see get_hh_ids_in_hotspots.py --format csv), "
+                             "to compare infections in and outside hotspot districts")
+    add_figure_arguments(parser)
     args = parser.parse_args()
-    main(args.output_dir, args.scenario_names, args.scenario_display_names)
+    main(args.output_dir, args.scenario_names, args.scenario_display_names, args.figure_dir, args.formats,
+         args.figures, args.num_figure_processes, args.population_file, args.population_dir, args.population_name,
+         args.hotspots_file)
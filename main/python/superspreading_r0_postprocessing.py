@@ -2,11 +2,16 @@ import argparse
 import csv
 import matplotlib.pyplot as plt
 import multiprocessing
+import numpy
 import os
 
 from collections import Counter
 
+from convergence import ConvergenceMonitor, get_running_mean
 from estimate_transmission_probability import estimate_transmission_probabilities
+from event_log import EventReducer, get_log_file, reduce_events
+from figures import add_figure_arguments, draw_figures, select_figures
+from population_index import POOL_TYPES, load_population_index
 
 def get_trans_prob_by_exp(output_dir, scenario_name):
     experiments = {}
@@ -20,69 +25,196 @@ def get_trans_prob_by_exp(output_dir, scenario_name):
 
     return experiments
 
-def get_secondary_cases_per_index_case(output_dir, scenario_name, experiment_id):
-    secondary_cases = {}
-
-    transmissions_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), "event_log.txt")
-    with open(transmissions_file) as f:
-        for line in f:
-            line = line.split(" ")
-            tag = line[0]
-            if tag == "[PRIM]":
-                index_case_id = int(float(line[1]))
-                secondary_cases[index_case_id] = 0
-            elif tag == "[TRAN]":
-                infector_id = int(float(line[2]))
-                if infector_id in secondary_cases:
-                    secondary_cases[infector_id] += 1
-                else:
-                    secondary_cases[infector_id] = 1
-    if len(secondary_cases) > 1:
-        print("WARNING: more than 1 index case")
-    secondary_cases_per_index_case = sum(secondary_cases.values()) / len(secondary_cases)
+class SecondaryCasesPerIndexCase(EventReducer):
+    tags = ("PRIM", "TRAN")
+    fields = {"PRIM": ["infected_id"], "TRAN": ["infector_id"]}
 
-    return (experiment_id, secondary_cases_per_index_case)
+    def __init__(self, index_cases_only=False):
+        # By default the mean is taken over all infectors in the log
+        self.index_cases_only = index_cases_only
+        self.secondary_cases = {}
+        self.index_case_ids = []
 
-def get_index_case_ids(output_dir, scenario_name, experiment_id):
-    index_case_ids = []
+    def add(self, event):
+        if event.tag == "PRIM":
+            self.secondary_cases[event.infected_id] = 0
+            self.index_case_ids.append(event.infected_id)
+        else:
+            infector_id = event.infector_id
+            if infector_id in self.secondary_cases:
+                self.secondary_cases[infector_id] += 1
+            else:
+                self.secondary_cases[infector_id] = 1
+
+    def result(self):
+        if self.index_cases_only:
+            return sum(self.secondary_cases[i] for i in self.index_case_ids) / len(self.index_case_ids)
+        if len(self.secondary_cases) > 1:
+            print("WARNING: more than 1 index case")
+        return sum(self.secondary_cases.values()) / len(self.secondary_cases)
+
+class IndexCaseIds(EventReducer):
+    tags = ("PRIM",)
+    fields = ["infected_id"]
+
+    def __init__(self):
+        self.index_case_ids = []
+
+    def add(self, event):
+        self.index_case_ids.append(event.infected_id)
+
+    def result(self):
+        return self.index_case_ids
+
+class IndividualTransmissionProbabilities(EventReducer):
+    tags = ("PRIM",)
+    fields = ["infected_id", "relative_infectiousness"]
+
+    def __init__(self):
+        self.tps = {}
+
+    def add(self, event):
+        self.tps[event.infected_id] = event.relative_infectiousness
+
+    def result(self):
+        return self.tps
 
-    transmissions_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), "event_log.txt")
-    with open(transmissions_file) as f:
-        for line in f:
-            line = line.split(" ")
-            tag = line[0]
-            if tag == "[PRIM]":
-                index_case_id = int(float(line[1]))
-                index_case_ids.append(index_case_id)
+class OffspringByIndexCase(EventReducer):
+    # Per index case: the number of persons it infected itself
+    tags = ("PRIM", "TRAN")
+    fields = {"PRIM": ["infected_id"], "TRAN": ["infector_id"]}
 
+    def __init__(self):
+        self.secondary_cases = {}
+
+    def add(self, event):
+        if event.tag == "PRIM":
+            self.secondary_cases[event.infected_id] = 0
+        elif event.infector_id in self.secondary_cases:
+            self.secondary_cases[event.infector_id] += 1
+
+    def result(self):
+        return self.secondary_cases
+
+_populations = {}
+
+def get_population(population_file):
+    # Loaded once per process
+    if population_file not in _populations:
+        _populations[population_file] = load_population_index(population_file)
+    return _populations[population_file]
+
+def get_overlapping_index_cases(population_file, index_case_ids):
+    """
+    Get the index cases that share a contact pool with another index case. Their
+    offspring are not independent, as they compete for the same susceptibles.
+    Index case ids are person ids, i.e. rows of the population file (see population_index).
+    """
+    population = get_population(population_file)
+    index_case_ids = numpy.unique(numpy.asarray(list(index_case_ids), dtype=numpy.int64))
+    overlapping = numpy.zeros(len(index_case_ids), dtype=bool)
+    for pool_type in POOL_TYPES:
+        pool_ids = population.pool_ids[pool_type][index_case_ids]
+        # Pool id 0 means the person does not belong to a pool of this type
+        _, inverse, counts = numpy.unique(pool_ids, return_inverse=True, return_counts=True)
+        overlapping |= (pool_ids != 0) & (counts[inverse] > 1)
+    return set(index_case_ids[overlapping].tolist())
+
+def get_secondary_cases_per_index_case(output_dir, scenario_name, experiment_id, infectious_window=False):
+    # With infectious_window, only the secondary cases of the index cases are counted,
+    # reading the log up to the end of their infectious period
+    transmissions_file = get_log_file(output_dir, scenario_name, experiment_id)
+    secondary_cases_per_index_case, = reduce_events(transmissions_file,
+        [SecondaryCasesPerIndexCase(infectious_window)], infectious_window)
+    return (experiment_id, secondary_cases_per_index_case)
+
+def get_index_case_ids(output_dir, scenario_name, experiment_id):
+    transmissions_file = get_log_file(output_dir, scenario_name, experiment_id)
+    index_case_ids, = reduce_events(transmissions_file, [IndexCaseIds()])
     return (experiment_id, index_case_ids)
 
 def get_individual_transmission_probabilities(output_dir, scenario_name, experiment_id):
-    tps = {}
-    log_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(experiment_id), "event_log.txt")
-    with open(log_file) as f:
-        for line in f:
-            line = line.split(' ')
-            tag = line[0]
-            if tag == "[PRIM]":
-                index_case_id = int(float(line[1]))
-                tp = float(line[13])
-                tps[index_case_id] = tp
+    log_file = get_log_file(output_dir, scenario_name, experiment_id)
+    tps, = reduce_events(log_file, [IndividualTransmissionProbabilities()])
     return tps
 
-def main(output_dir, scenario_names):
+def get_experiment_results(output_dir, scenario_name, experiment_id, infectious_window=False,
+                           per_index_case=False, population_file=None):
+    """
+    Get the secondary cases, index case ids and individual transmission probabilities of an
+    experiment from a single read of its log. The secondary cases are a list of
+    (experiment_id, secondary cases) samples: by default one, the mean over the experiment;
+    with per_index_case one per index case, leaving out index cases that share a contact pool
+    with another one (if population_file is given).
+    """
+    log_file = get_log_file(output_dir, scenario_name, experiment_id)
+    secondary_cases_reducer = OffspringByIndexCase() if per_index_case else SecondaryCasesPerIndexCase(infectious_window)
+    secondary_cases, index_case_ids, tps = reduce_events(log_file,
+        [secondary_cases_reducer, IndexCaseIds(), IndividualTransmissionProbabilities()],
+        infectious_window)
+    if per_index_case:
+        overlapping = set()
+        if population_file is not None:
+            overlapping = get_overlapping_index_cases(population_file, index_case_ids)
+        secondary_cases = [(experiment_id, secondary_cases[i]) for i in index_case_ids if i not in overlapping]
+    else:
+        secondary_cases = [(experiment_id, secondary_cases)]
+    return (secondary_cases, (experiment_id, index_case_ids), tps)
+
+def plot_mean_secondary_cases_convergence(scenario, secondary_cases_by_tp, tps):
+    for tp in tps:
+        # Mean over the last i + 1 simulations, with its 95% confidence interval
+        means, half_widths = get_running_mean(secondary_cases_by_tp[tp][::-1])
+        line, = plt.plot(range(len(means)), means, label=tp)
+        half_widths[numpy.isinf(half_widths)] = numpy.nan
+        plt.fill_between(range(len(means)), means - half_widths, means + half_widths,
+                         color=line.get_color(), alpha=0.2, linewidth=0)
+    plt.legend()
+    plt.xlabel("Number of simulations")
+    plt.xlim(0, 1000)
+    plt.ylabel("Mean # of secondary cases of index case")
+    plt.title(scenario)
+
+def get_convergence_monitor(secondary_cases_by_tp, max_ci_half_width, min_count=10):
+    monitor = ConvergenceMonitor(max_ci_half_width, min_count)
+    for tp, cases in secondary_cases_by_tp.items():
+        for c in cases:
+            monitor.add(tp, c)
+    return monitor
+
+def print_convergence(scenario, monitor, tps):
+    print(scenario)
+    print("tp\tcount\tmean\tci_half_width\tconverged")
+    for tp in tps:
+        summary = monitor.get_summary(tp)
+        print("{}\t{}\t{:.4f}\t{:.4f}\t{}".format(tp, summary["count"], summary["mean"], summary["ci_half_width"],
+                                                 summary["converged"]))
+
+def plot_mean_secondary_cases_by_tp(scenario_names, all_tps, all_means_no_extinction):
+    for i in range(len(all_means_no_extinction)):
+        plt.plot(all_tps[i], all_means_no_extinction[i])
+
+    #plt.plot(all_tps[i], theoretical)
+    plt.xlabel("Transmission probability")
+    plt.xticks(all_tps[0])
+    plt.ylabel("Mean # of secondary cases per index case")
+    plt.legend(scenario_names)
+    plt.title("Without extinction cases")
+
+def get_figures(output_dir, scenario_names, infectious_window=False, per_index_case=False, population_file=None,
+                max_ci_half_width=None):
+    figures = []
     all_means = []
     all_means_no_extinction = []
     all_tps = []
     for scenario in scenario_names:
         experiments = get_trans_prob_by_exp(output_dir, scenario)
         with multiprocessing.Pool(processes=4) as pool:
-            secondary_cases = pool.starmap(get_secondary_cases_per_index_case,
-                                        [(output_dir, scenario, exp_id) for exp_id in experiments.keys()])
-            index_case_ids = pool.starmap(get_index_case_ids,
-                                        [(output_dir, scenario, exp_id) for exp_id in experiments.keys()])
-            individual_transmission_probabilities = pool.starmap(get_individual_transmission_probabilities,
-                                        [(output_dir, scenario, exp_id) for exp_id in experiments.keys()])
+            results = pool.starmap(get_experiment_results,
+                                        [(output_dir, scenario, exp_id, infectious_window, per_index_case, population_file)
+                                         for exp_id in experiments.keys()])
+            secondary_cases, index_case_ids, individual_transmission_probabilities = zip(*results)
+            secondary_cases = [sample for samples in secondary_cases for sample in samples]
 
 
             # Group by transmission_probability
@@ -97,6 +229,9 @@ def main(output_dir, scenario_names):
             tps.sort()
             all_tps.append(tps)
 
+            if max_ci_half_width is not None:
+                print_convergence(scenario, get_convergence_monitor(secondary_cases_by_tp, max_ci_half_width), tps)
+
 
             '''population_file = os.path.join(output_dir, "..", "data", "pop_belgium3000k_c500_teachers_censushh.csv")
             contact_matrix_file = os.path.join(output_dir, "..", "data", "contact_matrix_flanders_conditional_teachers.xml")
@@ -124,20 +259,8 @@ def main(output_dir, scenario_names):
             means = [sum(secondary_cases_by_tp[tp]) / len(secondary_cases_by_tp[tp]) for tp in tps]
             all_means.append(means)
 
-            for tp in tps:
-                sc = secondary_cases_by_tp[tp]
-                ms = []
-                for i in range(len(sc)):
-                    sc_selection = sc[len(sc) - 1 - i:]
-                    m = sum(sc_selection) / len(sc_selection)
-                    ms.append(m)
-                plt.plot(range(len(sc)), ms)
-            plt.legend(tps)
-            plt.xlabel("Number of simulations")
-            plt.xlim(0, 1000)
-            plt.ylabel("Mean # of secondary cases of index case")
-            plt.title(scenario)
-            plt.show()
+            figures.append(("mean_secondary_cases_convergence_" + scenario, plot_mean_secondary_cases_convergence,
+                            (scenario, secondary_cases_by_tp, tps)))
 
             #plt.boxplot([secondary_cases_by_tp[tp] for tp in tps], labels=tps)
             ''''plt.violinplot([secondary_cases_by_tp[tp] for tp in tps], showmeans=True)
@@ -148,22 +271,31 @@ def main(output_dir, scenario_names):
             plt.title(scenario)
             plt.show()'''
 
-    for i in range(len(all_means)):
-        plt.plot(all_tps[i], all_means_no_extinction[i])
-
-    #plt.plot(all_tps[i], theoretical)
-    plt.xlabel("Transmission probability")
-    plt.xticks(all_tps[0])
-    plt.ylabel("Mean # of secondary cases per index case")
-    plt.legend(scenario_names)
-    plt.title("Without extinction cases")
-    plt.show()
+    figures.append(("mean_secondary_cases_by_tp", plot_mean_secondary_cases_by_tp,
+                    (scenario_names, all_tps, all_means_no_extinction)))
+    return figures
 
+def main(output_dir, scenario_names, infectious_window=False, per_index_case=False, population_file=None,
+         max_ci_half_width=None, figure_dir=None, formats=("png",), figure_names=None, num_figure_processes=4):
+    figures = get_figures(output_dir, scenario_names, infectious_window, per_index_case, population_file,
+                          max_ci_half_width)
+    figures = select_figures(figures, figure_names)
+    draw_figures(figures, figure_dir, formats, num_figure_processes)
 
 if __name__=="__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("output_dir", type=str)
     parser.add_argument("scenario_names", type=str, nargs="+")
-
+    parser.add_argument("--infectious_window", action="store_true",
+                        help="Only count secondary cases of index cases, reading the logs up to the end of their infectious period")
+    parser.add_argument("--per_index_case", action="store_true",
+                        help="Take one sample of secondary cases per index case, for experiments with many index cases")
+    parser.add_argument("--population_file", type=str, default=None,
+                        help="Population used in the experiments, to leave out index cases that share a contact pool")
+    parser.add_argument("--max_ci_half_width", type=float, default=None,
+                        help="Report per transmission probability whether the 95%% confidence interval of the mean "
+                             "secondary cases is narrower than twice this half-width")
+    add_figure_arguments(parser)
     args = parser.parse_args()
-    main(args.output_dir, args.scenario_names)
+    main(args.output_dir, args.scenario_names, args.infectious_window, args.per_index_case, args.population_file,
+         args.max_ci_half_width, args.figure_dir, args.formats, args.figures, args.num_figure_processes)
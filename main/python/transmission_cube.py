@@ -0,0 +1,194 @@
+import argparse
+import multiprocessing
+import numpy
+import os
+
+from curve_metrics import read_summary
+from event_log import (POOL_TYPES, EventReducer, get_binary_log_file, get_experiment_ids, get_log_file, load_columns,
+                       open_binary_log)
+
+################################################################################
+# Who infects whom, where                                                      #
+# The [TRAN] events of an experiment counted into a dense array of shape      #
+# (infected age, infector age band, pool type, sim day), with one bincount    #
+# over the parsed columns. Ensembles are summed experiment by experiment, so  #
+# memory stays at a few cubes regardless of the number of runs.               #
+################################################################################
+
+AXES = ("infected_age", "infector_age_band", "pool_type", "sim_day")
+
+DEFAULT_AGE_BANDS = (0, 10, 20, 30, 40, 50, 60, 70, 80)
+
+TRAN_FIELDS = ["infected_age", "infector_age", "pool_type", "sim_day"]
+
+class TransmissionCube:
+    """
+    Counts of transmissions, summed over num_experiments experiments. Age band i
+    holds the infector ages from age_bands[i] up to age_bands[i + 1] (the last band
+    is open-ended); infected ages of max_age - 1 and over share the last row.
+    """
+
+    def __init__(self, counts, age_bands=DEFAULT_AGE_BANDS, num_experiments=1):
+        self.counts = counts
+        self.age_bands = tuple(age_bands)
+        self.num_experiments = num_experiments
+
+    @property
+    def num_days(self):
+        return self.counts.shape[3]
+
+    def __iadd__(self, other):
+        if self.counts.shape != other.counts.shape or self.age_bands != other.age_bands:
+            raise ValueError("Cannot add transmission cubes of shape {} and {}".format(self.counts.shape,
+                                                                                    other.counts.shape))
+        self.counts += other.counts
+        self.num_experiments += other.num_experiments
+        return self
+
+    def get_mean(self):
+        """Mean counts per experiment."""
+        return self.counts / max(self.num_experiments, 1)
+
+    def select(self, pool_types=None, days=None):
+        """
+        Get a TransmissionCube restricted to the given pool types (names, e.g. "Household")
+        and days (a slice or a sequence of days), keeping all axes.
+        """
+        counts = self.counts
+        if pool_types is not None:
+            counts = counts[:, :, [POOL_TYPES.index(pool_type) for pool_type in pool_types], :]
+        if days is not None:
+            counts = counts[:, :, :, days]
+        return TransmissionCube(counts, self.age_bands, self.num_experiments)
+
+    def get_marginal(self, axes, mean=True):
+        """Sum out all axes (names from AXES) except the given ones, which are kept in the order of AXES."""
+        summed = tuple(i for i, axis in enumerate(AXES) if axis not in axes)
+        counts = self.get_mean() if mean else self.counts
+        return counts.sum(axis=summed)
+
+    def get_cases_per_day(self, mean=True):
+        return self.get_marginal(["sim_day"], mean)
+
+    def get_cases_by_pool_type(self, mean=True):
+        """Dict of pool type name to cases per day."""
+        by_pool_type = self.get_marginal(["pool_type", "sim_day"], mean)
+        return {pool_type: by_pool_type[i] for i, pool_type in enumerate(POOL_TYPES)}
+
+    def get_who_infects_whom(self, infected_age_bands=None, mean=True):
+        """
+        Get the (infected age, infector age band) matrix of cases. With infected_age_bands,
+        infected ages are grouped into the same kind of bands as the infectors.
+        """
+        matrix = self.get_marginal(["infected_age", "infector_age_band"], mean)
+        if infected_age_bands is None:
+            return matrix
+        return numpy.add.reduceat(matrix, list(infected_age_bands), axis=0)
+
+def get_pool_type_codes(pool_types):
+    """Get the index in POOL_TYPES of each pool type name."""
+    names, inverse = numpy.unique(pool_types, return_inverse=True)
+    return numpy.array([POOL_TYPES.index(name) for name in names], dtype=numpy.int64)[inverse]
+
+def get_transmission_cube(infected_ages, infector_ages, pool_types, sim_days, num_days,
+                          age_bands=DEFAULT_AGE_BANDS, max_age=111):
+    """
+    Count transmissions into a TransmissionCube. pool_types are names (as in text logs)
+    or indices in POOL_TYPES (as in binary logs). Events on or after num_days are left out.
+    """
+    infected_ages = numpy.minimum(numpy.asarray(infected_ages).astype(numpy.int64), max_age - 1)
+    bands = numpy.searchsorted(numpy.array(age_bands), numpy.asarray(infector_ages), side="right") - 1
+    pool_types = numpy.asarray(pool_types)
+    if pool_types.dtype.kind in "US":
+        pool_types = get_pool_type_codes(pool_types)
+    sim_days = numpy.asarray(sim_days).astype(numpy.int64)
+
+    shape = (max_age, len(age_bands), len(POOL_TYPES), num_days)
+    selected = (sim_days < num_days) & (bands >= 0)
+    cells = numpy.ravel_multi_index((infected_ages[selected], bands[selected],
+                                     pool_types[selected].astype(numpy.int64), sim_days[selected]), shape)
+    counts = numpy.bincount(cells, minlength=numpy.prod(shape)).reshape(shape)
+    return TransmissionCube(counts, age_bands)
+
+class TransmissionCubeReducer(EventReducer):
+    """TransmissionCube of a log, for sharing a pass over the log with other reducers (see reduce_events)."""
+    tags = ("TRAN",)
+    fields = TRAN_FIELDS
+
+    def __init__(self, num_days, age_bands=DEFAULT_AGE_BANDS, max_age=111):
+        self.num_days = num_days
+        self.age_bands = age_bands
+        self.max_age = max_age
+        self.columns = {name: [] for name in TRAN_FIELDS}
+
+    def add(self, event):
+        for name in TRAN_FIELDS:
+            self.columns[name].append(getattr(event, name))
+
+    def result(self):
+        return get_transmission_cube(*(self.columns[name] for name in TRAN_FIELDS), self.num_days,
+                                     self.age_bands, self.max_age)
+
+def get_experiment_transmission_cube(output_dir, scenario_name, experiment_id, num_days,
+                                     age_bands=DEFAULT_AGE_BANDS, max_age=111):
+    """TransmissionCube of one experiment, from its binary [TRAN] log if there is one, else from its event log."""
+    log_file = get_log_file(output_dir, scenario_name, experiment_id)
+    if os.path.exists(get_binary_log_file(log_file, "TRAN")):
+        columns = open_binary_log(log_file, "TRAN")
+    else:
+        columns = load_columns(log_file, "TRAN", TRAN_FIELDS)
+    return get_transmission_cube(*(columns[name] for name in TRAN_FIELDS), num_days, age_bands, max_age)
+
+def get_ensemble_transmission_cube(output_dir, scenario_name, num_days=None, age_bands=DEFAULT_AGE_BANDS,
+                                   max_age=111, num_processes=4):
+    """
+    Sum of the TransmissionCubes of all experiments of a scenario. num_days defaults to
+    the longest run in the scenario summary.
+    """
+    if num_days is None:
+        num_days = max([int(row["num_days"]) for row in read_summary(output_dir, scenario_name)], default=0)
+    ensemble = TransmissionCube(numpy.zeros((max_age, len(age_bands), len(POOL_TYPES), num_days), dtype=numpy.int64),
+                                age_bands, num_experiments=0)
+    args = [(output_dir, scenario_name, exp_id, num_days, age_bands, max_age)
+            for exp_id in get_experiment_ids(output_dir, scenario_name)]
+    with multiprocessing.Pool(processes=num_processes) as pool:
+        for cube in pool.starmap(get_experiment_transmission_cube, args, chunksize=1):
+            ensemble += cube
+    return ensemble
+
+def save_transmission_cube(cube_file, cube):
+    # Write to a temporary file first so readers never see a half-written cube
+    tmp_file = cube_file + ".tmp.npz"
+    numpy.savez(tmp_file, counts=cube.counts, age_bands=numpy.array(cube.age_bands),
+                num_experiments=cube.num_experiments)
+    os.replace(tmp_file, cube_file)
+    return cube_file
+
+def load_transmission_cube(cube_file):
+    with numpy.load(cube_file) as arrays:
+        return TransmissionCube(arrays["counts"], arrays["age_bands"].tolist(), int(arrays["num_experiments"]))
+
+def get_cube_file(output_dir, scenario_name):
+    return os.path.join(output_dir, scenario_name, scenario_name + "_transmission_cube.npz")
+
+def main(output_dir, scenario_names, num_days, age_bands, num_processes):
+    for scenario in scenario_names:
+        cube = get_ensemble_transmission_cube(output_dir, scenario, num_days, age_bands, num_processes=num_processes)
+        cube_file = save_transmission_cube(get_cube_file(output_dir, scenario), cube)
+        print("{}: {} experiments -> {}".format(scenario, cube.num_experiments, cube_file))
+        cases_by_pool_type = cube.get_cases_by_pool_type()
+        total = sum(cases.sum() for cases in cases_by_pool_type.values())
+        for pool_type, cases in cases_by_pool_type.items():
+            print("  {}: {:.1f} cases ({:.1%})".format(pool_type, cases.sum(), cases.sum() / total if total > 0 else 0))
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Count transmissions by infected age, infector age band, "
+                                                 "pool type and day, summed over all experiments of a scenario")
+    parser.add_argument("output_dir", type=str)
+    parser.add_argument("scenario_names", type=str, nargs="+")
+    parser.add_argument("--num_days", type=int, default=None, help="Defaults to the longest run of each scenario")
+    parser.add_argument("--age_bands", type=int, nargs="+", default=list(DEFAULT_AGE_BANDS),
+                        help="Lower bounds of the infector age bands")
+    parser.add_argument("--num_processes", type=int, default=4)
+    args = parser.parse_args()
+    main(args.output_dir, args.scenario_names, args.num_days, args.age_bands, args.num_processes)
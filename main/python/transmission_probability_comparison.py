@@ -3,9 +3,24 @@ import csv
 import matplotlib.pyplot as plt
 import os
 
-from estimate_transmission_probability import estimate_transmission_probabilities
+from event_log import get_log_file, read_events
+from figures import add_figure_arguments, draw_figures, select_figures
+from r0_curves import load_r0_curve
 
-def main(output_dir, scenario_name):
+def plot_secondary_cases_by_tp(tps, means, theoretical, secondary_cases_by_tp):
+    theor_plot, = plt.plot(tps, [theoretical[x] for x in tps], color="orange")
+    sim_plot, = plt.plot(tps, means, color="blue")
+    for tp in secondary_cases_by_tp:
+        plt.plot([tp] * len(secondary_cases_by_tp[tp]), secondary_cases_by_tp[tp], "bo")
+    plt.legend([sim_plot, theor_plot], ["Simulations", "Theoretical"])
+    plt.xlabel("Transmission probability")
+    plt.ylabel("Secondary cases from index case")
+    plt.xticks(tps)
+    #plt.boxplot([secondary_cases_by_tp[tp] for tp in tps], labels=tps)
+    #theor_plot, = plt.plot(range(1, len(tps) + 1), [theoretical[x] for x in tps], "ro")
+    #plt.legend([theor_plot],["Theoretical description"])
+
+def get_figures(output_dir, scenario_name, population_file=None, contact_matrix_file=None):
     # Get transmission probability per experiment
     experiments = {}
     summary_file = os.path.join(output_dir, scenario_name, scenario_name + "_summary.csv")
@@ -23,20 +38,16 @@ def main(output_dir, scenario_name):
         tp = experiments[exp_id]
         # Get secondary cases of index case
         secondary_cases = {}
-        transmissions_file = os.path.join(output_dir, scenario_name, "exp" + "{:04}".format(exp_id), "event_log.txt")
-        with open(transmissions_file) as f:
-            for line in f:
-                line = line.split(" ")
-                tag = line[0]
-                if tag == "[PRIM]":
-                    index_case_id = int(float(line[1]))
-                    secondary_cases[index_case_id] = 0
-                elif tag == "[TRAN]":
-                    infector_id = int(float(line[2]))
-                    if infector_id in secondary_cases:
-                        secondary_cases[infector_id] += 1
-                    else:
-                        secondary_cases[infector_id] = 1
+        transmissions_file = get_log_file(output_dir, scenario_name, exp_id)
+        for event in read_events(transmissions_file, ["PRIM", "TRAN"], {"PRIM": ["infected_id"], "TRAN": ["infector_id"]}):
+            if event.tag == "PRIM":
+                secondary_cases[event.infected_id] = 0
+            else:
+                infector_id = event.infector_id
+                if infector_id in secondary_cases:
+                    secondary_cases[infector_id] += 1
+                else:
+                    secondary_cases[infector_id] = 1
 
         if len(secondary_cases) > 1:
             print("WARNING: more than 1 index case")
@@ -54,30 +65,31 @@ def main(output_dir, scenario_name):
 
     # Get theoretical estimations
     print("Get theoretical estimation")
-    population_file = os.path.join(output_dir, "..", "data", "pop_belgium3000k_c500_teachers_censushh.csv")
-    contact_matrix_file = os.path.join(output_dir, "..", "data", "contact_matrix_flanders_conditional_teachers.xml")
+    if population_file is None:
+        population_file = os.path.join(output_dir, "..", "data", "pop_belgium3000k_c500_teachers_censushh.csv")
+    if contact_matrix_file is None:
+        contact_matrix_file = os.path.join(output_dir, "..", "data", "contact_matrix_flanders_conditional_teachers.xml")
     infectious_period_lengths = [6]
-    #theoretical = estimate_transmission_probabilities(population_file, contact_matrix_file, infectious_period_lengths, tps)
-    theoretical = {0.0: 0.0, 0.05: 7.930116415278281, 0.1: 15.442670627333122, 0.15: 22.60643305937693, 0.2: 29.480250412965912}
+    curve = load_r0_curve(population_file, contact_matrix_file, infectious_period_lengths)
+    theoretical = {tp: curve.get_r0(tp) for tp in tps}
+    return [("secondary_cases_by_tp_" + scenario_name, plot_secondary_cases_by_tp,
+             (tps, means, theoretical, secondary_cases_by_tp))]
+
+def main(output_dir, scenario_name, population_file=None, contact_matrix_file=None, figure_dir=None, formats=("png",),
+         figure_names=None, num_figure_processes=4):
+    figures = select_figures(get_figures(output_dir, scenario_name, population_file, contact_matrix_file), figure_names)
     print("Plot")
-    theor_plot, = plt.plot(tps, [theoretical[x] for x in tps], color="orange")
-    sim_plot, = plt.plot(tps, means, color="blue")
-    for tp in secondary_cases_by_tp:
-        plt.plot([tp] * len(secondary_cases_by_tp[tp]), secondary_cases_by_tp[tp], "bo")
-    plt.legend([sim_plot, theor_plot], ["Simulations", "Theoretical"])
-    plt.xlabel("Transmission probability")
-    plt.ylabel("Secondary cases from index case")
-    plt.xticks(tps)
-    #plt.boxplot([secondary_cases_by_tp[tp] for tp in tps], labels=tps)
-    #theor_plot, = plt.plot(range(1, len(tps) + 1), [theoretical[x] for x in tps], "ro")
-    #plt.legend([theor_plot],["Theoretical description"])
-    plt.show()
+    draw_figures(figures, figure_dir, formats, num_figure_processes)
 
 
 if __name__=="__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("output_dir", type=str)
     parser.add_argument("scenario_name", type=str)
-
+    parser.add_argument("--population_file", type=str, default=None,
+                        help="Population to estimate R0 with, default data/pop_belgium3000k_c500_teachers_censushh.csv")
+    parser.add_argument("--contact_matrix_file", type=str, default=None,
+                        help="Contact matrices to estimate R0 with, default data/contact_matrix_flanders_conditional_teachers.xml")
+    add_figure_arguments(parser)
     args = parser.parse_args()
-    main(args.output_dir, args.scenario_name)
+    main(args.output_dir, args.scenario_name, args.population_file, args.contact_matrix_file, args.figure_dir, args.formats, args.figures, args.num_figure_processes)
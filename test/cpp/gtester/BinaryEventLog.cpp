@@ -0,0 +1,108 @@
+/*
+ *  This is free software: you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  any later version.
+ *  The software is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *  You should have received a copy of the GNU General Public License
+ *  along with the software. If not, see <http://www.gnu.org/licenses/>.
+ *
+ *  Copyright 2020 Willem L, Kuylen E, Stijven S & Broeckhove J
+ */
+
+/**
+ * @file
+ * Round-trip test for the binary event log records.
+ */
+
+#include "contact/BinaryEventLog.h"
+#include "pop/Population.h"
+#include "util/FileSys.h"
+
+#include <fstream>
+#include <gtest/gtest.h>
+#include <string>
+#include <vector>
+
+using namespace std;
+using namespace stride;
+using namespace stride::ContactType;
+using namespace stride::util;
+
+namespace Tests {
+
+namespace {
+
+template <typename R>
+vector<R> ReadRecords(const string& fileName)
+{
+        ifstream  in(fileName, ios::binary);
+        vector<R> records;
+        R         r{};
+        while (in.read(reinterpret_cast<char*>(&r), sizeof(R))) {
+                records.push_back(r);
+        }
+        return records;
+}
+
+} // namespace
+
+TEST(BinaryEventLog, RoundTrip)
+{
+        FileSys::CreateDirectory("tests");
+        const string prefix = "tests/gtester_binary_event_log";
+
+        auto pop = Population::Create();
+        const auto p1 = pop->CreatePerson(0U, 34.0, 11U, 0U, 0U, 21U, 31U, 41U, 0U);
+        const auto p2 = pop->CreatePerson(1U, 8.0, 12U, 22U, 0U, 0U, 32U, 42U, 0U);
+        p2->SetNonComplier(Id::PrimaryCommunity);
+
+        {
+                BinaryEventLog log(prefix);
+                log.Prim(*p1, 0U);
+                log.Trans(p1, p2, Id::Workplace, 5U, p1->GetId(), 0.75);
+                log.Trans(p2, p1, Id::Household, 7U, p1->GetId(), 1.25);
+                log.Contact(p1, p2, Id::PrimaryCommunity, 9U, 0.5, 0.125);
+                log.NonComplier(*p2);
+        }
+
+        const auto prim = ReadRecords<BinaryEventLog::TransmissionRecord>(prefix + "_prim.bin");
+        ASSERT_EQ(prim.size(), 1U);
+        EXPECT_EQ(prim[0].infected_id, 0);
+        EXPECT_EQ(prim[0].infector_id, -1);
+        EXPECT_EQ(prim[0].pool_type, -1);
+        EXPECT_FLOAT_EQ(prim[0].infected_age, 34.0F);
+
+        const auto trans = ReadRecords<BinaryEventLog::TransmissionRecord>(prefix + "_tran.bin");
+        ASSERT_EQ(trans.size(), 2U);
+        EXPECT_EQ(trans[0].infected_id, 1);
+        EXPECT_EQ(trans[0].infector_id, 0);
+        EXPECT_FLOAT_EQ(trans[0].infected_age, 8.0F);
+        EXPECT_FLOAT_EQ(trans[0].infector_age, 34.0F);
+        EXPECT_EQ(trans[0].pool_type, static_cast<int8_t>(Id::Workplace));
+        EXPECT_EQ(trans[0].sim_day, 5U);
+        EXPECT_DOUBLE_EQ(trans[0].relative_infectiousness, 0.75);
+        EXPECT_EQ(trans[1].pool_type, static_cast<int8_t>(Id::Household));
+        EXPECT_EQ(trans[1].sim_day, 7U);
+
+        const auto cont = ReadRecords<BinaryEventLog::ContactRecord>(prefix + "_cont.bin");
+        ASSERT_EQ(cont.size(), 1U);
+        EXPECT_EQ(cont[0].person_id, 0);
+        EXPECT_FLOAT_EQ(cont[0].contact_age, 8.0F);
+        EXPECT_EQ(cont[0].pool_type, static_cast<int8_t>(Id::PrimaryCommunity));
+        EXPECT_DOUBLE_EQ(cont[0].contact_probability, 0.5);
+        EXPECT_DOUBLE_EQ(cont[0].transmission_probability, 0.125);
+
+        const auto ncom = ReadRecords<BinaryEventLog::NonComplierRecord>(prefix + "_ncom.bin");
+        ASSERT_EQ(ncom.size(), 1U);
+        EXPECT_EQ(ncom[0].person_id, 1);
+        EXPECT_EQ(ncom[0].k12school_id, 22U);
+        EXPECT_EQ(ncom[0].primary_community_id, 32U);
+        EXPECT_EQ(ncom[0].primary_community_nc, 1U);
+        EXPECT_EQ(ncom[0].workplace_nc, 0U);
+}
+
+} // namespace Tests
@@ -0,0 +1,99 @@
+/*
+ *  This is free software: you can redistribute it and/or modify it
+ *  under the terms of the GNU General Public License as published by
+ *  the Free Software Foundation, either version 3 of the License, or
+ *  any later version.
+ *  The software is distributed in the hope that it will be useful,
+ *  but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *  GNU General Public License for more details.
+ *  You should have received a copy of the GNU General Public License
+ *  along with the software. If not, see <http://www.gnu.org/licenses/>.
+ *
+ *  Copyright 2020 Willem L, Kuylen E, Stijven S & Broeckhove J
+ */
+
+/**
+ * @file
+ * Test that xml and compact csv hotspot files are read the same.
+ */
+
+#include "contact/NonComplianceSeeder.h"
+#include "util/FileSys.h"
+
+#include <fstream>
+#include <gtest/gtest.h>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+using namespace std;
+using namespace stride;
+using namespace stride::util;
+
+namespace Tests {
+
+TEST(NonComplianceSeeder, ReadHotspots)
+{
+        FileSys::CreateDirectory("tests");
+        const string xmlFile = "tests/gtester_hotspots.xml";
+        const string csvFile = "tests/gtester_hotspots.csv";
+        {
+                ofstream xml(xmlFile);
+                xml << "<hotspots>"
+                    << "<district><id>7</id><fraction_non_compliers>0.25</fraction_non_compliers>"
+                    << "<households><hh_id>3</hh_id><hh_id>4</hh_id><hh_id>5</hh_id><hh_id>9</hh_id></households></district>"
+                    << "<district><id>2</id><fraction_non_compliers>0.5</fraction_non_compliers>"
+                    << "<households><hh_id>1</hh_id></households></district>"
+                    << "</hotspots>";
+                ofstream csv(csvFile);
+                csv << "district_id,fraction_non_compliers,first_hh_id,last_hh_id\n"
+                    << "7,0.25,3,5\n"
+                    << "7,0.25,9,9\n"
+                    << "2,0.5,1,1\n";
+        }
+
+        const auto fromXml = NonComplianceSeeder::ReadHotspots(xmlFile);
+        const auto fromCsv = NonComplianceSeeder::ReadHotspots(csvFile);
+
+        ASSERT_EQ(fromXml.size(), 2U);
+        ASSERT_EQ(fromCsv.size(), 2U);
+        for (unsigned int i = 0; i < fromXml.size(); i++) {
+                EXPECT_DOUBLE_EQ(fromXml[i].fraction_non_compliers, fromCsv[i].fraction_non_compliers);
+                EXPECT_EQ(fromXml[i].households, fromCsv[i].households);
+        }
+        EXPECT_EQ(fromCsv[0].households, (vector<unsigned int>{3U, 4U, 5U, 9U}));
+        EXPECT_EQ(fromCsv[1].households, (vector<unsigned int>{1U}));
+}
+
+TEST(NonComplianceSeeder, ReadHotspotsRejectsInvalidCsv)
+{
+        FileSys::CreateDirectory("tests");
+        const string csvFile = "tests/gtester_hotspots_invalid.csv";
+        const vector<string> invalidLines{"7,0.25,3",      "7,0.25,3,x",   "7,0.25,-3,5", "7,0.25,5,3",
+                                          "7,1.5,3,5",     "x,0.25,3,5",   "7,,3,5",      "7,0.25,3,5,9",
+                                          "7,0.25,3,4294967296"};
+        for (const auto& line : invalidLines) {
+                {
+                        ofstream csv(csvFile);
+                        csv << "district_id,fraction_non_compliers,first_hh_id,last_hh_id\n" << line << "\n";
+                }
+                EXPECT_THROW(NonComplianceSeeder::ReadHotspots(csvFile), runtime_error) << line;
+        }
+}
+
+TEST(NonComplianceSeeder, ReadHotspotsRangeEndingAtMaxId)
+{
+        FileSys::CreateDirectory("tests");
+        const string csvFile = "tests/gtester_hotspots_max_id.csv";
+        {
+                ofstream csv(csvFile);
+                csv << "district_id,fraction_non_compliers,first_hh_id,last_hh_id\r\n"
+                    << "7,0.25,4294967294,4294967295\r\n";
+        }
+        const auto fromCsv = NonComplianceSeeder::ReadHotspots(csvFile);
+        ASSERT_EQ(fromCsv.size(), 1U);
+        EXPECT_EQ(fromCsv[0].households, (vector<unsigned int>{4294967294U, 4294967295U}));
+}
+
+} // namespace Tests